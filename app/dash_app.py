@@ -22,6 +22,7 @@ import plotly.express as px
 import os
 import joblib
 import json
+from Sent_anlys.ml.utils.model_registry import ModelRegistry
 
 # Load data and models
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -33,7 +34,10 @@ model_path = os.path.join(BASE_DIR, "../models/model.joblib")
 df = pd.read_csv(data_path)
 with open(config_path, "r") as f:
     config = json.load(f)
-model = joblib.load(model_path)
+
+def get_model():
+    # Shared, lazily loaded model, reloaded only when the file changes
+    return ModelRegistry.load_file(model_path, joblib.load)
 
 # Dash App
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
@@ -119,7 +123,7 @@ def predict_freight_rate(vessel_type, route_id, n_clicks):
     sentiment_score = route_config.get("sentiment_score")
 
     input_df = pd.DataFrame([{ "Demand Index": demand_index, "Supply Index": supply_index, "Sentiment Score": sentiment_score }])
-    predicted_rate = model.predict(input_df)[0]
+    predicted_rate = get_model().predict(input_df)[0]
 
     return f"Predicted Freight Rate: ${predicted_rate:.2f}"
 
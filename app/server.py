@@ -2,16 +2,21 @@
 from flask import Flask, request, jsonify
 import joblib
 import pandas as pd
-import json
+from Sent_anlys.ml.data.route_registry import get_route_registry
+from Sent_anlys.ml.utils.model_registry import ModelRegistry
+from Sent_anlys.ml.utils.inference import get_inference_session
 
 # Initialize Flask app
 app = Flask(__name__)
 
-# Load configuration and model
-with open("config/vessel_config.json", "r") as f:
-    config = json.load(f)
+# Load route/vessel registry; models are loaded lazily on first use
+routes = get_route_registry()
+model_registry = ModelRegistry("models/registry")
+INFERENCE_SNAPSHOT = "results/inference_snapshot.npz"
 
-model = joblib.load("models/model.joblib")
+def get_model():
+    """Rate model from models/model.joblib, loaded once per process and reloaded when the file changes."""
+    return ModelRegistry.load_file("models/model.joblib", joblib.load)
 
 def preprocess_input(data):
     """Preprocess input data to match model requirements."""
@@ -32,12 +37,59 @@ def predict():
 
         # Preprocess and predict
         preprocessed_data = preprocess_input(data)
-        predictions = model.predict(preprocessed_data)
+        predictions = get_model().predict(preprocessed_data)
         return jsonify({"predictions": predictions.tolist()})
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/model-info", methods=["GET"])
+def model_info():
+    """Return the current version and manifest of each registered model."""
+    info = {}
+    for name in model_registry.names():
+        manifest = model_registry.manifest(name)
+        info[name] = {
+            "current_version": manifest["version"] if manifest else None,
+            "versions": model_registry.versions(name),
+            "manifest": manifest
+        }
+    return jsonify(info)
+
+@app.route("/route-forecast/<route_code>", methods=["GET", "POST"])
+def route_forecast(route_code):
+    """Forecast one route from the precompiled inference session; POST a JSON feature override map."""
+    try:
+        session = get_inference_session(model_registry, INFERENCE_SNAPSHOT)
+    except ValueError as e:
+        # Snapshot written for a different model version, or artifacts failing their hash check
+        return jsonify({"error": f"Inference session unavailable: {e}"}), 503
+    if session is None:
+        return jsonify({"error": "No trained model or prediction snapshot available."}), 503
+
+    route_info = routes.get(route_code)
+    code = route_info.code if route_info is not None else route_code.upper()
+    if code not in session.route_index:
+        return jsonify({"error": f"Route {route_code} has no features in the latest snapshot."}), 404
+
+    overrides = request.get_json(silent=True) or {}
+    if not isinstance(overrides, dict):
+        return jsonify({"error": "Feature overrides must be a JSON object."}), 400
+    unknown = [name for name in overrides if name not in session.feature_index]
+    if unknown:
+        return jsonify({"error": f"Unknown features: {unknown}"}), 400
+    non_numeric = [name for name, value in overrides.items()
+                   if isinstance(value, bool) or not isinstance(value, (int, float))]
+    if non_numeric:
+        return jsonify({"error": f"Non-numeric feature values: {non_numeric}"}), 400
+
+    return jsonify(session.forecast(code, overrides))
+
+@app.route("/routes", methods=["GET"])
+def list_routes():
+    """Return every known route with its registry attributes."""
+    return jsonify([route.to_dict() for route in routes])
+
 @app.route("/voyage-insights", methods=["POST"])
 def voyage_insights():
     try:
@@ -58,18 +110,17 @@ def voyage_insights():
         weather = data.get("weather", 1.0)
 
         # Fetch route and vessel details
-        if route not in config["routes"]:
+        route_info = routes.get(route)
+        if route_info is None or not route_info.has_voyage_data:
             return jsonify({"error": f"Route {route} not found in configuration."}), 404
-        if vessel_type not in config["vessel_types"]:
+        vessel_data = routes.vessel(vessel_type)
+        if vessel_data is None:
             return jsonify({"error": f"Vessel type {vessel_type} not found in configuration."}), 404
 
-        route_data = config["routes"][route]
-        vessel_data = config["vessel_types"][vessel_type]
-
         # Calculate insights
-        distance_nm = route_data["distance_nm"]
-        port_fees = route_data["port_fees"]
-        canal_fees = route_data.get("canal_fees", 0)
+        distance_nm = route_info.distance_nm
+        port_fees = route_info.port_fees
+        canal_fees = route_info.canal_fees or 0
         consumption_rate = vessel_data["daily_consumption"]
         speed_knots = vessel_data["average_speed_knots"]
 
@@ -85,7 +136,7 @@ def voyage_insights():
             "fuel_required_tons": fuel_required,
             "voyage_cost": voyage_cost,
             "adjusted_freight_rate": adjusted_rate,
-            "sentiment_score": route_data.get("sentiment_score", 0),
+            "sentiment_score": route_info.sentiment_score or 0,
             "seasonality_factor": seasonality,
             "congestion_factor": congestion,
             "weather_factor": weather
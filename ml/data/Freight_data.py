@@ -1,6 +1,14 @@
 import pandas as pd
+import numpy as np
 import os
+import re
 from datetime import datetime
+from data.freight_store import FreightHistoryStore
+from data.route_registry import FREIGHT_ROUTE_CODES, NIGERIA_KEYWORDS, get_route_registry
+
+# Precompiled once per process and shared by the snapshot and bulk paths
+NIGERIA_PATTERN = re.compile("|".join(re.escape(k) for k in NIGERIA_KEYWORDS), re.IGNORECASE)
+ROUTE_CODE_PATTERN = re.compile(r"^(T[CD])\d+[A-Z]?(?:_\d+)?$")
 
 class FreightDataProcessor:
     """
@@ -9,6 +17,7 @@ class FreightDataProcessor:
     def __init__(self, output_dir="data"):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
+        self.history = FreightHistoryStore(os.path.join(output_dir, "freight_history"))
         
     def process_raw_data(self, route_data):
         """
@@ -50,16 +59,133 @@ class FreightDataProcessor:
         df["RouteType"] = df["Route"].str.slice(0, 2)
         
         # Add Nigeria relevance indicator for better filtering
-        nigeria_keywords = ["Nigeria", "West Africa", "Lagos", "Lome", "Dar es Salaam"]
-        df["NigeriaRelevant"] = df["Description"].str.contains('|'.join(nigeria_keywords), case=False, na=False)
+        df["NigeriaRelevant"] = self.nigeria_relevance(df["Description"])
         
         return df
     
-    def save_data(self, df, filename="freight_rates.csv"):
-        """Save processed data to CSV"""
+    def nigeria_relevance(self, descriptions):
+        """
+        Flag descriptions mentioning Nigeria/West Africa ports
+        
+        The pattern runs once per distinct description rather than once per
+        row, which matters for route histories where descriptions repeat daily.
+        """
+        labels = pd.Categorical(descriptions.astype("string"))
+        matches = np.array([bool(NIGERIA_PATTERN.search(label)) for label in labels.categories] + [False])
+        return pd.Series(matches[labels.codes], index=descriptions.index)
+    
+    def load_bulk_source(self, source):
+        """
+        Load columnar freight input into a DataFrame of raw values
+        
+        Args:
+            source: Path to a CSV/Excel/Parquet file, a DataFrame or a dict of arrays
+        """
+        if isinstance(source, pd.DataFrame):
+            return source.copy()
+        if isinstance(source, dict):
+            return pd.DataFrame(source)
+            
+        extension = os.path.splitext(str(source))[1].lower()
+        if extension == ".csv":
+            # Read as text so coercion failures can be detected and reported
+            return pd.read_csv(source, dtype=str, keep_default_na=False, na_values=[""])
+        if extension in (".xlsx", ".xls"):
+            return pd.read_excel(source, dtype=str)
+        if extension == ".parquet":
+            return pd.read_parquet(source)
+            
+        raise ValueError(f"Unsupported freight data source: {source}")
+    
+    def process_bulk_data(self, source, date_column="Date"):
+        """
+        Validate and standardise bulk route histories in one vectorized pass
+        
+        Args:
+            source: Path to a CSV/Excel/Parquet file, a DataFrame or a dict of arrays
+            date_column: Column holding the observation date
+            
+        Returns:
+            Tuple of (processed DataFrame, rejected rows with a RejectReason column)
+        """
+        raw = self.load_bulk_source(source)
+        
+        missing = [col for col in ("Route", "TCE") if col not in raw.columns]
+        if missing:
+            raise ValueError(f"Freight data missing required columns: {missing}")
+            
+        reasons = pd.Series("", index=raw.index)
+        
+        def reject(mask, reason):
+            reasons[mask & (reasons == "")] = reason
+        
+        df = pd.DataFrame(index=raw.index)
+        df["Route"] = raw["Route"].astype("string").str.strip().str.upper()
+        df["Description"] = raw["Description"] if "Description" in raw.columns else pd.NA
+        
+        route_type = df["Route"].str.extract(ROUTE_CODE_PATTERN, expand=False)
+        reject(route_type.isna(), "invalid route code")
+        
+        # Coerce numerics, recording values that were present but not numeric
+        for col in ["TCE", "Worldscale", "Change (TCE)", "OPEX"]:
+            if col not in raw.columns:
+                continue
+            values = pd.to_numeric(raw[col], errors="coerce")
+            present = raw[col].notna() & (raw[col].astype("string").str.strip() != "")
+            reject(values.isna() & present, f"non-numeric {col}")
+            df[col] = values.astype("float64")
+            
+        reject(df["TCE"].isna(), "missing TCE")
+        
+        if date_column in raw.columns:
+            df["Date"] = pd.to_datetime(raw[date_column], errors="coerce").dt.normalize()
+            reject(df["Date"].isna(), "invalid date")
+        else:
+            df["Date"] = pd.Timestamp(datetime.now().date())
+            
+        # One observation per route and day; the last valid one in the input wins
+        valid = reasons == ""
+        duplicated = pd.Series(False, index=df.index)
+        duplicated[valid] = df.loc[valid].duplicated(subset=["Route", "Date"], keep="last")
+        reject(duplicated, "duplicate route/date")
+        
+        rejected = raw[reasons != ""].assign(RejectReason=reasons[reasons != ""])
+        df = df[reasons == ""].copy()
+        df["RouteType"] = route_type[reasons == ""]
+        
+        df = df.sort_values(["Route", "Date"], kind="stable").reset_index(drop=True)
+        
+        # Route histories carry no change column, so derive it per route
+        if "Change (TCE)" not in df.columns:
+            df["Change (TCE)"] = df.groupby("Route")["TCE"].diff().fillna(0)
+            
+        df["ProcessedDate"] = datetime.now().strftime("%Y-%m-%d")
+        df["NigeriaRelevant"] = self.nigeria_relevance(df["Description"])
+        
+        if not rejected.empty:
+            print(f"⚠️ Rejected {len(rejected)} of {len(raw)} freight rows: "
+                  f"{rejected['RejectReason'].value_counts().to_dict()}")
+            
+        return df, rejected
+    
+    def save_rejected(self, rejected, filename="freight_rejected.csv"):
+        """Save rejected bulk rows for review"""
+        output_path = os.path.join(self.output_dir, filename)
+        rejected.to_csv(output_path, index=False)
+        print(f"✅ Rejected freight rows saved to: {output_path}")
+        return output_path
+    
+    def save_data(self, df, filename="freight_rates.csv", record_history=True):
+        """Save processed data to CSV and append it to the freight history"""
         output_path = os.path.join(self.output_dir, filename)
         df.to_csv(output_path, index=False)
         print(f"✅ Freight data saved to: {output_path}")
+        
+        if record_history:
+            # Snapshot rows are dated by the run that processed them
+            date_column = "Date" if "Date" in df.columns else "ProcessedDate"
+            self.history.write(df, date_column=date_column)
+            
         return output_path
         
     def load_data(self, filename="freight_rates.csv"):
@@ -73,30 +199,7 @@ class FreightDataProcessor:
             
     def get_route_mapping(self):
         """Return mapping of route codes to descriptions for reference"""
-        return {
-            "TD2": "Middle East Gulf to Singapore",
-            "TD3C": "Middle East Gulf to China (VLCC)",
-            "TD6": "Black Sea to Mediterranean (Suezmax)",
-            "TD7": "North Sea to Continent (Aframax)",
-            "TD8": "Kuwait to Singapore",
-            "TD9": "Caribbean to US Gulf (LR1)",
-            "TD15": "West Africa to China (VLCC)",
-            "TD20": "West Africa to UK-Continent (Suezmax)",
-            "TD22": "US Gulf to China",
-            "TD25": "US Gulf to UK-Continent",
-            "TD27": "Guyana to ARA",
-            "TC5": "CPP Middle East Gulf to Japan (LR1)",
-            "TC8": "CPP Middle East Gulf to UK-Continent (LR1)",
-            "TC12": "Naphtha West Coast India to Japan (MR)",
-            "TC15": "Naphtha Mediterranean to Far East (Aframax)",
-            "TC16": "ARA to Offshore Lome (LR1)",
-            "TC17": "CPP Jubail to Dar es Salaam (MR)",
-            "TC18": "CPP US Gulf to Brazil (MR)",
-            "TC19": "CPP Amsterdam to Lagos (MR)",
-            "TC20": "CPP Middle East Gulf to UK-Continent (Aframax)",
-            "TC21": "CPP US Gulf to Caribbean",
-            "TC23": "CPP/UNL/ULSD ARA to UK-Cont"
-        }
+        return get_route_registry().descriptions(FREIGHT_ROUTE_CODES)
 
 # Example usage
 if __name__ == "__main__":
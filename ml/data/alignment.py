@@ -0,0 +1,204 @@
+import os
+import numpy as np
+import pandas as pd
+import logging
+from data.macro_store import MacroHistoryStore
+
+logger = logging.getLogger("TimeSeriesAligner")
+
+class TimeSeriesAligner:
+    """
+    Aligns mixed-frequency macro, market and sentiment series onto one calendar.
+
+    Every input is first reduced to long (date, series, value) records, then each
+    series is mapped onto the calendar according to its fill rule:
+        asof  - last observation on or before each calendar date (optionally
+                only if it is no older than `tolerance`)
+        mean  - average of the observations falling in each calendar period
+        sum   - total of the observations falling in each calendar period
+        last  - last observation inside each calendar period, NaN otherwise
+    The result is a single float32 panel indexed by calendar date.
+    """
+    def __init__(self, output_dir="data", freq="W-FRI", fill_rules=None, default_rule=None):
+        self.output_dir = output_dir
+        self.freq = freq
+        self.default_rule = default_rule or {"method": "asof", "tolerance": None}
+
+        # Sentiment is an event stream, so it is aggregated per period rather than carried forward
+        self.fill_rules = {
+            "news_sentiment": {"method": "mean"},
+            "news_volume": {"method": "sum"}
+        }
+        if fill_rules:
+            self.fill_rules.update(fill_rules)
+
+    def rule_for(self, series):
+        """Return the fill rule for a series"""
+        rule = dict(self.default_rule)
+        rule.update(self.fill_rules.get(series, {}))
+        return rule
+
+    @staticmethod
+    def _to_dates(values):
+        """Parse mixed date strings/timestamps into naive calendar dates"""
+        return pd.to_datetime(values, utc=True, errors="coerce").dt.tz_localize(None).dt.normalize()
+
+    def indicators_to_long(self, indicators_df):
+        """Long records from macro indicators (date, metric, value columns)"""
+        return pd.DataFrame({
+            "date": self._to_dates(indicators_df["date"]),
+            "series": indicators_df["metric"].astype(str),
+            "value": pd.to_numeric(indicators_df["value"], errors="coerce")
+        })
+
+    def market_to_long(self, market_df):
+        """Long records from market data (Date, Symbol, Close columns)"""
+        return pd.DataFrame({
+            "date": self._to_dates(market_df["Date"]),
+            "series": market_df["Symbol"].astype(str),
+            "value": pd.to_numeric(market_df["Close"], errors="coerce")
+        })
+
+    def news_to_long(self, news_df):
+        """Daily sentiment mean and article volume from scored news"""
+        daily = pd.DataFrame({
+            "date": self._to_dates(news_df["date"]),
+            "value": pd.to_numeric(news_df["sentiment_score"], errors="coerce")
+        }).dropna(subset=["date"]).groupby("date")["value"].agg(["mean", "count"])
+
+        return pd.concat([
+            pd.DataFrame({"date": daily.index, "series": "news_sentiment", "value": daily["mean"].to_numpy()}),
+            pd.DataFrame({"date": daily.index, "series": "news_volume", "value": daily["count"].to_numpy(dtype="float64")})
+        ], ignore_index=True)
+
+    def build_calendar(self, long_df, start=None, end=None):
+        """Calendar of period-end dates covering the observations"""
+        start = pd.Timestamp(start) if start is not None else long_df["date"].min()
+        end = pd.Timestamp(end) if end is not None else long_df["date"].max()
+        # Roll the end forward so the most recent observations land on the calendar
+        end = pd.tseries.frequencies.to_offset(self.freq).rollforward(end)
+        return pd.date_range(start, end, freq=self.freq)
+
+    def _align_asof(self, long_df, names, calendar):
+        """As-of join every series onto the calendar in one merge_asof pass"""
+        left = pd.DataFrame({
+            "date": np.tile(calendar.to_numpy(), len(names)),
+            "series": np.repeat(names, len(calendar))
+        }).sort_values("date", kind="stable")
+
+        right = long_df.rename(columns={"date": "obs_date"}).sort_values("obs_date", kind="stable")
+
+        merged = pd.merge_asof(
+            left, right,
+            left_on="date", right_on="obs_date",
+            by="series", direction="backward"
+        )
+
+        tolerances = pd.Series({name: self.rule_for(name).get("tolerance") for name in names}).dropna()
+        if not tolerances.empty:
+            limit = merged["series"].map(pd.to_timedelta(tolerances))
+            stale = (merged["date"] - merged["obs_date"]) > limit
+            merged.loc[stale, "value"] = np.nan
+
+        return merged.pivot(index="date", columns="series", values="value")
+
+    def _align_periods(self, long_df, method, calendar):
+        """Aggregate observations into the calendar period that contains them"""
+        # Period k covers (calendar[k-1], calendar[k]]
+        bins = calendar.searchsorted(long_df["date"].to_numpy(), side="left")
+        in_range = bins < len(calendar)
+
+        grouped = long_df.loc[in_range].assign(period=bins[in_range]).groupby(["period", "series"])["value"]
+        wide = grouped.agg(method).unstack("series").reindex(range(len(calendar)))
+        if method == "sum":
+            wide = wide.fillna(0.0)
+        wide.index = calendar
+        return wide
+
+    def align(self, long_df, start=None, end=None):
+        """
+        Align long (date, series, value) records onto the common calendar
+
+        Returns:
+            float32 DataFrame indexed by calendar date with one column per series
+        """
+        long_df = long_df.dropna(subset=["date", "value"])
+        if long_df.empty:
+            return pd.DataFrame(dtype="float32")
+
+        calendar = self.build_calendar(long_df, start, end)
+        names = list(dict.fromkeys(long_df["series"]))
+        methods = {name: self.rule_for(name)["method"] for name in names}
+
+        unknown = set(methods.values()) - {"asof", "mean", "sum", "last"}
+        if unknown:
+            raise ValueError(f"Unknown fill method(s): {', '.join(sorted(unknown))}")
+
+        frames = []
+        asof_names = [name for name in names if methods[name] == "asof"]
+        if asof_names:
+            frames.append(self._align_asof(long_df[long_df["series"].isin(asof_names)], asof_names, calendar))
+
+        for method in ("mean", "sum", "last"):
+            method_names = [name for name in names if methods[name] == method]
+            if method_names:
+                frames.append(self._align_periods(long_df[long_df["series"].isin(method_names)], method, calendar))
+
+        panel = pd.concat(frames, axis=1).reindex(columns=names).astype("float32")
+        panel.index.name = "date"
+        return panel
+
+    def build_panel(self, indicators_df=None, market_df=None, news_df=None, start=None, end=None):
+        """Align every available source into one panel"""
+        parts = []
+        if indicators_df is not None and not indicators_df.empty:
+            parts.append(self.indicators_to_long(indicators_df))
+        if market_df is not None and not market_df.empty:
+            parts.append(self.market_to_long(market_df))
+        if news_df is not None and not news_df.empty and "sentiment_score" in news_df.columns:
+            parts.append(self.news_to_long(news_df))
+
+        if not parts:
+            logger.warning("No series available to align")
+            return pd.DataFrame(dtype="float32")
+
+        return self.align(pd.concat(parts, ignore_index=True), start, end)
+
+    def build_panel_from_dir(self, data_dir=None, filename="aligned_panel.csv"):
+        """Build the shared panel from the standard data files and save it"""
+        data_dir = data_dir or self.output_dir
+        sources = {
+            "indicators_df": "combined_indicators.csv",
+            "market_df": "maritime_data_2025.csv",
+            "news_df": "news_sentiment.csv"
+        }
+
+        frames = {}
+        for key, name in sources.items():
+            path = os.path.join(data_dir, name)
+            frames[key] = pd.read_csv(path) if os.path.exists(path) else None
+            
+        # Full indicator history from the columnar store when available
+        history = MacroHistoryStore(os.path.join(data_dir, "macro_history")).read_long()
+        if history is not None:
+            frames["indicators_df"] = history
+
+        panel = self.build_panel(**frames)
+        if panel.empty:
+            return None
+
+        return self.save_panel(panel, filename)
+
+    def save_panel(self, panel, filename="aligned_panel.csv"):
+        """Save the aligned panel for downstream consumers"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_path = os.path.join(self.output_dir, filename)
+        panel.to_csv(output_path)
+        logger.info(f"✅ Aligned panel ({panel.shape[0]} dates x {panel.shape[1]} series) saved to {output_path}")
+        return output_path
+
+    @staticmethod
+    def load_panel(path):
+        """Load a saved panel back as float32"""
+        panel = pd.read_csv(path, index_col="date", parse_dates=["date"])
+        return panel.astype("float32")
@@ -0,0 +1,139 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger("FreightHistoryStore")
+
+class FreightHistoryStore:
+    """
+    Append-only freight rate history keyed by (Route, Date).
+
+    Observations are partitioned by month into CSV files (YYYY-MM.csv), so a
+    daily run only rewrites the current month and range reads only parse the
+    months they cover. Re-writing the same (Route, Date) replaces the stored
+    row, which makes repeated runs on the same day idempotent.
+    """
+    KEY_COLUMNS = ["Route", "Date"]
+    PARTITION_PATTERN = re.compile(r"^(\d{4})-(\d{2})\.csv$")
+
+    def __init__(self, root_dir="data/freight_history"):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _partition_path(self, period):
+        return os.path.join(self.root_dir, f"{period}.csv")
+
+    def partitions(self):
+        """Sorted month periods that have data"""
+        periods = []
+        for name in os.listdir(self.root_dir):
+            match = self.PARTITION_PATTERN.match(name)
+            if match:
+                periods.append(pd.Period(f"{match.group(1)}-{match.group(2)}", freq="M"))
+        return sorted(periods)
+
+    def _read_partition(self, period):
+        df = pd.read_csv(self._partition_path(period), parse_dates=["Date"])
+        df["Route"] = df["Route"].astype(str)
+        return df
+
+    def write(self, df, date_column="Date"):
+        """
+        Upsert freight observations
+
+        Args:
+            df: Processed freight rows with a Route column and a date column
+            date_column: Column holding the observation date
+
+        Returns:
+            Number of rows written
+        """
+        if date_column not in df.columns:
+            raise ValueError(f"Freight history rows need a '{date_column}' column")
+
+        new = df.rename(columns={date_column: "Date"})
+        new["Date"] = pd.to_datetime(new["Date"], errors="coerce").dt.normalize()
+        new["Route"] = new["Route"].astype(str)
+        new = new.dropna(subset=["Date"]).drop_duplicates(subset=self.KEY_COLUMNS, keep="last")
+
+        for period, rows in new.groupby(new["Date"].dt.to_period("M")):
+            path = self._partition_path(period)
+            if os.path.exists(path):
+                # New rows come first so they win on duplicate keys
+                rows = pd.concat([rows, self._read_partition(period)], ignore_index=True)
+                rows = rows.drop_duplicates(subset=self.KEY_COLUMNS, keep="first")
+
+            rows = rows.sort_values(["Date", "Route"], kind="stable")
+            columns = self.KEY_COLUMNS + [c for c in rows.columns if c not in self.KEY_COLUMNS]
+
+            tmp_path = path + ".tmp"
+            rows[columns].to_csv(tmp_path, index=False, date_format="%Y-%m-%d")
+            os.replace(tmp_path, path)
+
+        logger.info(f"✅ Stored {len(new)} freight observations in {self.root_dir}")
+        return len(new)
+
+    def read(self, start=None, end=None, routes=None):
+        """
+        Read observations within [start, end]
+
+        Returns:
+            Long DataFrame sorted by Route and Date, or None if nothing is stored
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        # Skip whole months outside the requested range
+        frames = [
+            self._read_partition(period) for period in self.partitions()
+            if (start is None or period.end_time >= start) and (end is None or period.start_time <= end)
+        ]
+        if not frames:
+            return None
+
+        df = pd.concat(frames, ignore_index=True)
+        mask = np.ones(len(df), dtype=bool)
+        if start is not None:
+            mask &= (df["Date"] >= start).to_numpy()
+        if end is not None:
+            mask &= (df["Date"] <= end).to_numpy()
+        if routes is not None:
+            mask &= df["Route"].isin(routes).to_numpy()
+
+        return df[mask].sort_values(["Route", "Date"], kind="stable").reset_index(drop=True)
+
+    def latest(self, routes=None):
+        """Most recent observation per route, in the freight_rates.csv snapshot layout"""
+        history = self.read(routes=routes)
+        if history is None:
+            return None
+        return history.groupby("Route", sort=False).tail(1).reset_index(drop=True)
+
+    def matrix(self, value="TCE", start=None, end=None, routes=None, forward_fill=False):
+        """
+        Dense route x date matrix of one value column
+
+        Args:
+            value: Column to pivot, e.g. "TCE" or "Worldscale"
+            forward_fill: Carry each route's last value over dates it was not published
+
+        Returns:
+            float32 DataFrame indexed by Route with one column per observed date
+        """
+        history = self.read(start, end, routes)
+        if history is None or value not in history.columns:
+            return pd.DataFrame(dtype="float32")
+
+        route_codes, route_index = np.unique(history["Route"].to_numpy(), return_inverse=True)
+        dates, date_index = np.unique(history["Date"].to_numpy(), return_inverse=True)
+
+        # Scatter straight into the dense array; keys are unique so no aggregation is needed
+        dense = np.full((len(route_codes), len(dates)), np.nan, dtype="float32")
+        dense[route_index, date_index] = pd.to_numeric(history[value], errors="coerce").to_numpy(dtype="float32")
+
+        matrix = pd.DataFrame(dense, index=pd.Index(route_codes, name="Route"), columns=pd.DatetimeIndex(dates, name="Date"))
+        if forward_fill:
+            matrix = matrix.ffill(axis=1)
+        return matrix
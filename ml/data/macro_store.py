@@ -0,0 +1,152 @@
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger("MacroHistoryStore")
+
+# One record per observation, so dates and values are written in one file
+SERIES_DTYPE = np.dtype([("date", "datetime64[D]"), ("value", "float32")])
+
+class MacroHistoryStore:
+    """
+    Columnar full-history store for macro indicators.
+
+    Each metric is its own partition holding one sorted NumPy record array,
+    series.npy, with date (datetime64[D]) and value (float32) fields. Dates and
+    values live in one file so they are always replaced together. Reads
+    memory-map the array and binary-search the date range, so consumers can
+    load exactly the window they need without parsing decades of CSV rows.
+    """
+    def __init__(self, root_dir="data/macro_history"):
+        self.root_dir = root_dir
+        self.index_path = os.path.join(root_dir, "index.json")
+        os.makedirs(root_dir, exist_ok=True)
+
+    @staticmethod
+    def slug(metric):
+        """Filesystem-safe partition name for a metric"""
+        return re.sub(r"[^a-z0-9]+", "_", metric.lower()).strip("_")
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path, "r") as f:
+            return json.load(f)
+
+    def _save_index(self, index):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def metrics(self):
+        """Names of all stored metrics"""
+        return sorted(self._load_index())
+
+    def _partition(self, metric):
+        return os.path.join(self.root_dir, self.slug(metric))
+
+    def _load_columns(self, metric, mmap_mode="r"):
+        partition = self._partition(metric)
+        series_path = os.path.join(partition, "series.npy")
+        if os.path.exists(series_path):
+            series = np.load(series_path, mmap_mode=mmap_mode)
+            return series["date"], series["value"]
+
+        # Partitions written before dates and values shared one file
+        dates_path = os.path.join(partition, "dates.npy")
+        if not os.path.exists(dates_path):
+            return None, None
+        dates = np.load(dates_path, mmap_mode=mmap_mode)
+        values = np.load(os.path.join(partition, "values.npy"), mmap_mode=mmap_mode)
+        return dates, values
+
+    def write(self, metric, df):
+        """
+        Upsert observations for a metric
+
+        Args:
+            metric: Metric name
+            df: DataFrame with date and value columns; new values win on duplicate dates
+
+        Returns:
+            Number of observations stored for the metric
+        """
+        new_dates = pd.to_datetime(df["date"], errors="coerce").to_numpy().astype("datetime64[D]")
+        new_values = pd.to_numeric(df["value"], errors="coerce").to_numpy(dtype="float32")
+        # Missing values (Alpha Vantage reports them as ".") never overwrite stored ones
+        valid = ~np.isnat(new_dates) & ~np.isnan(new_values)
+        new_dates, new_values = new_dates[valid], new_values[valid]
+
+        old_dates, old_values = self._load_columns(metric, mmap_mode=None)
+        if old_dates is not None:
+            new_dates = np.concatenate([new_dates, old_dates])
+            new_values = np.concatenate([new_values, old_values])
+
+        # np.unique keeps the first occurrence, and the new rows come first
+        dates, first = np.unique(new_dates, return_index=True)
+        values = new_values[first]
+
+        series = np.empty(len(dates), dtype=SERIES_DTYPE)
+        series["date"] = dates
+        series["value"] = values
+
+        partition = self._partition(metric)
+        os.makedirs(partition, exist_ok=True)
+        tmp_path = os.path.join(partition, "series.tmp.npy")
+        np.save(tmp_path, series)
+        os.replace(tmp_path, os.path.join(partition, "series.npy"))
+        for name in ("dates.npy", "values.npy"):
+            legacy_path = os.path.join(partition, name)
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+
+        index = self._load_index()
+        index[metric] = self.slug(metric)
+        self._save_index(index)
+
+        return len(dates)
+
+    def read(self, metric, start=None, end=None):
+        """
+        Read one metric's observations within [start, end]
+
+        Returns:
+            DataFrame with datetime64 date and float32 value columns
+        """
+        dates, values = self._load_columns(metric)
+        if dates is None:
+            return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "value": pd.Series(dtype="float32")})
+
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start).date()), side="left")
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end).date()), side="right")
+
+        return pd.DataFrame({
+            "date": dates[lo:hi].astype("datetime64[ns]"),
+            "value": np.array(values[lo:hi])
+        })
+
+    def read_long(self, metrics=None, start=None, end=None):
+        """
+        Read several metrics in the long date/metric/value layout used by combined_indicators.csv
+
+        Returns:
+            DataFrame or None if nothing is stored
+        """
+        metrics = metrics or self.metrics()
+        frames = []
+        for metric in metrics:
+            frame = self.read(metric, start, end)
+            if not frame.empty:
+                frame["metric"] = metric
+                frames.append(frame)
+
+        if not frames:
+            return None
+
+        long_df = pd.concat(frames, ignore_index=True)
+        long_df["metric"] = long_df["metric"].astype("category")
+        return long_df
@@ -2,8 +2,13 @@ import os
 import requests
 import pandas as pd
 import json
+import time
 from datetime import datetime
 import logging
+from utils.rate_limiter import QuotaScheduler
+from data.alignment import TimeSeriesAligner
+from data.rolling_correlation import RollingCorrelation
+from data.macro_store import MacroHistoryStore
 
 # Configure logging
 logging.basicConfig(
@@ -21,27 +26,48 @@ class MacroDataCollector:
     Collects macroeconomic data relevant to maritime shipping using Alpha Vantage API.
     Includes file-based storage for environments without database access.
     """
-    def __init__(self, api_key, output_dir="data"):
+    def __init__(self, api_key, output_dir="data", requests_per_minute=5, requests_per_day=25, max_workers=4,
+                 cache_ttls=None, correlation_window=52, export_limit=20):
         self.api_key = api_key
         self.output_dir = output_dir
         self.base_url = "https://www.alphavantage.co/query"
         
+        # Alpha Vantage quota settings (free tier defaults)
+        self.requests_per_minute = requests_per_minute
+        self.requests_per_day = requests_per_day
+        self.max_workers = max_workers
+        
+        # Raw responses stay fresh for roughly one release cycle of their series (days)
+        self.cache_ttls = {
+            "daily": 1,
+            "weekly": 7,
+            "monthly": 30,
+            "quarterly": 91,
+            "annual": 365
+        }
+        if cache_ttls:
+            self.cache_ttls.update(cache_ttls)
+        
+        # Shared calendar alignment for mixed-frequency indicators
+        self.aligner = TimeSeriesAligner(output_dir=output_dir)
+        
+        # Rolling window (in calendar periods) for indicator correlations; None for expanding
+        self.correlation_window = correlation_window
+        
+        # Full indicator history, partitioned by metric
+        self.history = MacroHistoryStore(os.path.join(output_dir, "macro_history"))
+        self.export_limit = export_limit
+        
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
         os.makedirs(os.path.join(output_dir, "raw"), exist_ok=True)
         
-    def fetch_data(self, function, metric, interval="weekly", limit=20):
+    def request_payload(self, function, interval="weekly"):
         """
-        Fetch data from Alpha Vantage API
+        Request one Alpha Vantage series
         
-        Args:
-            function: Alpha Vantage function name
-            metric: Name to save the data under
-            interval: Data interval (weekly/monthly)
-            limit: Maximum number of records to keep
-            
         Returns:
-            DataFrame with the fetched data or None if failed
+            Parsed JSON payload or None if the request failed
         """
         params = {
             "function": function,
@@ -49,51 +75,127 @@ class MacroDataCollector:
             "apikey": self.api_key
         }
         
+        response = requests.get(self.base_url, params=params)
+        
+        if response.status_code != 200:
+            logger.error(f"Error fetching {function}: {response.status_code} - {response.text}")
+            return None
+            
+        return response.json()
+    
+    def raw_path(self, metric):
+        """Path of the cached raw payload for a metric"""
+        return os.path.join(self.output_dir, "raw", f"{metric.lower().replace(' ', '_')}_raw.json")
+    
+    def save_raw(self, metric, data):
+        """Save a raw API payload to the response cache"""
+        raw_path = self.raw_path(metric)
+        tmp_path = raw_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, raw_path)
+        return raw_path
+    
+    def load_cached_payload(self, metric, interval="weekly"):
+        """
+        Return the cached raw payload for a metric if it is still within its TTL
+        
+        Returns:
+            Parsed JSON payload or None if missing, stale or unreadable
+        """
+        raw_path = self.raw_path(metric)
+        if not os.path.exists(raw_path):
+            return None
+            
+        ttl_days = self.cache_ttls.get(interval, self.cache_ttls["weekly"])
+        age_days = (time.time() - os.path.getmtime(raw_path)) / 86400
+        if age_days >= ttl_days:
+            return None
+            
         try:
-            logger.info(f"Fetching {metric} data...")
-            response = requests.get(self.base_url, params=params)
+            with open(raw_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache for {metric}: {str(e)}")
+            return None
             
-            # Save raw response for debugging
-            raw_path = os.path.join(self.output_dir, "raw", f"{metric.lower().replace(' ', '_')}_raw.json")
-            with open(raw_path, 'w') as f:
-                json.dump(response.json(), f, indent=2)
-                
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Handle different API response formats
-                if "data" in data:
-                    records = data["data"]
-                elif "Weekly Time Series" in data:
-                    # Handle time series format
-                    ts_data = data["Weekly Time Series"]
-                    records = [{"date": date, "value": float(values["4. close"])} 
-                              for date, values in ts_data.items()]
-                else:
-                    logger.warning(f"Unexpected data format for {metric}")
-                    return None
-                
-                if not records:
-                    logger.warning(f"No data found for {metric}")
-                    return None
-                
-                # Convert to DataFrame
-                df = pd.DataFrame(records)
-                
-                # Limit records if specified
-                if limit and len(df) > limit:
-                    df = df.head(limit)
-                
-                # Add metadata
-                df["metric"] = metric
-                df["retrieved_date"] = datetime.now().strftime("%Y-%m-%d")
-                
-                return df
+        logger.info(f"Using cached {metric} data ({age_days:.1f} of {ttl_days} days old)")
+        return data
+    
+    def parse_payload(self, data, metric, limit=None):
+        """
+        Convert an Alpha Vantage payload into a DataFrame
+        
+        Args:
+            data: Parsed JSON payload
+            metric: Name to save the data under
+            limit: Maximum number of (most recent) records to keep; None keeps full history
+            
+        Returns:
+            DataFrame with the records or None if the payload has no data
+        """
+        # Handle different API response formats
+        if "data" in data:
+            records = data["data"]
+        elif "Weekly Time Series" in data:
+            # Handle time series format
+            ts_data = data["Weekly Time Series"]
+            records = [{"date": date, "value": float(values["4. close"])} 
+                      for date, values in ts_data.items()]
+        else:
+            logger.warning(f"Unexpected data format for {metric}")
+            return None
+        
+        if not records:
+            logger.warning(f"No data found for {metric}")
+            return None
+        
+        # Convert to DataFrame
+        df = pd.DataFrame(records)
+        
+        # Limit records if specified
+        if limit and len(df) > limit:
+            df = df.head(limit)
+        
+        # Add metadata
+        df["metric"] = metric
+        df["retrieved_date"] = datetime.now().strftime("%Y-%m-%d")
+        
+        return df
+    
+    def fetch_data(self, function, metric, interval="weekly", limit=None, force_refresh=False):
+        """
+        Fetch data from Alpha Vantage API, serving it from the raw cache while fresh
+        
+        Args:
+            function: Alpha Vantage function name
+            metric: Name to save the data under
+            interval: Data interval (weekly/monthly)
+            limit: Maximum number of (most recent) records to keep; None keeps full history
+            force_refresh: Ignore the raw cache
+            
+        Returns:
+            DataFrame with the fetched data or None if failed
+        """
+        try:
+            data = None if force_refresh else self.load_cached_payload(metric, interval)
+            if data is not None:
+                return self.parse_payload(data, metric, limit)
                 
-            else:
-                logger.error(f"Error fetching {metric}: {response.status_code} - {response.text}")
+            logger.info(f"Fetching {metric} data...")
+            data = self.request_payload(function, interval)
+            
+            if data is None:
                 return None
                 
+            df = self.parse_payload(data, metric, limit)
+            
+            # Only cache usable payloads so rate-limit notices are retried next run
+            if df is not None:
+                self.save_raw(metric, data)
+            
+            return df
+                
         except Exception as e:
             logger.exception(f"Error fetching {metric} data: {e}")
             return None
@@ -122,9 +224,21 @@ class MacroDataCollector:
             logger.warning(f"File not found: {input_path}")
             return None
     
-    def fetch_all_indicators(self):
-        """Fetch all relevant economic indicators"""
-        indicators = [
+    def load_indicators(self, metrics=None, start=None, end=None):
+        """
+        Load indicator history in the long date/metric/value layout
+        
+        Reads the columnar history store, falling back to combined_indicators.csv
+        for data collected before the store existed.
+        """
+        df = self.history.read_long(metrics, start, end)
+        if df is not None:
+            return df
+        return self.load_data("combined_indicators.csv")
+    
+    def get_indicators(self):
+        """Return the economic indicators to collect"""
+        return [
             {"function": "WTI", "metric": "Oil Price", "interval": "weekly"},
             {"function": "BRENT", "metric": "Brent Oil Price", "interval": "weekly"},
             {"function": "NATURAL_GAS", "metric": "Natural Gas", "interval": "weekly"},
@@ -132,44 +246,121 @@ class MacroDataCollector:
             {"function": "REAL_GDP", "metric": "US GDP", "interval": "quarterly"},
             {"function": "CPI", "metric": "US Inflation", "interval": "monthly"}
         ]
+    
+    def fetch_all_indicators(self, indicators=None, force_refresh=False):
+        """
+        Fetch all relevant economic indicators
+        
+        Indicators whose raw payload is still within its TTL are served from
+        the cache. The rest run concurrently through a QuotaScheduler, which
+        keeps them under the per-minute and per-day limits and issues
+        identical (function, interval) requests only once.
+        """
+        indicators = indicators or self.get_indicators()
         
         results = {}
-        combined_df = pd.DataFrame()
+        frames = []
         
-        for indicator in indicators:
-            df = self.fetch_data(
-                indicator["function"], 
-                indicator["metric"], 
-                indicator.get("interval", "weekly")
-            )
+        scheduler = QuotaScheduler(
+            requests_per_minute=self.requests_per_minute,
+            requests_per_day=self.requests_per_day,
+            max_workers=self.max_workers,
+            usage_path=os.path.join(self.output_dir, "raw", "api_usage.json")
+        )
+        
+        with scheduler:
+            pending = []
+            for indicator in indicators:
+                interval = indicator.get("interval", "weekly")
+                cached = None if force_refresh else self.load_cached_payload(indicator["metric"], interval)
+                
+                if cached is not None:
+                    pending.append((indicator, cached, False))
+                    continue
+                    
+                logger.info(f"Scheduling {indicator['metric']} data...")
+                future = scheduler.submit(
+                    (indicator["function"], interval),
+                    self.request_payload, indicator["function"], interval
+                )
+                pending.append((indicator, future, True))
             
-            if df is not None:
-                results[indicator["metric"]] = df
-                self.save_data(df)
+            for indicator, source, fetched in pending:
+                metric = indicator["metric"]
+                try:
+                    data = source.result() if fetched else source
+                    if data is None:
+                        continue
+                    df = self.parse_payload(data, metric)
+                    if df is not None and fetched:
+                        self.save_raw(metric, data)
+                except Exception as e:
+                    logger.exception(f"Error fetching {metric} data: {e}")
+                    continue
                 
-                # Append to combined DataFrame
-                combined_df = pd.concat([combined_df, df])
+                if df is not None:
+                    results[metric] = df
+                    stored = self.history.write(metric, df)
+                    logger.info(f"✅ Stored {stored} {metric} observations in {self.history.root_dir}")
+                    # Per-metric CSV export kept for existing readers
+                    self.save_data(df)
+                    frames.append(df.head(self.export_limit))
         
-        # Save combined indicators
-        if not combined_df.empty:
-            self.save_data(combined_df, "combined_indicators.csv")
+        # Recent-window export in the legacy combined schema; full history lives in the store
+        if frames:
+            self.save_data(pd.concat(frames), "combined_indicators.csv")
             
         return results
     
     def create_correlation_matrix(self):
-        """Create correlation matrix between economic indicators"""
-        # Load combined indicators if it exists
-        df = self.load_data("combined_indicators.csv")
+        """
+        Create correlation matrix between economic indicators
+        
+        Correlations are maintained incrementally: the running pair sums are
+        persisted between runs, so each run only feeds the calendar periods
+        completed since the last one. A correlation time series is appended
+        alongside the latest matrix to track regime shifts.
+        """
+        df = self.load_indicators()
         
         if df is None or df.empty:
             logger.warning("No data available for correlation analysis")
             return None
             
-        # Pivot to wide format for correlation analysis
-        pivot_df = df.pivot_table(index="date", columns="metric", values="value")
+        # Align weekly, monthly and quarterly series on one calendar so the
+        # correlations use as-of values instead of rarely shared raw dates
+        aligned_df = self.aligner.align(self.aligner.indicators_to_long(df))
+        
+        # Only feed periods that have ended; the current one may still be revised
+        aligned_df = aligned_df[aligned_df.index < pd.Timestamp.now().normalize()]
+        
+        state_path = os.path.join(self.output_dir, "indicator_correlation_state.npz")
+        series_path = os.path.join(self.output_dir, "indicator_correlation_series.csv")
+        
+        engine = None
+        if os.path.exists(state_path):
+            engine = RollingCorrelation.load(state_path)
+            if engine.columns != list(aligned_df.columns) or engine.window != self.correlation_window:
+                logger.info("Indicator set or window changed, rebuilding correlation state")
+                engine = None
+                
+        if engine is None:
+            engine = RollingCorrelation(aligned_df.columns, window=self.correlation_window)
+            if os.path.exists(series_path):
+                os.remove(series_path)
+                
+        new_rows = aligned_df if engine.last_date is None else aligned_df[aligned_df.index > engine.last_date]
+        
+        if not new_rows.empty:
+            corr_series = engine.update_many(new_rows)
+            corr_series.index.name = "date"
+            corr_series.round(4).to_csv(
+                series_path, mode="a", header=not os.path.exists(series_path)
+            )
+            engine.save(state_path)
+            logger.info(f"Updated indicator correlations with {len(new_rows)} new periods")
         
-        # Calculate correlation matrix
-        corr_matrix = pivot_df.corr()
+        corr_matrix = engine.correlation()
         
         # Save correlation matrix
         corr_path = os.path.join(self.output_dir, "indicator_correlations.csv")
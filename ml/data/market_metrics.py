@@ -0,0 +1,218 @@
+import os
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger("MarketMetricsEngine")
+
+class MarketMetricsEngine:
+    """
+    Computes return, volatility, drawdown, beta and correlation metrics from market data.
+    All metrics are derived from a single wide Date x Symbol price matrix so each one is
+    a vectorized pass over the whole universe rather than a loop over symbols.
+    """
+    def __init__(self, output_dir="data", window=21, min_periods=None, trading_days=252,
+                 tanker_symbols=None, crude_symbols=None):
+        self.output_dir = output_dir
+        self.window = window
+        # Allow a few holiday gaps per window before a value is considered unreliable
+        self.min_periods = min_periods or max(2, (2 * window) // 3)
+        self.trading_days = trading_days
+        self.tanker_symbols = tanker_symbols or ['FRO', 'STNG', 'NAT', 'TK']
+        self.crude_symbols = crude_symbols or ['CL=F', 'BZ=F']
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def build_price_matrix(self, data):
+        """Pivot long Date/Symbol/Close records into a wide Date x Symbol price matrix"""
+        if data is None or data.empty:
+            return pd.DataFrame()
+
+        # yfinance returns exchange-local timestamps, so normalise to calendar dates
+        # before pivoting to keep London and New York listings on the same row
+        dates = pd.to_datetime(data["Date"], utc=True).dt.tz_localize(None).dt.normalize()
+
+        prices = pd.DataFrame({
+            "Date": dates,
+            "Symbol": data["Symbol"].astype(str),
+            "Close": data["Close"].astype("float64")
+        }).pivot_table(index="Date", columns="Symbol", values="Close", aggfunc="last")
+
+        return prices.sort_index()
+
+    def log_returns(self, prices):
+        """Daily log returns for every symbol"""
+        return np.log(prices).diff()
+
+    def rolling_volatility(self, returns):
+        """Annualised rolling volatility of daily log returns"""
+        return returns.rolling(self.window, min_periods=self.min_periods).std() * np.sqrt(self.trading_days)
+
+    def drawdowns(self, prices):
+        """Drawdown from the running peak for every symbol"""
+        return prices / prices.cummax() - 1
+
+    def _rolling_pairwise_moments(self, a, b):
+        """
+        Rolling covariance and variances for every (a_i, b_j) pair in one pass.
+
+        Each pair only uses rows where both series are present, so symbols with
+        different trading calendars don't bias each other.
+
+        Returns:
+            Tuple of (cov, var_a, var_b) arrays shaped (dates, len(a), len(b))
+        """
+        n_dates = a.shape[0]
+        n_a, n_b = a.shape[1], b.shape[1]
+        symmetric = b is a
+
+        # Broadcasting with NaN * 0 masks each side wherever the other side is missing
+        x = a[:, :, None] + 0.0 * b[:, None, :]
+
+        if symmetric:
+            # For a matrix against itself the y-side moments are transposes of the x-side ones
+            blocks = [x, x * x.transpose(0, 2, 1), x * x]
+        else:
+            y = b[:, None, :] + 0.0 * a[:, :, None]
+            blocks = [x, y, x * y, x * x, y * y]
+
+        stacked = np.concatenate([block.reshape(n_dates, -1) for block in blocks], axis=1)
+        means = pd.DataFrame(stacked).rolling(self.window, min_periods=self.min_periods).mean().to_numpy()
+        means = [block.reshape(n_dates, n_a, n_b) for block in np.split(means, len(blocks), axis=1)]
+
+        if symmetric:
+            mean_x, mean_xy, mean_xx = means
+            mean_y = mean_x.transpose(0, 2, 1)
+            mean_yy = mean_xx.transpose(0, 2, 1)
+        else:
+            mean_x, mean_y, mean_xy, mean_xx, mean_yy = means
+
+        cov = mean_xy - mean_x * mean_y
+        var_a = mean_xx - mean_x ** 2
+        var_b = mean_yy - mean_y ** 2
+
+        return cov, var_a, var_b
+
+    def rolling_betas(self, returns):
+        """
+        Rolling beta of each tanker equity against each crude benchmark.
+
+        Returns:
+            Array shaped (dates, tankers, crudes) and the tanker/crude labels used
+        """
+        tankers = [s for s in self.tanker_symbols if s in returns.columns]
+        crudes = [s for s in self.crude_symbols if s in returns.columns]
+
+        if not tankers or not crudes:
+            logger.warning("Tanker or crude symbols missing, skipping beta calculation")
+            return None, tankers, crudes
+
+        cov, _, var_crude = self._rolling_pairwise_moments(
+            returns[tankers].to_numpy(), returns[crudes].to_numpy()
+        )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            betas = cov / var_crude
+
+        return betas, tankers, crudes
+
+    def latest_correlations(self, returns):
+        """
+        Cross-asset correlation matrix over the most recent window.
+
+        Only the last window of returns is used, so memory grows with
+        window x symbols x symbols rather than with the full history.
+
+        Returns:
+            DataFrame shaped (symbols, symbols)
+        """
+        values = returns.to_numpy()[-self.window:]
+        cov, var_a, var_b = self._rolling_pairwise_moments(values, values)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov[-1] / np.sqrt(var_a[-1] * var_b[-1])
+
+        return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=returns.columns, columns=returns.columns)
+
+    def compute(self, data):
+        """
+        Compute all market metrics from long-format market data
+
+        Args:
+            data: DataFrame with Date, Symbol and Close columns
+
+        Returns:
+            Dictionary of metric frames/arrays or None if no data
+        """
+        prices = self.build_price_matrix(data)
+
+        if prices.empty:
+            logger.warning("No market data available for metrics")
+            return None
+
+        returns = self.log_returns(prices)
+        volatility = self.rolling_volatility(returns)
+        drawdown = self.drawdowns(prices)
+        betas, tankers, crudes = self.rolling_betas(returns)
+
+        # Latest snapshot per symbol for consumers that only need current state
+        summary = pd.DataFrame({
+            "Close": prices.ffill().iloc[-1],
+            "LogReturn": returns.ffill().iloc[-1],
+            "Volatility": volatility.ffill().iloc[-1],
+            "Drawdown": drawdown.ffill().iloc[-1],
+            "MaxDrawdown": drawdown.min()
+        })
+        summary.index.name = "Symbol"
+
+        # Beta of each tanker/crude pair per date, one "tanker/crude" column per pair
+        beta_history = None
+        latest_betas = None
+        if betas is not None:
+            beta_history = pd.DataFrame(
+                betas.reshape(len(prices), -1),
+                index=prices.index,
+                columns=[f"{tanker}/{crude}" for tanker in tankers for crude in crudes]
+            )
+            latest_betas = pd.DataFrame(
+                beta_history.ffill().iloc[-1].to_numpy().reshape(len(tankers), len(crudes)),
+                index=pd.Index(tankers, name="Symbol"),
+                columns=crudes
+            )
+
+        return {
+            "prices": prices,
+            "returns": returns,
+            "volatility": volatility,
+            "drawdown": drawdown,
+            "beta_history": beta_history,
+            "beta_labels": (tankers, crudes),
+            "summary": summary,
+            "latest_betas": latest_betas,
+            "latest_correlations": self.latest_correlations(returns)
+        }
+
+    def save_metrics(self, metrics):
+        """Write the metric outputs consumed by the ML engine and dashboard"""
+        if metrics is None:
+            logger.warning("No metrics to save")
+            return {}
+
+        paths = {
+            "summary": os.path.join(self.output_dir, "market_metrics.csv"),
+            "volatility": os.path.join(self.output_dir, "market_volatility.csv"),
+            "correlations": os.path.join(self.output_dir, "market_correlations.csv")
+        }
+
+        metrics["summary"].round(6).to_csv(paths["summary"])
+        metrics["volatility"].round(6).to_csv(paths["volatility"])
+        metrics["latest_correlations"].round(4).to_csv(paths["correlations"])
+
+        if metrics["latest_betas"] is not None:
+            paths["betas"] = os.path.join(self.output_dir, "market_betas.csv")
+            paths["beta_history"] = os.path.join(self.output_dir, "market_beta_history.csv")
+            metrics["latest_betas"].round(4).to_csv(paths["betas"])
+            metrics["beta_history"].round(6).to_csv(paths["beta_history"])
+
+        logger.info(f"✅ Market metrics saved to {self.output_dir}")
+        return paths
@@ -1,9 +1,13 @@
 import yfinance as yf
 import pandas as pd
+import numpy as np
 import os
 import time
 from datetime import datetime, timedelta
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from data.market_metrics import MarketMetricsEngine
+from utils.rate_limiter import RateLimiter
 
 # Configure logging
 logging.basicConfig(
@@ -21,10 +25,16 @@ class MarketDataCollector:
     Collects market data for maritime-related stocks and commodities using yfinance.
     Includes robust error handling and rate limiting to avoid API issues.
     """
-    def __init__(self, output_dir="data"):
+    def __init__(self, output_dir="data", max_workers=8, requests_per_second=4, retry_backoff=1.0):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
         
+        # Concurrency settings: workers are bounded and share one request budget
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_second, period=1.0)
+        self.retry_backoff = retry_backoff
+        self.fetch_summary = None
+        
         # Default symbols list
         self.default_symbols = [
             'FRO', 'GLNG', 'TK', 'CL=F', 'BZ=F', 'STNG', 'GC=F', 'SI=F', 
@@ -43,52 +53,119 @@ class MarketDataCollector:
             'majors': ['SHEL.L', 'BP'],
             'index': ['BDRY']
         }
+        self.symbol_to_category = {
+            symbol: category
+            for category, syms in self.symbol_categories.items()
+            for symbol in syms
+        }
+        
+        # Metric side tables populated by prepare_final_dataset
+        self.symbol_metrics = None
+        self.category_metrics = None
+        self.metric_columns = []
+        
+        self.metrics_engine = MarketMetricsEngine(
+            output_dir=output_dir,
+            tanker_symbols=self.symbol_categories['tanker'],
+            crude_symbols=['CL=F', 'BZ=F']
+        )
 
-    def fetch_data_with_retry(self, symbols, start_date, end_date, max_retries=3):
-        """Fetch data with retry logic to handle API limitations"""
-        all_data = []
-        
-        for symbol in symbols:
-            retries = 0
-            success = False
-            
-            while retries < max_retries and not success:
-                try:
-                    logger.info(f"Fetching data for {symbol} ({retries+1}/{max_retries})")
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(start=start_date, end=end_date)
-                    
-                    if hist.empty:
-                        logger.warning(f"No data returned for {symbol}")
-                        retries += 1
-                        time.sleep(1)  # Wait before retry
-                        continue
-                        
-                    hist = hist[['Close']]
-                    hist.reset_index(inplace=True)
-                    hist['Symbol'] = symbol
-                    
-                    # Add symbol category
-                    for category, syms in self.symbol_categories.items():
-                        if symbol in syms:
-                            hist['Category'] = category
-                            break
-                    else:
-                        hist['Category'] = 'other'
-                        
-                    all_data.append(hist)
-                    logger.info(f"✓ Successfully fetched data for {symbol}")
-                    success = True
-                    
-                except Exception as e:
-                    logger.error(f"Error fetching data for {symbol}: {str(e)}")
-                    retries += 1
-                    time.sleep(2)  # Wait longer after an error
+    def _fetch_symbol(self, symbol, start_date, end_date, max_retries):
+        """
+        Fetch one symbol with retries, pacing every request through the shared rate budget
+        
+        Returns:
+            Tuple of (DataFrame or None, stats dictionary)
+        """
+        stats = {"Symbol": symbol, "Attempts": 0, "Rows": 0, "Seconds": 0.0, "Status": "failed"}
+        start_time = time.monotonic()
+        
+        while stats["Attempts"] < max_retries:
+            stats["Attempts"] += 1
+            self.rate_limiter.acquire()
             
-            # Add a pause between symbols to avoid hitting rate limits
-            time.sleep(0.5)
+            try:
+                logger.info(f"Fetching data for {symbol} ({stats['Attempts']}/{max_retries})")
+                ticker = yf.Ticker(symbol)
+                hist = ticker.history(start=start_date, end=end_date)
                 
+                if hist.empty:
+                    logger.warning(f"No data returned for {symbol}")
+                    stats["Status"] = "empty"
+                    self._backoff(stats["Attempts"], max_retries)
+                    continue
+                    
+                hist = hist[['Close']]
+                hist.reset_index(inplace=True)
+                hist['Symbol'] = symbol
+                hist['Category'] = self.symbol_to_category.get(symbol, 'other')
+                
+                logger.info(f"✓ Successfully fetched data for {symbol}")
+                stats.update({"Rows": len(hist), "Status": "ok"})
+                stats["Seconds"] = round(time.monotonic() - start_time, 2)
+                return hist, stats
+                
+            except Exception as e:
+                logger.error(f"Error fetching data for {symbol}: {str(e)}")
+                stats["Status"] = "error"
+                self._backoff(stats["Attempts"], max_retries)
+        
+        stats["Seconds"] = round(time.monotonic() - start_time, 2)
+        return None, stats
+    
+    def _backoff(self, attempt, max_retries):
+        """Exponential pause before the next attempt; no pause after the final one"""
+        if attempt < max_retries:
+            # Back off this symbol only; other workers keep using the budget
+            time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+    
+    def fetch_data_with_retry(self, symbols, start_date, end_date, max_retries=3):
+        """
+        Fetch data for all symbols concurrently with retry logic.
+        
+        Symbols are spread over a bounded thread pool while a single global
+        requests-per-second budget keeps the provider's rate limits intact.
+        """
+        results = {}
+        stats = []
+        start_time = time.monotonic()
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._fetch_symbol, symbol, start_date, end_date, max_retries): symbol
+                for symbol in symbols
+            }
+            for future in as_completed(futures):
+                hist, symbol_stats = future.result()
+                stats.append(symbol_stats)
+                if hist is not None:
+                    results[futures[future]] = hist
+        
+        self.fetch_summary = pd.DataFrame(stats).sort_values("Seconds", ascending=False)
+        self.log_fetch_summary(time.monotonic() - start_time)
+        
+        # Keep the caller's symbol order regardless of completion order
+        all_data = [results[symbol] for symbol in symbols if symbol in results]
         return pd.concat(all_data) if all_data else pd.DataFrame()
+    
+    def log_fetch_summary(self, elapsed):
+        """Log per-symbol timing and retry counts for the last fetch"""
+        summary = self.fetch_summary
+        if summary is None or summary.empty:
+            return
+            
+        succeeded = (summary["Status"] == "ok").sum()
+        retried = (summary["Attempts"] > 1).sum()
+        logger.info(
+            f"Fetched {succeeded}/{len(summary)} symbols in {elapsed:.1f}s "
+            f"({retried} needed retries, {self.max_workers} workers, "
+            f"{self.rate_limiter.max_calls} req/s budget)"
+        )
+        logger.info("Per-symbol fetch summary:\n" + summary.to_string(index=False))
+        
+        failed = summary.loc[summary["Status"] != "ok", "Symbol"].tolist()
+        if failed:
+            logger.warning(f"Failed to fetch: {', '.join(failed)}")
 
     def fetch_multi_period_data(self, symbols=None):
         """Fetch data for multiple time periods"""
@@ -154,49 +231,143 @@ class MarketDataCollector:
             # Get the average prices from last year
             last_year_avg = last_year.groupby('Symbol')['Close'].mean()
             
-            # Calculate percent change
-            symbols_in_both = set(latest_prices.index) & set(last_year_avg.index)
-            
-            pct_changes = {}
-            for symbol in symbols_in_both:
-                pct_changes[symbol] = ((latest_prices[symbol] / last_year_avg[symbol]) - 1) * 100
-                
-            metrics['ytd_vs_lastyear_pct'] = pd.Series(pct_changes)
+            # Calculate percent change on the aligned symbol index in one pass
+            metrics['ytd_vs_lastyear_pct'] = ((latest_prices / last_year_avg) - 1).dropna() * 100
             
         return metrics
     
+    def compact_market_frame(self, data):
+        """Convert long market records to compact dtypes (category labels, float32 prices)"""
+        compact = pd.DataFrame({
+            'Date': data['Date'].to_numpy(),
+            'Close': data['Close'].astype('float32').to_numpy(),
+            'Symbol': pd.Categorical(data['Symbol']),
+            'Category': pd.Categorical(data['Category'])
+        })
+        return compact
+    
+    def build_metric_tables(self, metrics, collection_date=None):
+        """
+        Normalise per-symbol and per-category metrics into side tables
+        
+        Returns:
+            Tuple of (symbol_metrics, category_metrics, column_order)
+        """
+        symbol_columns = {}
+        category_columns = {}
+        column_order = []
+        
+        for metric_name, metric_data in metrics.items():
+            if not isinstance(metric_data, pd.Series):
+                continue
+            if metric_name.endswith('_category_avg'):
+                category_columns[metric_name] = metric_data.astype('float32')
+            elif metric_name.endswith('_avg'):
+                symbol_columns[metric_name] = metric_data.astype('float32')
+            elif metric_name == 'ytd_vs_lastyear_pct':
+                symbol_columns['YTD_Change_Pct'] = metric_data.astype('float32')
+                continue
+            else:
+                continue
+            column_order.append(metric_name)
+            
+        if 'YTD_Change_Pct' in symbol_columns:
+            column_order.append('YTD_Change_Pct')
+            
+        symbol_metrics = pd.DataFrame(symbol_columns)
+        symbol_metrics.index.name = 'Symbol'
+        symbol_metrics.insert(0, 'DataCollectionDate', collection_date or datetime.now().strftime('%Y-%m-%d'))
+        
+        category_metrics = pd.DataFrame(category_columns)
+        category_metrics.index.name = 'Category'
+        
+        return symbol_metrics, category_metrics, column_order
+    
+    def join_metrics(self, data, symbol_metrics=None, category_metrics=None, column_order=None):
+        """
+        Join the metric side tables onto the compact frame on demand
+        
+        Lookups go through the category codes, so each joined column is a single
+        array take rather than a per-row dictionary map.
+        """
+        symbol_metrics = self.symbol_metrics if symbol_metrics is None else symbol_metrics
+        category_metrics = self.category_metrics if category_metrics is None else category_metrics
+        column_order = self.metric_columns if column_order is None else column_order
+        
+        joined = data.copy()
+        if symbol_metrics is None:
+            return joined
+            
+        def take(table, key):
+            codes = joined[key].cat.codes.to_numpy()
+            aligned = table.reindex(joined[key].cat.categories)
+            columns = {}
+            for column in aligned.columns:
+                values = aligned[column].to_numpy()
+                # Code -1 marks a missing label, which picks up the trailing fill value
+                filler = np.nan if values.dtype.kind == 'f' else None
+                columns[column] = np.append(values, [filler])[codes]
+            return columns
+        
+        joined_columns = take(symbol_metrics, 'Symbol')
+        if category_metrics is not None and not category_metrics.empty:
+            joined_columns.update(take(category_metrics, 'Category'))
+            
+        joined['DataCollectionDate'] = joined_columns.pop('DataCollectionDate')
+        for column in column_order:
+            if column in joined_columns:
+                joined[column] = joined_columns[column].astype('float32')
+                
+        return joined
+    
     def prepare_final_dataset(self, period_data, metrics):
-        """Combine all data into a finalized dataset for analysis"""
+        """
+        Build the canonical compact market frame for analysis
+        
+        Per-symbol and per-category metrics are kept in side tables
+        (self.symbol_metrics / self.category_metrics) instead of being
+        broadcast onto every row; use join_metrics() to attach them.
+        """
         # Start with the latest data
         if 'ytd' in period_data and not period_data['ytd'].empty:
-            final_data = period_data['ytd'].copy()
+            final_data = self.compact_market_frame(period_data['ytd'])
         else:
             logger.error("No YTD data available")
             return pd.DataFrame()
             
-        # Add metadata columns
-        final_data['DataCollectionDate'] = datetime.now().strftime('%Y-%m-%d')
-        
-        # Merge metrics
-        for metric_name, metric_data in metrics.items():
-            if isinstance(metric_data, pd.Series) and metric_name.endswith('_avg'):
-                # Create a mapping dictionary from the Series
-                avg_dict = metric_data.to_dict()
-                
-                # Apply the mapping to create new columns
-                final_data[metric_name] = final_data['Symbol'].map(avg_dict)
-        
-        # Add YTD change column if available
-        if 'ytd_vs_lastyear_pct' in metrics:
-            change_dict = metrics['ytd_vs_lastyear_pct'].to_dict()
-            final_data['YTD_Change_Pct'] = final_data['Symbol'].map(change_dict)
+        self.symbol_metrics, self.category_metrics, self.metric_columns = self.build_metric_tables(metrics)
             
         return final_data
     
     def save_data(self, data, filename="maritime_data_2025.csv"):
-        """Save the final dataset to CSV"""
+        """Save the final dataset to CSV using the existing wide schema"""
         output_path = os.path.join(self.output_dir, filename)
-        data.to_csv(output_path, index=False)
+        
+        # Compatibility writer: downstream readers expect the metrics as columns
+        legacy_data = self.join_metrics(data)
+        legacy_data.to_csv(output_path, index=False)
+        
+        if self.symbol_metrics is not None:
+            metrics_path = os.path.join(self.output_dir, "market_symbol_metrics.csv")
+            self.symbol_metrics.to_csv(metrics_path)
+            
+            compact_bytes = (
+                data.memory_usage(deep=True).sum()
+                + self.symbol_metrics.memory_usage(deep=True).sum()
+                + self.category_metrics.memory_usage(deep=True).sum()
+            )
+            legacy_dtypes = {'Symbol': 'object', 'Category': 'object'}
+            legacy_dtypes.update({
+                column: 'float64' for column in legacy_data.columns
+                if legacy_data[column].dtype == 'float32'
+            })
+            legacy_bytes = legacy_data.astype(legacy_dtypes).memory_usage(deep=True).sum()
+            saving = 100 * (1 - compact_bytes / legacy_bytes) if legacy_bytes else 0
+            logger.info(
+                f"Market frame memory: {compact_bytes / 1024:.1f} KiB compact vs "
+                f"{legacy_bytes / 1024:.1f} KiB wide ({saving:.0f}% saving)"
+            )
+            
         logger.info(f"✅ Market data saved to: {output_path}")
         return output_path
     
@@ -214,6 +385,10 @@ class MarketDataCollector:
         # Calculate metrics
         metrics = self.calculate_metrics(period_data)
         
+        # Returns, volatility, drawdowns, betas and correlations over the full collected history
+        market_metrics = self.metrics_engine.compute(pd.concat(period_data.values()))
+        self.metrics_engine.save_metrics(market_metrics)
+        
         # Prepare final dataset
         final_data = self.prepare_final_dataset(period_data, metrics)
         
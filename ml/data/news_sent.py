@@ -9,6 +9,7 @@ import logging
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from data.route_registry import NEWS_ROUTE_CODES, get_route_registry
 
 # Configure logging
 logging.basicConfig(
@@ -53,6 +54,7 @@ class NewsSentimentCollector:
         
         # Topic lists
         self.topics = self.get_default_topics()
+        self.routes = get_route_registry()
         self.route_dict = self.get_route_dict()
         
     def get_default_topics(self):
@@ -74,28 +76,7 @@ class NewsSentimentCollector:
     
     def get_route_dict(self):
         """Return mapping between route codes and descriptions"""
-        return {
-            "TD2": "Middle East Gulf to Singapore",
-            "TD3C": "Middle East Gulf to China (VLCC)",
-            "TD6": "Black Sea to Mediterranean (Suezmax)",
-            "TD7": "North Sea to Continent (Aframax)",
-            "TD8": "Kuwait to Singapore",
-            "TD9": "Caribbean to US Gulf (LR1)",
-            "TD15": "West Africa to China (VLCC)",
-            "TD20": "West Africa to UK-Continent (Suezmax)",
-            "TD22": "US Gulf to China",
-            "TD25": "US Gulf to UK-Continent",
-            "TD27": "Guyana to ARA",
-            "TC5": "CPP Middle East Gulf to Japan (LR1)",
-            "TC8": "CPP Middle East Gulf to UK-Continent (LR1)",
-            "TC12": "Naphtha West Coast India to Japan (MR)",
-            "TC15": "Naphtha Mediterranean to Far East (Aframax)",
-            "TC16": "ARA to Offshore Lome (LR1)",
-            "TC17": "CPP Jubail to Dar es Salaam (MR)",
-            "TC18": "CPP US Gulf to Brazil (MR)",
-            "TC19": "CPP Amsterdam to Lagos (MR)",
-            "TC20": "CPP Middle East Gulf to UK-Continent (Aframax)"
-        }
+        return self.routes.descriptions(NEWS_ROUTE_CODES)
     
     def clean_text(self, text):
         """Clean and preprocess text for sentiment analysis"""
@@ -139,11 +120,7 @@ class NewsSentimentCollector:
         }
         
         # Add route code as tag if query matches a route description
-        route_code = None
-        for code, description in self.route_dict.items():
-            if description.lower() in query.lower():
-                route_code = code
-                break
+        route_code = self.routes.match_query(query, NEWS_ROUTE_CODES)
         
         retries = 0
         while retries < max_retries:
@@ -236,19 +213,12 @@ class NewsSentimentCollector:
         still_unmapped = (news_df["clean_topic"] == "")
         
         if still_unmapped.any():
-            for idx, row in news_df[still_unmapped].iterrows():
-                # Ensure title and description are strings
-                title = str(row.get("title", "")) if row.get("title") is not None else ""
-                description = str(row.get("description", "")) if row.get("description") is not None else ""
-                content = (title + " " + description).lower()
-                
-                for code, description in self.route_dict.items():
-                    # Extract key terms from route description
-                    route_terms = description.lower().split()
-                    # Check if key route terms appear in content
-                    if any(term in content for term in route_terms if len(term) > 3):
-                        news_df.at[idx, "clean_topic"] = code
-                        break
+            unmapped = news_df.loc[still_unmapped]
+            content = (
+                unmapped["title"].fillna("").astype(str) + " " +
+                unmapped["description"].fillna("").astype(str)
+            ).str.lower()
+            news_df.loc[still_unmapped, "clean_topic"] = self.routes.match_content(content, NEWS_ROUTE_CODES)
         
         return news_df
     
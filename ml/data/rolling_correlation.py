@@ -0,0 +1,150 @@
+import os
+from collections import deque
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger("RollingCorrelation")
+
+class RollingCorrelation:
+    """
+    Incremental rolling/expanding correlation matrix.
+
+    Keeps running sums (n, Σx, Σx², Σxy) for every column pair, so each new
+    observation updates the matrix in O(pairs) instead of recomputing it over
+    the whole history. Pairs only accumulate rows where both values are
+    present. With a window the oldest row is subtracted back out once it
+    leaves the window; without one the correlation is expanding.
+    """
+    def __init__(self, columns, window=None, refresh_every=None):
+        self.columns = list(columns)
+        self.window = window
+        # Windowed add/subtract slowly accumulates rounding error, so rebuild the
+        # sums from the buffered rows every so often (amortised O(pairs) per update)
+        self.refresh_every = refresh_every or (10 * window if window else None)
+
+        n = len(self.columns)
+        self.count = np.zeros((n, n))
+        self.sum_x = np.zeros((n, n))
+        self.sum_xx = np.zeros((n, n))
+        self.sum_xy = np.zeros((n, n))
+
+        self.rows = deque()
+        self.last_date = None
+        self._since_refresh = 0
+
+    def _accumulate(self, row, sign):
+        """Add (sign=1) or remove (sign=-1) one observation from the running sums"""
+        present = ~np.isnan(row)
+        values = np.where(present, row, 0.0)
+        mask = present.astype(float)
+
+        # [i, j] entries only count x_i on rows where x_j is also present
+        self.count += sign * np.outer(mask, mask)
+        self.sum_x += sign * np.outer(values, mask)
+        self.sum_xx += sign * np.outer(values * values, mask)
+        self.sum_xy += sign * np.outer(values, values)
+
+    def _refresh(self):
+        """Rebuild the running sums from the buffered window"""
+        for array in (self.count, self.sum_x, self.sum_xx, self.sum_xy):
+            array.fill(0.0)
+        for row in self.rows:
+            self._accumulate(row, 1)
+        self._since_refresh = 0
+
+    def update(self, row, date=None):
+        """
+        Add one observation row (aligned with self.columns)
+
+        Returns:
+            Current correlation matrix as a NumPy array
+        """
+        row = np.asarray(row, dtype=float)
+        self._accumulate(row, 1)
+
+        if self.window:
+            self.rows.append(row)
+            if len(self.rows) > self.window:
+                self._accumulate(self.rows.popleft(), -1)
+                self._since_refresh += 1
+                if self._since_refresh >= self.refresh_every:
+                    self._refresh()
+
+        if date is not None:
+            self.last_date = pd.Timestamp(date)
+
+        return self.matrix()
+
+    def matrix(self):
+        """Correlation matrix from the current running sums"""
+        n = self.count
+        cov = n * self.sum_xy - self.sum_x * self.sum_x.T
+        var_x = n * self.sum_xx - self.sum_x ** 2
+        var_y = var_x.T
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.sqrt(var_x * var_y)
+
+        corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def correlation(self):
+        """Latest correlation matrix as a labelled DataFrame"""
+        return pd.DataFrame(self.matrix(), index=self.columns, columns=self.columns)
+
+    def pair_names(self):
+        """Labels for the upper-triangle pairs used in the time series output"""
+        upper = np.triu_indices(len(self.columns), k=1)
+        return [f"{self.columns[i]} | {self.columns[j]}" for i, j in zip(*upper)]
+
+    def update_many(self, frame):
+        """
+        Feed a date-indexed frame row by row
+
+        Returns:
+            DataFrame indexed by date with one column per column pair
+        """
+        frame = frame.reindex(columns=self.columns)
+        upper = np.triu_indices(len(self.columns), k=1)
+
+        series = []
+        for date, row in zip(frame.index, frame.to_numpy(dtype=float)):
+            series.append(self.update(row, date)[upper])
+
+        return pd.DataFrame(
+            np.array(series).reshape(len(series), -1),
+            index=frame.index,
+            columns=self.pair_names()
+        )
+
+    def save(self, path):
+        """Persist the running state so later runs only feed new observations"""
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            columns=np.array(self.columns),
+            window=np.array(self.window or 0),
+            count=self.count,
+            sum_x=self.sum_x,
+            sum_xx=self.sum_xx,
+            sum_xy=self.sum_xy,
+            rows=np.array(self.rows).reshape(len(self.rows), len(self.columns)),
+            last_date=np.array(str(self.last_date) if self.last_date is not None else "")
+        )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Restore a state saved with save()"""
+        with np.load(path, allow_pickle=False) as state:
+            engine = cls(state["columns"].tolist(), window=int(state["window"]) or None)
+            engine.count = state["count"]
+            engine.sum_x = state["sum_x"]
+            engine.sum_xx = state["sum_xx"]
+            engine.sum_xy = state["sum_xy"]
+            engine.rows = deque(state["rows"])
+            last_date = str(state["last_date"])
+            engine.last_date = pd.Timestamp(last_date) if last_date else None
+        return engine
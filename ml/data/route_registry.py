@@ -0,0 +1,234 @@
+import os
+import re
+import sys
+import json
+import logging
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("RouteRegistry")
+
+DEFAULT_CONFIG_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "config", "vessel_config.json")
+)
+
+# Canonical Baltic Exchange tanker routes:
+# code, short description, Baltic definition, laydays, cargo type, cargo size (mt)
+ROUTE_TABLE = [
+    ("TD2", "Middle East Gulf to Singapore", "Middle East Gulf to Singapore (Ras Tanura to Singapore).", "20/30 days", "Crude Oil", 270000),
+    ("TD3C", "Middle East Gulf to China (VLCC)", "Middle East Gulf to China (Ras Tanura to Ningbo).", "15/30 days", "Crude Oil", 270000),
+    ("TD6", "Black Sea to Mediterranean (Suezmax)", "Black Sea to Mediterranean (CPC to Augusta).", "10/15 days", "Crude Oil", 135000),
+    ("TD7", "North Sea to Continent (Aframax)", "North Sea to Continent (Hound Point to Wilhelmshaven).", "7/14 days", "Crude Oil", 80000),
+    ("TD8", "Kuwait to Singapore", "crude and/or DPP, heat 135F. Kuwait to Singapore (Mina Al Ahmadi to Singapore).", "20/25 days", "Crude Oil", 80000),
+    ("TD9", "Caribbean to US Gulf (LR1)", "Caribbean to US Gulf (Covenas to Corpus Christi).", "7/14 days", "Crude Oil", 70000),
+    ("TD14", "South East Asia to East Coast Australia", "South East Asia to east coast Australia (Seria to Brisbane).", "21/25 days", "Crude Oil", 80000),
+    ("TD15", "West Africa to China (VLCC)", "West Africa to China (Serpentina FPSO and Bonny Offshore Terminal to Ningbo).", "20/30 days", "Crude Oil", 260000),
+    ("TD18", "Fuel Oil Baltic to UK-Continent", "fuel oil. Baltic to UK-Cont (Tallinn to Amsterdam).", "10/15 days", "Fuel Oil", 30000),
+    ("TD19", "Cross Mediterranean (Aframax)", "Cross Mediterranean (Ceyhan to Lavera).", "10/15 days", "Crude Oil", 80000),
+    ("TD20", "West Africa to UK-Continent (Suezmax)", "West Africa to UK-Continent (Bonny to Rotterdam).", "15/20 days", "Crude Oil", 130000),
+    ("TD21", "Fuel Oil Caribbean to US Gulf", "fuel oil, Caribbean to US Gulf (Mamonal to Houston).", "7/14 days", "Fuel Oil", 50000),
+    ("TD22", "US Gulf to China", "crude Galveston O/S lightering area to Ningbo.", "25/35 days", "Crude Oil", 270000),
+    ("TD23", "Basrah to Mediterranean (Suezmax)", "Light crude Basrah to Lavera.", "20/30 days", "Crude Oil", 140000),
+    ("TD25", "US Gulf to UK-Continent", "crude Corpus Christi-Beaumont / A-R-A (Houston to Rotterdam).", "10/20 days", "Crude Oil", 70000),
+    ("TD26", "East Coast Mexico to US Gulf", "EC Mexico to US Gulf (Dos Bocas or Cayo Arcas to Houston).", "5/10 days", "Crude Oil", 70000),
+    ("TD27", "Guyana to ARA", "Guyana to A-R-A.", None, "Crude Oil", 130000),
+    ("TC1", "CPP Middle East Gulf to Japan (LR2)", "CPP/naphtha condensate. Middle East Gulf to Japan (Ras Tanura to Yokohama).", "30/35 days", "Clean Petroleum Products", 75000),
+    ("TC2", "CPP Continent to US Atlantic Coast (MR)", "CPP/UNL. Continent to US Atlantic coast (Rotterdam to New York).", "10/14 days", "Clean Petroleum Products", 37000),
+    ("TC5", "CPP Middle East Gulf to Japan (LR1)", "CPP/UNL naphtha condensate. Middle East Gulf to Japan (Ras Tanura to Yokohama).", "30/35 days", "Clean Petroleum Products", 55000),
+    ("TC6", "CPP Algeria to European Mediterranean", "CPP/UNL. Algeria to European Mediterranean (Skikda to Lavera).", "7/14 days", "Clean Petroleum Products", 30000),
+    ("TC7", "CPP Singapore to East Coast Australia", "CPP. Singapore to east coast Australia (Singapore to Sydney).", "17/23 days", "Clean Petroleum Products", 35000),
+    ("TC8", "CPP Middle East Gulf to UK-Continent (LR1)", "CPP/UNL middle distillate. Middle East Gulf to UK-Cont (Jubail to Rotterdam).", "20/30 days", "Clean Petroleum Products", 65000),
+    ("TC10", "CPP South Korea to North Pacific West Coast", "CPP/UNL. South Korea to west coast North Pacific (South Korea to Vancouver).", "14/21 days", "Clean Petroleum Products", 40000),
+    ("TC11", "CPP South Korea to Singapore", "CPP. South Korea to Singapore.", "10/17 days", "Clean Petroleum Products", 40000),
+    ("TC12", "Naphtha West Coast India to Japan (MR)", "naphtha condensate. West coast India to Japan (Sikka to Chiba).", "7/14 days", "Clean Petroleum Products", 35000),
+    ("TC14", "CPP US Gulf to Continent (MR)", "CPP/UNL/diesel. US Gulf to Continent (Houston to Amsterdam).", "6/12 days", "Clean Petroleum Products", 38000),
+    ("TC15", "Naphtha Mediterranean to Far East (Aframax)", "naphtha. Med / Far East (Skikda to Chiba).", "15/25 days", "Clean Petroleum Products", 80000),
+    ("TC16", "ARA to Offshore Lome (LR1)", "CPP. A-R-A / West Africa (Amsterdam to Lome).", "10/14 days", "Clean Petroleum Products", 60000),
+    ("TC17", "CPP Jubail to Dar es Salaam (MR)", "CPP. Jubail to Dar es Salaam.", "10/20 days", "Clean Petroleum Products", 35000),
+    ("TC18", "CPP US Gulf to Brazil (MR)", "CPP/UNL US Gulf to Brazil (Houston to Santos).", "6/12 days", "Clean Petroleum Products", 38000),
+    ("TC19", "CPP Amsterdam to Lagos (MR)", "CPP, A-R-A to West Africa (Amsterdam to Lagos).", "5/10 days", "Clean Petroleum Products", 37000),
+    ("TC20", "CPP Middle East Gulf to UK-Continent (Aframax)", "CPP/UNL middle distillate. Middle East Gulf to UK-Cont (Jubail to Rotterdam).", "15/20 days", "Clean Petroleum Products", 90000),
+    ("TC21", "CPP US Gulf to Caribbean", "CPP US Gulf to Caribbean (Houston to Pozos Colorados).", "5/10 days", "Clean Petroleum Products", 38000),
+    ("TC22", "CPP South Korea to Australia", "CPP/UNL. South Korea to Australia (Yeosu to Botany Bay).", "17/23 days", "Clean Petroleum Products", 35000),
+    ("TC23", "CPP/UNL/ULSD ARA to UK-Cont", "CPP/UNL/ULSD middle distillate. ARA to UK-Cont (Amsterdam to Le Havre).", "5/10 days", "Clean Petroleum Products", 30000),
+]
+
+# Alternative codes used by data sources, mapped to the canonical code
+ROUTE_ALIASES = {
+    "TC2_37": "TC2"
+}
+
+# Routes the news collector tags articles with, in matching order. Tagging
+# picks the first match, so widening this set changes existing sentiment tags.
+NEWS_ROUTE_CODES = (
+    "TD2", "TD3C", "TD6", "TD7", "TD8", "TD9", "TD15", "TD20", "TD22", "TD25", "TD27",
+    "TC5", "TC8", "TC12", "TC15", "TC16", "TC17", "TC18", "TC19", "TC20"
+)
+
+# Routes listed by the freight processor's route mapping
+FREIGHT_ROUTE_CODES = NEWS_ROUTE_CODES + ("TC21", "TC23")
+
+NIGERIA_KEYWORDS = ["Nigeria", "West Africa", "Lagos", "Lome", "Dar es Salaam"]
+
+# Attributes copied from the routes section of config/vessel_config.json
+CONFIG_ATTRIBUTES = ["distance_nm", "frequent_vessels", "port_fees", "canal_fees",
+                     "demand_index", "supply_index", "sentiment_score"]
+
+class RouteInfo:
+    """
+    Everything known about one freight route.
+    Codes are interned and matchers are compiled once when the registry is built.
+    """
+    def __init__(self, code, description, baltic_description, laydays, cargo_type, cargo_size):
+        self.code = sys.intern(code)
+        self.route_type = sys.intern(code[:2])
+        self.description = description
+        self.baltic_description = baltic_description
+        self.laydays = laydays
+        self.cargo_type = cargo_type
+        self.cargo_size = cargo_size
+        self.label = f"{cargo_size // 1000}K {description}" if cargo_size else description
+
+        self.nigeria_relevant = any(k.lower() in f"{description} {baltic_description}".lower() for k in NIGERIA_KEYWORDS)
+
+        # Significant description words; an article mentioning any of them is tied to the route
+        self.terms = frozenset(term for term in description.lower().split() if len(term) > 3)
+        self.matcher = re.compile("|".join(re.escape(term) for term in sorted(self.terms)))
+        self.description_lower = description.lower()
+
+        for attribute in CONFIG_ATTRIBUTES:
+            setattr(self, attribute, None)
+        self.notes = None
+
+    def apply_config(self, config):
+        """Attach vessel/distance attributes from the vessel config"""
+        for attribute in CONFIG_ATTRIBUTES:
+            if attribute in config:
+                setattr(self, attribute, config[attribute])
+        self.notes = config.get("description", self.notes)
+
+    @property
+    def has_voyage_data(self):
+        return self.distance_nm is not None and self.port_fees is not None
+
+    def to_dict(self):
+        """Plain dictionary view, e.g. for JSON responses"""
+        info = {
+            "route": self.code,
+            "route_type": self.route_type,
+            "description": self.description,
+            "baltic_description": self.baltic_description,
+            "laydays": self.laydays,
+            "cargo_type": self.cargo_type,
+            "cargo_size": self.cargo_size,
+            "nigeria_relevant": self.nigeria_relevant
+        }
+        info.update({attribute: getattr(self, attribute) for attribute in CONFIG_ATTRIBUTES})
+        return info
+
+class RouteRegistry:
+    """
+    Single source of truth for route codes, descriptions and voyage attributes.
+
+    Built once per process through get_route_registry(); collectors, the ML
+    engine and the API server all read from the same indexed instance instead
+    of keeping their own route dictionaries.
+    """
+    def __init__(self, config_path=DEFAULT_CONFIG_PATH):
+        self.routes = {row[0]: RouteInfo(*row) for row in ROUTE_TABLE}
+        self.aliases = dict(ROUTE_ALIASES)
+        self.vessel_types = {}
+
+        config = self._load_config(config_path)
+        for code, route_config in config.get("routes", {}).items():
+            route = self.get(code)
+            if route is None:
+                logger.warning(f"Route {code} in vessel config is not a known route")
+                continue
+            route.apply_config(route_config)
+        self.vessel_types = config.get("vessel_types", {})
+
+    @staticmethod
+    def _load_config(config_path):
+        if not config_path or not os.path.exists(config_path):
+            logger.warning(f"Vessel config not found: {config_path}")
+            return {}
+        with open(config_path, "r") as f:
+            return json.load(f)
+
+    def __contains__(self, code):
+        return self.get(code) is not None
+
+    def __iter__(self):
+        return iter(self.routes.values())
+
+    def __len__(self):
+        return len(self.routes)
+
+    def get(self, code):
+        """Look up a route by code or alias, case-insensitively"""
+        if code is None:
+            return None
+        code = str(code).strip().upper()
+        return self.routes.get(self.aliases.get(code, code))
+
+    def codes(self, route_type=None):
+        """Route codes in registry order, optionally only TD or TC"""
+        return [route.code for route in self if route_type is None or route.route_type == route_type]
+
+    def select(self, codes=None):
+        """Routes for the given codes in that order, or every route"""
+        return list(self) if codes is None else [self.routes[code] for code in codes]
+
+    def descriptions(self, codes=None):
+        """Mapping of route codes to short descriptions, optionally for a subset of codes"""
+        return {route.code: route.description for route in self.select(codes)}
+
+    def route_types(self):
+        """Mapping of route codes to their TD/TC segment"""
+        return {route.code: route.route_type for route in self}
+
+    def labels(self):
+        """Mapping of route codes to size-prefixed labels, e.g. '270K Middle East Gulf to Singapore'"""
+        return {route.code: route.label for route in self}
+
+    def vessel(self, vessel_type):
+        """Vessel type attributes from the vessel config"""
+        return self.vessel_types.get(vessel_type)
+
+    def match_query(self, query, codes=None):
+        """Route whose description appears in a search query, or None"""
+        query = query.lower()
+        for route in self.select(codes):
+            if route.description_lower in query:
+                return route.code
+        return None
+
+    def match_content(self, content, codes=None):
+        """
+        Tag text with the first route whose description terms it mentions
+
+        Args:
+            content: Series of lowercase text
+            codes: Routes to consider, in matching order (default: all)
+
+        Returns:
+            Series of route codes, empty string where nothing matched
+        """
+        tags = pd.Series("", index=content.index, dtype=object)
+        unmatched = np.ones(len(content), dtype=bool)
+
+        for route in self.select(codes):
+            if not unmatched.any():
+                break
+            hits = unmatched & content.str.contains(route.matcher, na=False).to_numpy()
+            tags[hits] = route.code
+            unmatched &= ~hits
+
+        return tags
+
+@lru_cache(maxsize=None)
+def get_route_registry(config_path=DEFAULT_CONFIG_PATH):
+    """Process-wide route registry, built on first use"""
+    return RouteRegistry(config_path)
@@ -12,6 +12,9 @@ from data.macrodata import MacroDataCollector
 from data.news_sent import NewsSentimentCollector
 from utils.predictionengine import MaritimeMLEngine
 from utils.report_gen import MaritimeReportGenerator
+from utils.chart_stage import CommodityChartStage
+from data.alignment import TimeSeriesAligner
+from data.route_registry import get_route_registry
 
 # Configure logging
 log_dir = "logs"
@@ -68,6 +71,9 @@ class MaritimePipeline:
             models_dir=models_dir
         )
         
+        self.chart_stage = CommodityChartStage(data_dir=data_dir, images_dir=images_dir)
+        self.aligner = TimeSeriesAligner(output_dir=data_dir)
+        
         self.report_generator = MaritimeReportGenerator(
             data_dir=data_dir,
             results_dir=results_dir,
@@ -127,10 +133,17 @@ class MaritimePipeline:
         # Process freight data
         logger.info("Processing freight data...")
         full_route_data = [
-            {"Route": "TD2", "Description": "270K Middle East Gulf to Singapore", "Worldscale": 78.00, "TCE": 60328, "Change (TCE)": 183, "OPEX": 8080},
-            {"Route": "TD3C", "Description": "270K Middle East Gulf to China (VLCC)", "Worldscale": 77.15, "TCE": 57589, "Change (TCE)": 698, "OPEX": 8080},
+            {"Route": "TD2", "Worldscale": 78.00, "TCE": 60328, "Change (TCE)": 183, "OPEX": 8080},
+            {"Route": "TD3C", "Worldscale": 77.15, "TCE": 57589, "Change (TCE)": 698, "OPEX": 8080},
             # ... other routes (abbreviated for clarity)
-            {"Route": "TC23", "Description": "CPP/UNL/ULSD middle distillate. ARA to UK-Cont (Amsterdam to Le Havre)", "Worldscale": 199.06, "TCE": 30000, "Change (TCE)": 15, "OPEX": 6876}
+            {"Route": "TC23", "Worldscale": 199.06, "TCE": 30000, "Change (TCE)": 15, "OPEX": 6876}
+        ]
+        
+        # Descriptions come from the shared route registry
+        route_labels = get_route_registry().labels()
+        full_route_data = [
+            {"Route": row["Route"], "Description": route_labels.get(row["Route"], row["Route"]), **row}
+            for row in full_route_data
         ]
         
         freight_df = self.freight_processor.process_raw_data(full_route_data)
@@ -143,6 +156,10 @@ class MaritimePipeline:
         else:
             logger.info("Skipping market data collection.")
             market_path = None
+        
+        # Render commodity charts now so report generation only reads finished images
+        logger.info("Rendering commodity charts...")
+        self.chart_stage.render_all()
             
         # Collect macro data (optional)
         if not skip_macro and self.macro_collector:
@@ -160,6 +177,10 @@ class MaritimePipeline:
             logger.info("Skipping news sentiment collection.")
             news_path = None
             
+        # Align macro, market and sentiment series into the shared panel
+        logger.info("Aligning time series...")
+        self.aligner.build_panel_from_dir()
+            
         elapsed_time = time.time() - start_time
         logger.info(f"Data collection completed in {elapsed_time:.2f} seconds")
         
@@ -12,6 +12,9 @@ from data.macrodata import MacroDataCollector
 from data.news_sent import NewsSentimentCollector
 from utils.predictionengine import MaritimeMLEngine
 from utils.report_gen import MaritimeReportGenerator
+from utils.chart_stage import CommodityChartStage
+from data.alignment import TimeSeriesAligner
+from data.route_registry import get_route_registry
 
 # Configure logging
 log_dir = "logs"
@@ -79,6 +82,9 @@ class MaritimePipeline:
             models_dir=models_dir
         )
         
+        self.chart_stage = CommodityChartStage(data_dir=data_dir, images_dir=images_dir)
+        self.aligner = TimeSeriesAligner(output_dir=data_dir)
+        
         self.report_generator = MaritimeReportGenerator(
             data_dir=data_dir,
             results_dir=results_dir,
@@ -94,29 +100,35 @@ class MaritimePipeline:
         # Process freight data
         logger.info("Processing freight data...")
         full_route_data = [
-            {"Route": "TD2", "Description": "270K Middle East Gulf to Singapore", "Worldscale": 78.00, "TCE": 60328, "Change (TCE)": 183, "OPEX": 8080},
-            {"Route": "TD3C", "Description": "270K Middle East Gulf to China (VLCC)", "Worldscale": 77.15, "TCE": 57589, "Change (TCE)": 698, "OPEX": 8080},
-            {"Route": "TD6", "Description": "135K Black Sea to Mediterranean (Suezmax)", "Worldscale": 90.10, "TCE": 28351, "Change (TCE)": 645, "OPEX": 7321},
-            {"Route": "TD7", "Description": "80K North Sea to Continent (Aframax)", "Worldscale": 110.00, "TCE": 20317, "Change (TCE)": 1294, "OPEX": 7030},
-            {"Route": "TD8", "Description": "80K Kuwait to Singapore", "Worldscale": 138.21, "TCE": 28217, "Change (TCE)": 2098, "OPEX": 7030},
-            {"Route": "TD9", "Description": "70K Caribbean to US Gulf (LR1)", "Worldscale": 131.56, "TCE": 22821, "Change (TCE)": -2063, "OPEX": 6876},
-            {"Route": "TD15", "Description": "260K West Africa to China (VLCC)", "Worldscale": 77.39, "TCE": 57966, "Change (TCE)": 1591, "OPEX": 8080},
-            {"Route": "TD20", "Description": "130K West Africa to UK-Continent (Suezmax)", "Worldscale": 85.67, "TCE": 32492, "Change (TCE)": 125, "OPEX": 7321},
-            {"Route": "TD22", "Description": "270K US Gulf to China", "Worldscale": 6820000.00, "TCE": 29834, "Change (TCE)": 2399, "OPEX": 8080},
-            {"Route": "TD25", "Description": "70K US Gulf to UK-Continent", "Worldscale": 130.28, "TCE": 27378, "Change (TCE)": -1394, "OPEX": 7030},
-            {"Route": "TD27", "Description": "130K Guyana to ARA", "Worldscale": 79.33, "TCE": 28226, "Change (TCE)": 162, "OPEX": 7321},
-            {"Route": "TC5", "Description": "55K CPP Middle East Gulf to Japan (LR1)", "Worldscale": 172.81, "TCE": 25786, "Change (TCE)": -141, "OPEX": 6876},
-            {"Route": "TC8", "Description": "65K CPP Middle East Gulf to UK-Continent (LR1)", "Worldscale": 50.33, "TCE": 30550, "Change (TCE)": -908, "OPEX": 6876},
-            {"Route": "TC12", "Description": "35K Naphtha West Coast India to Japan (MR)", "Worldscale": 160.31, "TCE": 13201, "Change (TCE)": 236, "OPEX": 6876},
-            {"Route": "TC15", "Description": "80K Naphtha Mediterranean to Far East (Aframax)", "Worldscale": 3094167, "TCE": 8946, "Change (TCE)": -605, "OPEX": 7030},
-            {"Route": "TC16", "Description": "60K ARA to Offshore Lome (LR1)", "Worldscale": 114.72, "TCE": 17103, "Change (TCE)": 152, "OPEX": 6876},
-            {"Route": "TC17", "Description": "35K CPP Jubail to Dar es Salaam (MR)", "Worldscale": 216.07, "TCE": 20319, "Change (TCE)": 777, "OPEX": 6876},
-            {"Route": "TC18", "Description": "37K CPP US Gulf to Brazil (MR)", "Worldscale": 185.00, "TCE": 20728, "Change (TCE)": -2818, "OPEX": 6876},
-            {"Route": "TC19", "Description": "37K CPP Amsterdam to Lagos (MR)", "Worldscale": 199.06, "TCE": 26023, "Change (TCE)": 55, "OPEX": 6876},
-            {"Route": "TC20", "Description": "90K CPP Middle East Gulf to UK-Continent (Aframax)", "Worldscale": 3956250, "TCE": 36279, "Change (TCE)": 2492, "OPEX": 7030},
-            # Convert tuples to dictionaries for proper handling
-            {"Route": "TC21", "Description": "CPP US Gulf to Caribbean (Houston to Pozos Colorados)", "Worldscale": 185.00, "TCE": 38000, "Change (TCE)": 15, "OPEX": 6876},
-            {"Route": "TC23", "Description": "CPP/UNL/ULSD middle distillate. ARA to UK-Cont (Amsterdam to Le Havre)", "Worldscale": 199.06, "TCE": 30000, "Change (TCE)": 15, "OPEX": 6876}
+            {"Route": "TD2", "Worldscale": 78.00, "TCE": 60328, "Change (TCE)": 183, "OPEX": 8080},
+            {"Route": "TD3C", "Worldscale": 77.15, "TCE": 57589, "Change (TCE)": 698, "OPEX": 8080},
+            {"Route": "TD6", "Worldscale": 90.10, "TCE": 28351, "Change (TCE)": 645, "OPEX": 7321},
+            {"Route": "TD7", "Worldscale": 110.00, "TCE": 20317, "Change (TCE)": 1294, "OPEX": 7030},
+            {"Route": "TD8", "Worldscale": 138.21, "TCE": 28217, "Change (TCE)": 2098, "OPEX": 7030},
+            {"Route": "TD9", "Worldscale": 131.56, "TCE": 22821, "Change (TCE)": -2063, "OPEX": 6876},
+            {"Route": "TD15", "Worldscale": 77.39, "TCE": 57966, "Change (TCE)": 1591, "OPEX": 8080},
+            {"Route": "TD20", "Worldscale": 85.67, "TCE": 32492, "Change (TCE)": 125, "OPEX": 7321},
+            {"Route": "TD22", "Worldscale": 6820000.00, "TCE": 29834, "Change (TCE)": 2399, "OPEX": 8080},
+            {"Route": "TD25", "Worldscale": 130.28, "TCE": 27378, "Change (TCE)": -1394, "OPEX": 7030},
+            {"Route": "TD27", "Worldscale": 79.33, "TCE": 28226, "Change (TCE)": 162, "OPEX": 7321},
+            {"Route": "TC5", "Worldscale": 172.81, "TCE": 25786, "Change (TCE)": -141, "OPEX": 6876},
+            {"Route": "TC8", "Worldscale": 50.33, "TCE": 30550, "Change (TCE)": -908, "OPEX": 6876},
+            {"Route": "TC12", "Worldscale": 160.31, "TCE": 13201, "Change (TCE)": 236, "OPEX": 6876},
+            {"Route": "TC15", "Worldscale": 3094167, "TCE": 8946, "Change (TCE)": -605, "OPEX": 7030},
+            {"Route": "TC16", "Worldscale": 114.72, "TCE": 17103, "Change (TCE)": 152, "OPEX": 6876},
+            {"Route": "TC17", "Worldscale": 216.07, "TCE": 20319, "Change (TCE)": 777, "OPEX": 6876},
+            {"Route": "TC18", "Worldscale": 185.00, "TCE": 20728, "Change (TCE)": -2818, "OPEX": 6876},
+            {"Route": "TC19", "Worldscale": 199.06, "TCE": 26023, "Change (TCE)": 55, "OPEX": 6876},
+            {"Route": "TC20", "Worldscale": 3956250, "TCE": 36279, "Change (TCE)": 2492, "OPEX": 7030},
+            {"Route": "TC21", "Worldscale": 185.00, "TCE": 38000, "Change (TCE)": 15, "OPEX": 6876},
+            {"Route": "TC23", "Worldscale": 199.06, "TCE": 30000, "Change (TCE)": 15, "OPEX": 6876}
+        ]
+        
+        # Descriptions come from the shared route registry
+        route_labels = get_route_registry().labels()
+        full_route_data = [
+            {"Route": row["Route"], "Description": route_labels.get(row["Route"], row["Route"]), **row}
+            for row in full_route_data
         ]
         
         freight_df = self.freight_processor.process_raw_data(full_route_data)
@@ -129,6 +141,10 @@ class MaritimePipeline:
         else:
             logger.info("Skipping market data collection.")
             market_path = None
+        
+        # Render commodity charts now so report generation only reads finished images
+        logger.info("Rendering commodity charts...")
+        self.chart_stage.render_all()
             
         # Collect macro data (optional)
         if not skip_macro and self.macro_collector:
@@ -148,6 +164,10 @@ class MaritimePipeline:
             logger.info("Skipping news sentiment collection.")
             news_path = None
             
+        # Align macro, market and sentiment series into the shared panel
+        logger.info("Aligning time series...")
+        self.aligner.build_panel_from_dir()
+            
         elapsed_time = time.time() - start_time
         logger.info(f"Data collection completed in {elapsed_time:.2f} seconds")
         
@@ -157,13 +177,18 @@ class MaritimePipeline:
             "news_path": news_path
         }
         
-    def run_ml_pipeline(self):
+    def run_ml_pipeline(self, tune=False, incremental=False, segmented=False):
         """Run the ML pipeline"""
         logger.info("Starting ML pipeline...")
         start_time = time.time()
         
+        # Optionally search model settings before training
+        if tune:
+            logger.info("Tuning model hyperparameters...")
+            self.ml_engine.tune_model()
+        
         # Run the ML pipeline
-        ml_output = self.ml_engine.run_pipeline()
+        ml_output = self.ml_engine.run_pipeline(incremental=incremental and not tune, segmented=segmented)
         
         if ml_output is None:
             logger.error("ML pipeline failed")
@@ -174,6 +199,21 @@ class MaritimePipeline:
         
         return ml_output
         
+    def run_backtest(self, mode="expanding", window=None):
+        """Run a walk-forward backtest of the ML model"""
+        logger.info(f"Starting {mode} walk-forward backtest...")
+        start_time = time.time()
+        
+        result = self.ml_engine.run_backtest(mode=mode, window=window)
+        if result is None:
+            logger.error("Backtest failed")
+            return None
+            
+        elapsed_time = time.time() - start_time
+        logger.info(f"Backtest completed in {elapsed_time:.2f} seconds")
+        
+        return result[0]
+        
     def generate_report(self):
         """Generate the final report"""
         logger.info("Generating final report...")
@@ -191,7 +231,8 @@ class MaritimePipeline:
         
         return report_path
         
-    def run_full_pipeline(self, skip_market=False, skip_macro=False, skip_news=False, skip_ml=False):
+    def run_full_pipeline(self, skip_market=False, skip_macro=False, skip_news=False, skip_ml=False, tune=False, incremental=False, 
+                          segmented=False):
         """Run the complete pipeline"""
         logger.info("Starting full maritime ML pipeline...")
         total_start_time = time.time()
@@ -201,7 +242,7 @@ class MaritimePipeline:
         
         # 2. ML Pipeline (optional)
         if not skip_ml:
-            ml_output = self.run_ml_pipeline()
+            ml_output = self.run_ml_pipeline(tune=tune, incremental=incremental, segmented=segmented)
             if not ml_output:
                 logger.warning("ML pipeline failed, continuing with report generation")
         else:
@@ -232,6 +273,15 @@ def parse_args():
     parser.add_argument("--skip-ml", action="store_true", help="Skip ML pipeline")
     parser.add_argument("--alpha-vantage-key", type=str, help="Alpha Vantage API key for macro data")
     parser.add_argument("--news-api-key", type=str, help="News API key for sentiment analysis")
+    parser.add_argument("--tune", action="store_true", help="Tune model hyperparameters before training")
+    parser.add_argument("--incremental", action="store_true", 
+                       help="Continue training the saved model on new observations instead of retraining")
+    parser.add_argument("--segmented", action="store_true", 
+                       help="Train separate models for the TD (dirty) and TC (clean) segments")
+    parser.add_argument("--backtest", choices=["expanding", "sliding"], 
+                       help="Run a walk-forward backtest with expanding or sliding windows")
+    parser.add_argument("--backtest-window", type=int, default=120, 
+                       help="Training window in observation dates for sliding backtests")
     parser.add_argument("--output", type=str, default="Maritime_Per_Week.pdf", help="Output report filename")
     
     return parser.parse_args()
@@ -249,9 +299,15 @@ if __name__ == "__main__":
         skip_market=args.skip_market,
         skip_macro=args.skip_macro,
         skip_news=args.skip_news,
-        skip_ml=args.skip_ml
+        skip_ml=args.skip_ml,
+        tune=args.tune,
+        incremental=args.incremental,
+        segmented=args.segmented
     )
     
+    if args.backtest:
+        pipeline.run_backtest(mode=args.backtest, window=args.backtest_window)
+    
     if report_path:
         print(f"\nPipeline completed successfully!")
         print(f"Report saved to: {report_path}")
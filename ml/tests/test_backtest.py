@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from utils.backtest import WalkForwardBacktester, _fold_rows
+
+
+def gappy_features(n_dates=120, seed=0):
+    """Three routes, one of them only observed every other business day"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=n_dates)
+    features = pd.concat([
+        pd.DataFrame({"Route": route, "Date": dates,
+                      "Current_TCE": 20000 + np.cumsum(rng.normal(0, 300, n_dates)),
+                      "x": rng.normal(size=n_dates)})
+        for route in ["TD3C", "TC2", "TD20"]
+    ], ignore_index=True)
+    sparse = (features["Route"] == "TD20") & (np.arange(len(features)) % 2 == 1)
+    return features[~sparse].reset_index(drop=True)
+
+
+def test_training_targets_end_before_each_test_block(tmp_path):
+    features = gappy_features()
+    backtester = WalkForwardBacktester({"n_estimators": 5}, output_dir=str(tmp_path), horizons=(1, 5))
+    arrays = backtester.build_arrays(features, ["Current_TCE", "x"])
+    jobs = backtester.build_jobs(arrays)
+
+    assert jobs
+    for job in jobs:
+        y = arrays["y"][:, job["column"]]
+        target_pos = arrays["target_pos"][:, job["column"]]
+        train_rows, _ = _fold_rows(arrays["date_pos"], target_pos, ~np.isnan(y), *job["bounds"])
+        assert (target_pos[train_rows] < job["bounds"][1]).all()
+
+
+def test_rerun_reuses_cached_folds(tmp_path):
+    features = gappy_features()
+    params = {"n_estimators": 5, "n_jobs": 1, "random_state": 0}
+
+    _, first = WalkForwardBacktester(params, output_dir=str(tmp_path), max_workers=1).run(features)
+    _, second = WalkForwardBacktester(params, output_dir=str(tmp_path), max_workers=1).run(features)
+
+    pd.testing.assert_frame_equal(first, second)
+    leftovers = [name for name in (tmp_path / "backtest_folds" / "expanding").iterdir()
+                 if not name.name.startswith("fold_")]
+    assert leftovers == []
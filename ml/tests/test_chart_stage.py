@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from utils.chart_stage import render_commodity_chart
+
+
+def test_import_leaves_the_backend_alone():
+    script = "import matplotlib, utils.chart_stage; print(matplotlib.get_backend())"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            env={**os.environ, "MPLBACKEND": "svg"})
+    assert result.stdout.strip() == "svg"
+
+
+def test_commodity_chart_renders_without_pyplot(tmp_path):
+    data = pd.DataFrame({
+        "Date": pd.bdate_range("2025-01-02", periods=30),
+        "Close": range(30),
+        "last_year_avg": 12.0
+    })
+
+    path = render_commodity_chart(data, str(tmp_path / "brent.png"), "Brent Crude Oil")
+
+    assert (tmp_path / "brent.png").stat().st_size > 0
+    assert path.endswith("brent.png")
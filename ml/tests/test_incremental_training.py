@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from utils.predictionengine import MaritimeMLEngine
+
+
+def trending_features(n_dates=200, routes=("TD3C", "TD20", "TC2", "TC5"), seed=0):
+    """Daily rows per route with random-walk rates, a steadily rising macro index and noisy sentiment"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=n_dates)
+    cpi = 300 + 0.05 * np.arange(n_dates)
+    brent = 80 * np.exp(np.cumsum(rng.normal(0, 0.015, n_dates)))
+    frames = []
+    for route in routes:
+        frames.append(pd.DataFrame({
+            "Route": route,
+            "Date": dates,
+            "Current_TCE": 25000 + np.cumsum(rng.normal(0, 400, n_dates)),
+            "inflation": cpi,
+            "BZ=F_price": brent,
+            "sentiment_mean_7d": rng.uniform(-0.5, 0.5, n_dates)
+        }))
+    features = pd.concat(frames, ignore_index=True)
+    target = pd.Series(rng.normal(0, 500, len(features)), index=features.index)
+    return features, target
+
+
+def train_then_append(tmp_path, features, target, new_days=5):
+    engine = MaritimeMLEngine(data_dir=str(tmp_path / "data"), results_dir=str(tmp_path / "results"),
+                              models_dir=str(tmp_path / "models"))
+    engine.model_params["n_estimators"] = 20
+    cutoff = np.sort(features["Date"].unique())[-new_days]
+    before = (features["Date"] < cutoff).to_numpy()
+    assert engine.train_model(features[before], target[before])
+
+    assert engine.train_incremental(features, target)
+    return engine.train_metrics
+
+
+def test_weekly_append_takes_incremental_branch(tmp_path):
+    features, target = trending_features()
+
+    metrics = train_then_append(tmp_path, features, target)
+
+    assert metrics["training_mode"] == "incremental"
+    assert metrics["new_observations"] == 5 * features["Route"].nunique()
+
+
+def test_level_shift_triggers_full_retrain(tmp_path):
+    features, target = trending_features()
+    last_week = features["Date"] >= np.sort(features["Date"].unique())[-5]
+    features.loc[last_week, "BZ=F_price"] *= 1.5
+
+    metrics = train_then_append(tmp_path, features, target)
+
+    assert metrics["training_mode"] == "full"
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from utils.predictionengine import MaritimeMLEngine
+
+
+def collector_frame(symbols=("BZ=F", "FRO"), start="2025-01-02", periods=120):
+    """Market file as the collector writes it: year-to-date closes plus per-symbol metric columns"""
+    dates = pd.bdate_range(start, periods=periods)
+    frames = []
+    for i, symbol in enumerate(symbols):
+        close = 50.0 + 10 * i + np.arange(periods) * 0.1
+        frames.append(pd.DataFrame({
+            "Date": dates.strftime("%Y-%m-%d 00:00:00-05:00"),
+            "Close": close,
+            "Symbol": symbol,
+            "Category": "Energy",
+            "DataCollectionDate": "2025-06-20",
+            "ytd_avg": close.mean(),
+            "last_year_avg": 40.0 + 10 * i,
+            "year_before_avg": 30.0 + 10 * i,
+            "YTD_Change_Pct": (close[-1] / (40.0 + 10 * i) - 1) * 100
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_ytd_change_uses_collector_last_year_average(tmp_path):
+    engine = MaritimeMLEngine(data_dir=str(tmp_path / "data"), results_dir=str(tmp_path / "results"),
+                              models_dir=str(tmp_path / "models"))
+    market_df = collector_frame()
+    dates = pd.Series(pd.bdate_range("2025-02-03", periods=60))
+
+    features = engine.market_features(market_df, dates)
+
+    for symbol, last_year_avg in [("BZ=F", 40.0), ("FRO", 50.0)]:
+        ytd_change = features[f"{symbol}_ytd_change"]
+        assert ytd_change.notna().all()
+        expected = (features[f"{symbol}_price"] / last_year_avg - 1) * 100
+        np.testing.assert_allclose(ytd_change, expected)
+
+
+def test_ytd_change_dropped_without_a_baseline(tmp_path):
+    engine = MaritimeMLEngine(data_dir=str(tmp_path / "data"), results_dir=str(tmp_path / "results"),
+                              models_dir=str(tmp_path / "models"))
+    market_df = collector_frame().drop(columns=["last_year_avg", "year_before_avg"])
+    dates = pd.Series(pd.bdate_range("2025-02-03", periods=60))
+
+    features = engine.market_features(market_df, dates)
+
+    assert "BZ=F_price" in features
+    assert not any(name.endswith("_ytd_change") for name in features)
@@ -0,0 +1,31 @@
+from utils.model_registry import ModelRegistry
+
+
+def publish_text(registry, tmp_path, name, text):
+    source = tmp_path / "model.txt"
+    source.write_text(text)
+    return registry.publish(name, {"model.txt": str(source)})
+
+
+def test_load_memoizes_per_loader(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    publish_text(registry, tmp_path, "rates", "v1")
+
+    def make_loader(transform):
+        # Same __qualname__ for every loader built here
+        return lambda paths: transform(open(paths["model.txt"]).read())
+
+    upper = make_loader(str.upper)
+    reverse = make_loader(lambda text: text[::-1])
+
+    assert registry.load("rates", upper) == "V1"
+    assert registry.load("rates", reverse) == "1v"
+    assert registry.load("rates", upper) is registry.load("rates", upper)
+
+
+def test_names_lists_published_models(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    publish_text(registry, tmp_path, "maritime_xgb", "global")
+    publish_text(registry, tmp_path, "maritime_xgb_TD", "segment")
+
+    assert registry.names() == ["maritime_xgb", "maritime_xgb_TD"]
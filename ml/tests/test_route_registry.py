@@ -0,0 +1,64 @@
+import pandas as pd
+
+from data.route_registry import FREIGHT_ROUTE_CODES, NEWS_ROUTE_CODES, get_route_registry
+
+# Route descriptions the news collector tagged with before the registry existed
+NEWS_ROUTES = {
+    "TD2": "Middle East Gulf to Singapore",
+    "TD3C": "Middle East Gulf to China (VLCC)",
+    "TD6": "Black Sea to Mediterranean (Suezmax)",
+    "TD7": "North Sea to Continent (Aframax)",
+    "TD8": "Kuwait to Singapore",
+    "TD9": "Caribbean to US Gulf (LR1)",
+    "TD15": "West Africa to China (VLCC)",
+    "TD20": "West Africa to UK-Continent (Suezmax)",
+    "TD22": "US Gulf to China",
+    "TD25": "US Gulf to UK-Continent",
+    "TD27": "Guyana to ARA",
+    "TC5": "CPP Middle East Gulf to Japan (LR1)",
+    "TC8": "CPP Middle East Gulf to UK-Continent (LR1)",
+    "TC12": "Naphtha West Coast India to Japan (MR)",
+    "TC15": "Naphtha Mediterranean to Far East (Aframax)",
+    "TC16": "ARA to Offshore Lome (LR1)",
+    "TC17": "CPP Jubail to Dar es Salaam (MR)",
+    "TC18": "CPP US Gulf to Brazil (MR)",
+    "TC19": "CPP Amsterdam to Lagos (MR)",
+    "TC20": "CPP Middle East Gulf to UK-Continent (Aframax)"
+}
+
+
+def legacy_tag(content):
+    """The collector's original per-article loop"""
+    for code, description in NEWS_ROUTES.items():
+        if any(term in content for term in description.lower().split() if len(term) > 3):
+            return code
+    return ""
+
+
+def test_news_routes_are_pinned():
+    routes = get_route_registry()
+
+    assert routes.descriptions(NEWS_ROUTE_CODES) == NEWS_ROUTES
+    assert list(routes.descriptions(NEWS_ROUTE_CODES)) == list(NEWS_ROUTES)
+
+
+def test_freight_mapping_adds_tc21_and_tc23():
+    mapping = get_route_registry().descriptions(FREIGHT_ROUTE_CODES)
+
+    assert mapping == {**NEWS_ROUTES, "TC21": "CPP US Gulf to Caribbean", "TC23": "CPP/UNL/ULSD ARA to UK-Cont"}
+
+
+def test_content_tagging_matches_the_original_loop():
+    content = pd.Series([
+        "vlcc rates jump as middle east gulf fixtures surge",
+        "houston refiners ship diesel to the caribbean",
+        "port congestion in lagos delays product tankers",
+        "guyana crude heads to rotterdam",
+        "black sea exports resume",
+        "brazil imports more gasoline",
+        "no shipping news today"
+    ])
+
+    tags = get_route_registry().match_content(content, NEWS_ROUTE_CODES)
+
+    assert tags.tolist() == [legacy_tag(text) for text in content]
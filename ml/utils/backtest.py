@@ -0,0 +1,270 @@
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger("WalkForwardBacktester")
+
+def _fold_rows(date_pos, target_pos, known, train_start, test_start, test_end):
+    """Training and test row positions of one fold"""
+    # A training row's forward target must be observed before the test block starts
+    train = known & (date_pos >= train_start) & (target_pos < test_start)
+    test = known & (date_pos >= test_start) & (date_pos < test_end)
+    return np.flatnonzero(train), np.flatnonzero(test)
+
+def _fit_predict(job):
+    """Process-pool entry point: train one fold's model and predict its test rows"""
+    # Workers memory-map the shared arrays and rebuild their rows from the fold bounds
+    X = np.load(job["X_path"], mmap_mode="r")
+    y = np.load(job["y_path"], mmap_mode="r")[:, job["column"]]
+    date_pos = np.load(job["date_pos_path"], mmap_mode="r")
+    target_pos = np.load(job["target_pos_path"], mmap_mode="r")[:, job["column"]]
+    train_rows, test_rows = _fold_rows(date_pos, target_pos, ~np.isnan(y), *job["bounds"])
+
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train_rows])
+
+    model = xgb.XGBRegressor(**job["params"])
+    model.fit(X_train, y[train_rows])
+
+    return job["key"], model.predict(scaler.transform(X[test_rows]))
+
+class WalkForwardBacktester:
+    """
+    Walk-forward evaluation of the freight model over the freight history.
+
+    The observation dates are cut into consecutive test blocks of `step` dates.
+    Each block is predicted by a model trained only on earlier rows, either on
+    everything before the block (expanding) or on the last `window` dates
+    (sliding). Training rows whose forward target is observed on or after the
+    block's first date are purged so nothing from the future leaks in; the
+    target date is taken per route, so routes with gaps are purged correctly.
+
+    Every fold is keyed by a hash of its parameters and data. Because market,
+    macro and sentiment features are joined as of each row's date, new data
+    leaves earlier rows untouched. Fold predictions are cached on disk, so a
+    rerun after a new week of data only trains the folds that changed.
+    Uncached folds train in parallel in a process pool: the feature matrix and
+    targets are written once as .npy files that every worker memory-maps, and
+    a job only carries its fold bounds. Cache entries that no longer match a
+    fold are pruned after each run.
+    """
+    def __init__(self, model_params, output_dir="results", horizons=(1, 5), mode="expanding",
+                 window=None, step=5, min_train=60, max_workers=None):
+        if mode not in ("expanding", "sliding"):
+            raise ValueError(f"Unknown backtest mode: {mode}")
+        if mode == "sliding" and not window:
+            raise ValueError("Sliding backtests need a window size")
+
+        self.model_params = dict(model_params)
+        self.output_dir = output_dir
+        # One cache per mode/window so pruning after a run never drops another setup's folds
+        cache_name = mode if mode == "expanding" else f"{mode}_{window}"
+        self.cache_dir = os.path.join(output_dir, "backtest_folds", cache_name)
+        self.horizons = list(horizons)
+        self.mode = mode
+        self.window = window
+        self.step = step
+        self.min_train = min_train
+        self.max_workers = max_workers
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def forward_targets(self, features, value_column="Current_TCE"):
+        """
+        Change in the value column `h` observations ahead, per route, and the date it is observed
+
+        Returns:
+            Tuple of DataFrames (target_<h> values, target_date_<h> dates), aligned with features
+        """
+        ordered = features.sort_values(["Route", "Date"], kind="stable")
+        grouped = ordered.groupby("Route", sort=False)
+
+        targets = pd.DataFrame(index=ordered.index)
+        target_dates = pd.DataFrame(index=ordered.index)
+        for horizon in self.horizons:
+            targets[f"target_{horizon}"] = grouped[value_column].shift(-horizon) - ordered[value_column]
+            target_dates[f"target_date_{horizon}"] = grouped["Date"].shift(-horizon)
+
+        return targets.reindex(features.index), target_dates.reindex(features.index)
+
+    def folds(self, n_dates):
+        """Test blocks as (start, end) date positions"""
+        return [(cut, min(cut + self.step, n_dates)) for cut in range(self.min_train, n_dates, self.step)]
+
+    def _fold_key(self, horizon, row_hashes, train_rows, test_rows):
+        digest = hashlib.sha256()
+        digest.update(json.dumps({"params": self.model_params, "horizon": horizon}, sort_keys=True).encode())
+        for rows in (train_rows, test_rows):
+            digest.update(str(len(rows)).encode())
+            digest.update(row_hashes[rows].tobytes())
+        return digest.hexdigest()
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, f"fold_{key[:16]}.npy")
+
+    def build_arrays(self, features, feature_columns):
+        """
+        Shared arrays behind every fold
+
+        Returns:
+            Dictionary with the feature matrix X, targets y (one column per
+            horizon), each row's date position and its target's date position
+            (past the last date when unknown), the sorted dates, and a hash of
+            every row's features and targets for the fold cache keys
+        """
+        dates = np.sort(features["Date"].unique())
+        targets, target_dates = self.forward_targets(features)
+
+        y = targets.to_numpy(dtype="float64")
+        target_pos = np.full(y.shape, len(dates), dtype=np.int64)
+        for column, name in enumerate(target_dates.columns):
+            observed = target_dates[name].notna().to_numpy()
+            target_pos[observed, column] = np.searchsorted(dates, target_dates[name].to_numpy()[observed])
+
+        X = features[feature_columns].to_numpy(dtype="float32")
+        row_hashes = (pd.util.hash_pandas_object(pd.DataFrame(X), index=False).to_numpy()
+                      ^ pd.util.hash_pandas_object(pd.DataFrame(y), index=False).to_numpy())
+
+        return {
+            "X": X,
+            "y": y,
+            "date_pos": np.searchsorted(dates, features["Date"].to_numpy()),
+            "target_pos": target_pos,
+            "dates": dates,
+            "row_hashes": row_hashes
+        }
+
+    def build_jobs(self, arrays):
+        """
+        Create one training job per horizon and fold
+
+        Returns:
+            List of job dicts with key, horizon, fold date, test row positions and fold bounds
+        """
+        dates = arrays["dates"]
+        jobs = []
+        for column, horizon in enumerate(self.horizons):
+            y = arrays["y"][:, column]
+            target_pos = arrays["target_pos"][:, column]
+            known = ~np.isnan(y)
+
+            for test_start, test_end in self.folds(len(dates)):
+                train_start = 0 if self.mode == "expanding" else max(0, test_start - self.window)
+                bounds = (train_start, test_start, test_end)
+                train_rows, test_rows = _fold_rows(arrays["date_pos"], target_pos, known, *bounds)
+                if len(train_rows) < 2 or len(test_rows) == 0:
+                    continue
+
+                jobs.append({
+                    "key": self._fold_key(horizon, arrays["row_hashes"], train_rows, test_rows),
+                    "horizon": horizon,
+                    "column": column,
+                    "fold": pd.Timestamp(dates[test_start]),
+                    "rows": test_rows,
+                    "bounds": bounds,
+                    "params": self.model_params
+                })
+
+        return jobs
+
+    def run(self, features):
+        """
+        Backtest the model on dated features (Route and Date id columns plus inputs)
+
+        Returns:
+            Tuple of (metrics per route and horizon, out-of-sample predictions)
+        """
+        feature_columns = [c for c in features.columns if c not in ("Route", "Date")]
+        features = features.reset_index(drop=True)
+        arrays = self.build_arrays(features, feature_columns)
+        jobs = self.build_jobs(arrays)
+
+        predictions = {}
+        pending = []
+        for job in jobs:
+            path = self._cache_path(job["key"])
+            if os.path.exists(path):
+                predictions[job["key"]] = np.load(path)
+            else:
+                pending.append(job)
+
+        if pending:
+            paths = {name: os.path.join(self.cache_dir, f"{name}.npy") for name in ("X", "y", "date_pos", "target_pos")}
+            for name, path in paths.items():
+                np.save(path, arrays[name])
+            for job in pending:
+                job.update({f"{name}_path": path for name, path in paths.items()})
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    for key, y_pred in executor.map(_fit_predict, pending):
+                        np.save(self._cache_path(key), y_pred)
+                        predictions[key] = y_pred
+            finally:
+                for path in paths.values():
+                    os.remove(path)
+
+        self._prune({os.path.basename(self._cache_path(job["key"])) for job in jobs})
+        logger.info(f"✅ Backtest folds: {len(pending)} trained, {len(jobs) - len(pending)} cached")
+
+        frames = []
+        for job in jobs:
+            rows = job["rows"]
+            frames.append(pd.DataFrame({
+                "Route": features["Route"].to_numpy()[rows],
+                "Date": features["Date"].to_numpy()[rows],
+                "Horizon": job["horizon"],
+                "Fold": job["fold"],
+                "Actual": arrays["y"][rows, job["column"]],
+                "Predicted": predictions[job["key"]]
+            }))
+
+        if not frames:
+            logger.warning("Not enough history for any backtest fold")
+            return pd.DataFrame(), pd.DataFrame()
+
+        predictions_df = pd.concat(frames, ignore_index=True)
+        return self.score(predictions_df), predictions_df
+
+    def _prune(self, keep):
+        """Remove cached folds that the current run no longer uses"""
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("fold_") and name not in keep:
+                os.remove(os.path.join(self.cache_dir, name))
+    
+    @staticmethod
+    def score(predictions_df):
+        """MAE, RMSE and directional accuracy per route and horizon, plus an ALL row per horizon"""
+        scored = predictions_df.assign(
+            abs_error=(predictions_df["Predicted"] - predictions_df["Actual"]).abs(),
+            sq_error=(predictions_df["Predicted"] - predictions_df["Actual"]) ** 2,
+            direction_hit=np.sign(predictions_df["Predicted"]) == np.sign(predictions_df["Actual"])
+        )
+        aggregations = {
+            "MAE": ("abs_error", "mean"),
+            "RMSE": ("sq_error", "mean"),
+            "Directional_Accuracy": ("direction_hit", "mean"),
+            "Observations": ("abs_error", "size"),
+            "Folds": ("Fold", "nunique")
+        }
+
+        per_route = scored.groupby(["Horizon", "Route"]).agg(**aggregations).reset_index()
+        overall = scored.groupby("Horizon").agg(**aggregations).reset_index().assign(Route="ALL")
+
+        metrics = pd.concat([per_route, overall], ignore_index=True)
+        metrics["RMSE"] = np.sqrt(metrics["RMSE"])
+        return metrics.sort_values(["Horizon", "Route"], kind="stable").reset_index(drop=True)
+
+    def save(self, metrics, predictions_df):
+        """Save backtest metrics and out-of-sample predictions"""
+        metrics_path = os.path.join(self.output_dir, "backtest_metrics.csv")
+        predictions_path = os.path.join(self.output_dir, "backtest_predictions.csv")
+        metrics.to_csv(metrics_path, index=False)
+        predictions_df.to_csv(predictions_path, index=False)
+        logger.info(f"✅ Backtest results saved to {metrics_path}")
+        return metrics_path, predictions_path
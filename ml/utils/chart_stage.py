@@ -0,0 +1,318 @@
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+# Figures are built without pyplot so importing this module leaves the process's backend alone
+from matplotlib.figure import Figure
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("ChartStage")
+
+# Bump when chart styling changes so cached images are re-rendered
+CHART_VERSION = "1"
+
+COMMODITY_TITLES = {
+    'BZ=F': 'Brent Crude Oil',
+    'CL=F': 'Crude Oil WTI',
+    'GC=F': 'Gold',
+    'SI=F': 'Silver'
+}
+
+def render_commodity_chart(data, path, title, dpi=100):
+    """Plot YTD closes against the previous years' averages"""
+    fig = Figure(figsize=(6, 4))
+    ax = fig.subplots()
+    ax.plot(data['Date'], data['Close'], label='YTD Prices', color='blue')
+
+    averages = [
+        ('last_year_avg', 'orange', 'Last Year Average'),
+        ('year_before_avg', 'green', 'Year Before Average')
+    ]
+    for column, color, label in averages:
+        if column in data.columns and data[column].notna().any():
+            ax.axhline(y=data[column].dropna().iloc[0], color=color, linestyle='--', label=label)
+
+    ax.set_title(f"{title} Price Comparison (YTD vs. Averages)")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Price")
+    ax.tick_params(axis='x', rotation=45)
+    ax.legend()
+    ax.grid()
+
+    fig.savefig(path, dpi=dpi, bbox_inches='tight', pad_inches=0.1)
+    return path
+
+def _render_job(job):
+    """Process-pool entry point: render one chart job"""
+    return job["name"], job["func"](job["data"], job["path"], **job["kwargs"])
+
+class ChartStage:
+    """
+    Batch chart renderer with content-hash caching.
+    Each job is hashed on its input data and render arguments; jobs whose hash
+    matches the manifest from the last run (and whose image still exists) are
+    skipped, and the rest are rendered together in a process pool.
+    """
+    def __init__(self, output_dir="images", manifest_name="chart_manifest.json", max_workers=None):
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, manifest_name)
+        self.max_workers = max_workers
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def load_manifest(self):
+        """Load the hashes recorded by the previous run"""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable chart manifest: {str(e)}")
+            return {}
+
+    def save_manifest(self, manifest):
+        """Persist chart hashes atomically"""
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def job_hash(self, job):
+        """Hash a job's input data, renderer and arguments"""
+        digest = hashlib.sha256()
+        digest.update(f"{CHART_VERSION}:{job['func'].__name__}:{sorted(job['kwargs'].items())}".encode())
+
+        data = job["data"]
+        if isinstance(data, pd.DataFrame):
+            digest.update(",".join(map(str, data.columns)).encode())
+            digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        else:
+            digest.update(json.dumps(data, sort_keys=True, default=str).encode())
+
+        return digest.hexdigest()
+
+    def run(self, jobs):
+        """
+        Render every job whose inputs changed since the last run
+
+        Args:
+            jobs: List of dicts with name, func (module-level renderer), data, path and kwargs
+
+        Returns:
+            Dictionary mapping job name to image path
+        """
+        manifest = self.load_manifest()
+        paths = {}
+        stale = []
+
+        for job in jobs:
+            job.setdefault("kwargs", {})
+            job["hash"] = self.job_hash(job)
+            paths[job["name"]] = job["path"]
+
+            if manifest.get(job["name"]) == job["hash"] and os.path.exists(job["path"]):
+                continue
+            stale.append(job)
+
+        skipped = len(jobs) - len(stale)
+        if stale:
+            if len(stale) == 1:
+                rendered = [_render_job(stale[0])]
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    rendered = list(executor.map(_render_job, stale))
+
+            hashes = {job["name"]: job["hash"] for job in stale}
+            for name, _ in rendered:
+                manifest[name] = hashes[name]
+            self.save_manifest(manifest)
+
+        logger.info(f"✅ Charts: {len(stale)} rendered, {skipped} unchanged")
+        return paths
+
+class CommodityChartStage(ChartStage):
+    """
+    Renders the commodity price-comparison charts embedded in the report
+    from the cached market dataset.
+    """
+    def __init__(self, data_dir="data", images_dir="images", market_file="maritime_data_2025.csv",
+                 commodities=None, dpi=100, max_workers=None):
+        super().__init__(output_dir=images_dir, max_workers=max_workers)
+        self.data_dir = data_dir
+        self.market_file = market_file
+        self.commodities = commodities or list(COMMODITY_TITLES)
+        self.dpi = dpi
+
+    def build_jobs(self, market_df):
+        """Create one render job per commodity present in the market data"""
+        columns = [c for c in ['Date', 'Close', 'last_year_avg', 'year_before_avg'] if c in market_df.columns]
+        market_df = market_df[market_df['Symbol'].isin(self.commodities)]
+
+        jobs = []
+        for symbol, symbol_data in market_df.groupby('Symbol', sort=False):
+            jobs.append({
+                "name": symbol,
+                "func": render_commodity_chart,
+                "data": symbol_data[columns].sort_values('Date').reset_index(drop=True),
+                "path": os.path.join(self.output_dir, f"{symbol}_price_comparison.png"),
+                "kwargs": {"title": COMMODITY_TITLES.get(symbol, symbol), "dpi": self.dpi}
+            })
+
+        missing = set(self.commodities) - set(market_df['Symbol'].unique())
+        for symbol in sorted(missing):
+            logger.warning(f"No market data for {symbol}, chart not rendered")
+
+        return jobs
+
+    def render_all(self):
+        """Render all commodity comparison charts that are out of date"""
+        market_path = os.path.join(self.data_dir, self.market_file)
+        if not os.path.exists(market_path):
+            logger.warning(f"Market data not found: {market_path}")
+            return {}
+
+        market_df = pd.read_csv(market_path)
+        market_df['Date'] = pd.to_datetime(market_df['Date'], utc=True).dt.tz_localize(None)
+
+        return self.run(self.build_jobs(market_df))
+
+def render_top_rate_changes(data, path, dpi=300):
+    """Bar chart of the strongest predicted improvements and declines with interval error bars"""
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots()
+    positions = np.arange(len(data))
+    colors = np.where(data['Predicted_Change'] > 0, 'green', 'red')
+    ax.bar(positions, data['Predicted_Change'], color=colors)
+
+    # Add error bars for uncertainty
+    ax.errorbar(
+        positions,
+        data['Predicted_Change'],
+        yerr=[data['Predicted_Change'] - data['Lower_Bound'], data['Upper_Bound'] - data['Predicted_Change']],
+        fmt='none',
+        color='black',
+        capsize=5
+    )
+
+    ax.set_xticks(positions)
+    ax.set_xticklabels(data['Route'], rotation=45, ha='right')
+    ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+    ax.set_xlabel('Route')
+    ax.set_ylabel('Predicted TCE Change ($/day)')
+    ax.set_title('Top Routes by Predicted Rate Changes')
+    fig.tight_layout()
+
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+def render_tce_comparison(data, path, dpi=300):
+    """Grouped bars of current and predicted TCE per route"""
+    x = np.arange(len(data))
+    width = 0.35
+
+    fig = Figure(figsize=(14, 8))
+    ax = fig.subplots()
+    rects1 = ax.bar(x - width/2, data['Current_TCE'], width, label='Current TCE')
+    rects2 = ax.bar(x + width/2, data['Predicted_TCE'], width, label='Predicted TCE')
+
+    ax.set_ylabel('TCE Rate ($/day)')
+    ax.set_title('Current vs Predicted TCE Rates by Route')
+    ax.set_xticks(x)
+    ax.set_xticklabels(data['Route'], rotation=45, ha='right')
+    ax.legend()
+
+    # Add value labels on bars
+    for rects in (rects1, rects2):
+        ax.bar_label(rects, labels=[f'${int(h)}' for h in rects.datavalues], padding=3, fontsize=8)
+
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+def render_feature_importance(data, path, dpi=300):
+    """Horizontal bars of the most important model features"""
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots()
+    ax.barh(data['Feature'], data['Importance'])
+    ax.set_xlabel('Importance')
+    ax.set_title(f'Top {len(data)} Feature Importance')
+    fig.tight_layout()
+
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+def render_prediction_uncertainty(data, path, dpi=300):
+    """Horizontal bars of prediction interval width per route, narrowest first"""
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    positions = np.arange(len(data))
+    ax.barh(positions, data['Uncertainty'])
+    ax.set_yticks(positions)
+    ax.set_yticklabels(data['Route'])
+    ax.set_xlabel('Prediction Uncertainty Range')
+    ax.set_title('Route Prediction Confidence (Smaller is Better)')
+    fig.tight_layout()
+
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+class PredictionChartStage(ChartStage):
+    """
+    Renders the ML engine's prediction charts. Full renders use the report
+    resolution; preview mode renders low-DPI copies for the dashboard under
+    separate file names so both sets stay cached.
+    """
+    def __init__(self, output_dir="results/visuals", dpi=300, preview_dpi=72, max_workers=None):
+        super().__init__(output_dir=output_dir, max_workers=max_workers)
+        self.dpi = dpi
+        self.preview_dpi = preview_dpi
+
+    def build_jobs(self, predictions_df, feature_importance=None, preview=False):
+        """Prepare each chart's data with vectorized frame operations and create its render job"""
+        chart_data = {
+            # Top 5 improving and top 5 declining (predictions are sorted descending)
+            "top_rate_changes": (render_top_rate_changes, pd.concat([
+                predictions_df.head(5), predictions_df.tail(5)
+            ])[['Route', 'Predicted_Change', 'Lower_Bound', 'Upper_Bound']].reset_index(drop=True))
+        }
+
+        if {"Current_TCE", "Predicted_TCE"}.issubset(predictions_df.columns):
+            chart_data["tce_comparison"] = (render_tce_comparison, predictions_df
+                .drop_duplicates('Route')
+                .sort_values('Current_TCE', ascending=False)[['Route', 'Current_TCE', 'Predicted_TCE']]
+                .reset_index(drop=True))
+
+        if feature_importance:
+            top_features = pd.Series(feature_importance, dtype=float).sort_values(ascending=False, kind='stable').head(15)
+            chart_data["feature_importance"] = (render_feature_importance, pd.DataFrame({
+                'Feature': top_features.index, 'Importance': top_features.to_numpy()
+            }))
+
+        chart_data["prediction_uncertainty"] = (render_prediction_uncertainty, predictions_df
+            .assign(Uncertainty=predictions_df["Upper_Bound"] - predictions_df["Lower_Bound"])
+            .sort_values('Uncertainty', kind='stable')[['Route', 'Uncertainty']]
+            .reset_index(drop=True))
+
+        suffix = "_preview" if preview else ""
+        return [{
+            "chart": name,
+            "name": f"{name}{suffix}",
+            "func": func,
+            "data": data,
+            "path": os.path.join(self.output_dir, f"{name}{suffix}.png"),
+            "kwargs": {"dpi": self.preview_dpi if preview else self.dpi}
+        } for name, (func, data) in chart_data.items()]
+
+    def render_all(self, predictions_df, feature_importance=None, preview=False):
+        """
+        Render the prediction charts that are out of date
+
+        Returns:
+            Dictionary mapping chart name (without the preview suffix) to image path
+        """
+        jobs = self.build_jobs(predictions_df, feature_importance, preview)
+        self.run(jobs)
+        return {job["chart"]: job["path"] for job in jobs}
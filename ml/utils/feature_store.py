@@ -0,0 +1,129 @@
+import os
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("FeatureStore")
+
+# Bump whenever prepare_features changes so cached matrices are rebuilt
+FEATURE_VERSION = "5"
+
+def file_signature(paths):
+    """Cheap (path, size, mtime) signature of the input files that exist"""
+    signature = []
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+class FeatureStore:
+    """
+    Content-addressed cache for prepared feature matrices.
+
+    Entries are keyed by a hash of the input files' contents and
+    FEATURE_VERSION, so a matrix is reused exactly as long as neither the data
+    nor the feature code changed. Hits are served from memory within a process
+    and from compact NPZ files across processes.
+    """
+    def __init__(self, cache_dir="data/feature_cache", version=FEATURE_VERSION, max_entries=10):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.max_entries = max_entries
+        self._memory = {}
+        self._file_hashes = {}
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _hash_file(self, path, size, mtime_ns):
+        """Content hash of one file, memoized on its size and mtime"""
+        cache_key = (path, size, mtime_ns)
+        if cache_key not in self._file_hashes:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            self._file_hashes[cache_key] = digest.hexdigest()
+        return self._file_hashes[cache_key]
+
+    def key(self, paths):
+        """Cache key for a set of input files"""
+        digest = hashlib.sha256(f"features:{self.version}".encode())
+        for path, size, mtime_ns in file_signature(paths):
+            digest.update(os.path.basename(path).encode())
+            digest.update(self._hash_file(path, size, mtime_ns).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"features_{key[:16]}.npz")
+
+    def get(self, key):
+        """
+        Look up a cached feature matrix
+
+        Returns:
+            Tuple of (features DataFrame, target Series or None), or None on a miss
+        """
+        if key in self._memory:
+            features, target = self._memory[key]
+            return features.copy(), None if target is None else target.copy()
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            features, target = self._read(path, key)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable feature cache {path}: {str(e)}")
+            return None
+
+        self._memory[key] = (features, target)
+        return features.copy(), None if target is None else target.copy()
+
+    def put(self, key, features, target=None):
+        """Cache a feature matrix in memory and on disk"""
+        self._memory[key] = (features.copy(), None if target is None else target.copy())
+
+        arrays = {"key": np.array(key), "columns": np.array([str(c) for c in features.columns])}
+        for i, column in enumerate(features.columns):
+            values = features[column].to_numpy()
+            arrays[f"col_{i}"] = values.astype(str) if values.dtype == object else values
+        if target is not None:
+            arrays["target"] = target.to_numpy(dtype="float64")
+            if target.name is not None:
+                arrays["target_name"] = np.array(str(target.name))
+
+        path = self._path(key)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+        self._prune()
+        return path
+
+    def _read(self, path, key):
+        with np.load(path, allow_pickle=False) as cached:
+            if str(cached["key"]) != key:
+                raise ValueError("key mismatch")
+
+            columns = cached["columns"].tolist()
+            features = pd.DataFrame({column: cached[f"col_{i}"] for i, column in enumerate(columns)})
+
+            target = None
+            if "target" in cached:
+                name = str(cached["target_name"]) if "target_name" in cached else None
+                target = pd.Series(cached["target"], name=name)
+
+        return features, target
+
+    def _prune(self):
+        """Keep only the most recent cache files"""
+        entries = sorted(
+            (os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+             if name.startswith("features_") and name.endswith(".npz")),
+            key=os.path.getmtime, reverse=True
+        )
+        for path in entries[self.max_entries:]:
+            os.remove(path)
@@ -0,0 +1,162 @@
+import os
+import json
+import logging
+import threading
+import numpy as np
+import joblib
+import xgboost as xgb
+
+logger = logging.getLogger("RouteInference")
+
+# Sessions built from the registry, keyed by model version and snapshot file
+_sessions = {}
+_lock = threading.Lock()
+
+def save_snapshot(path, routes, feature_names, latest, current_tce=None):
+    """
+    Persist each route's latest feature row for inference sessions
+
+    Columns that hold the same value for every route (market and macro
+    indicators) are stored once as the global feature vector.
+    """
+    latest = np.asarray(latest, dtype="float64")
+    is_global = (latest == latest[:1]).all(axis=0) if len(latest) > 1 else np.zeros(latest.shape[1], dtype=bool)
+    # One-hot route type columns are constant only when a single segment is present
+    is_global &= ~np.char.startswith(np.asarray(feature_names, dtype=str), "RouteType_")
+
+    if current_tce is None:
+        current_tce = np.full(len(routes), np.nan)
+
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        routes=np.asarray(routes, dtype=str),
+        feature_names=np.asarray(feature_names, dtype=str),
+        latest=latest,
+        global_index=np.flatnonzero(is_global),
+        current_tce=np.asarray(current_tce, dtype="float64")
+    )
+    os.replace(tmp_path, path)
+    return path
+
+def _load_session_parts(paths):
+    """Booster, scaler statistics and feature order of a registered model version"""
+    booster = xgb.Booster()
+    booster.load_model(paths["maritime_xgb_model.json"])
+    scaler = joblib.load(paths["feature_scaler.pkl"])
+    with open(paths["available_features.json"], "r") as f:
+        feature_names = json.load(f)
+    return booster, scaler.mean_, scaler.scale_, feature_names
+
+class RouteInferenceSession:
+    """
+    Precompiled single-route predictor for the API and dashboard.
+
+    Holds the booster, the scaler's mean and scale as NumPy arrays, the
+    ordered feature index, each route's latest feature row and the global
+    market/macro vector. predict() copies one route's row into a
+    preallocated buffer, applies overrides, scales it in place and calls
+    inplace_predict, so no DataFrame, CSV or feature rebuild is involved.
+    """
+    def __init__(self, booster, mean, scale, feature_names, routes, latest, global_index,
+                 current_tce=None, model_version=None):
+        self.booster = booster
+        self.mean = np.asarray(mean, dtype="float64")
+        self.scale = np.asarray(scale, dtype="float64")
+        self.feature_names = list(feature_names)
+        self.feature_index = {name: i for i, name in enumerate(self.feature_names)}
+        self.route_index = {route: i for i, route in enumerate(routes)}
+        self.latest = np.ascontiguousarray(latest, dtype="float64")
+        self.global_index = np.asarray(global_index, dtype=np.intp)
+        self.global_values = self.latest[0, self.global_index].copy() if len(self.latest) else np.empty(0)
+        self.current_tce = np.asarray(current_tce if current_tce is not None else np.full(len(routes), np.nan))
+        self.model_version = model_version
+
+        # Preallocated row buffers, reused by every call under the lock
+        self._row = np.empty((1, len(self.feature_names)), dtype="float64")
+        self._row32 = np.empty((1, len(self.feature_names)), dtype="float32")
+        self._lock = threading.Lock()
+
+    @property
+    def routes(self):
+        return list(self.route_index)
+
+    @classmethod
+    def from_registry(cls, registry, snapshot_path, model_name="maritime_xgb"):
+        """Build a session from the current registered model and a saved snapshot"""
+        version = registry.current_version(model_name)
+        if version is None:
+            raise ValueError(f"No published version of {model_name}")
+
+        booster, mean, scale, feature_names = registry.load(model_name, _load_session_parts, version)
+
+        with np.load(snapshot_path) as snapshot:
+            if snapshot["feature_names"].tolist() != list(feature_names):
+                raise ValueError("Inference snapshot features do not match the current model")
+            return cls(booster, mean, scale, feature_names, snapshot["routes"].tolist(), snapshot["latest"],
+                       snapshot["global_index"], snapshot["current_tce"], version)
+
+    def update_globals(self, values):
+        """Replace global market/macro features (mapping of feature name to value) for all routes"""
+        for name, value in values.items():
+            i = self.feature_index[name]
+            position = np.flatnonzero(self.global_index == i)
+            if len(position) == 0:
+                raise ValueError(f"{name} is not a global feature")
+            self.global_values[position[0]] = value
+
+    def predict(self, route, overrides=None):
+        """
+        Predicted TCE change for one route
+
+        Args:
+            route: Route code
+            overrides: Optional mapping of feature name to value for this call only
+        """
+        i = self.route_index.get(route)
+        if i is None:
+            raise KeyError(f"No features for route {route}")
+
+        with self._lock:
+            row = self._row[0]
+            np.copyto(row, self.latest[i])
+            row[self.global_index] = self.global_values
+            if overrides:
+                for name, value in overrides.items():
+                    row[self.feature_index[name]] = value
+            np.subtract(row, self.mean, out=row)
+            np.divide(row, self.scale, out=row)
+            np.copyto(self._row32, self._row)
+            return float(self.booster.inplace_predict(self._row32)[0])
+
+    def forecast(self, route, overrides=None):
+        """Prediction for one route with its current and implied TCE"""
+        change = self.predict(route, overrides)
+        current_tce = float(self.current_tce[self.route_index[route]])
+        return {
+            "route": route,
+            "predicted_change": change,
+            "current_tce": None if np.isnan(current_tce) else current_tce,
+            "predicted_tce": None if np.isnan(current_tce) else current_tce + change,
+            "model_version": self.model_version
+        }
+
+def get_inference_session(registry, snapshot_path, model_name="maritime_xgb"):
+    """
+    Shared session for the current model version and snapshot, rebuilt only when either changes
+
+    Returns:
+        RouteInferenceSession, or None if no model or snapshot is available
+    """
+    version = registry.current_version(model_name)
+    if version is None or not os.path.exists(snapshot_path):
+        return None
+
+    key = (os.path.abspath(registry.root_dir), model_name, version,
+           os.path.abspath(snapshot_path), os.stat(snapshot_path).st_mtime_ns)
+    with _lock:
+        if key not in _sessions:
+            _sessions.clear()
+            _sessions[key] = RouteInferenceSession.from_registry(registry, snapshot_path, model_name)
+            logger.info(f"✅ Inference session ready for {len(_sessions[key].routes)} routes (model {version})")
+        return _sessions[key]
@@ -0,0 +1,180 @@
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import xgboost as xgb
+
+logger = logging.getLogger("BootstrapIntervals")
+
+def _residuals_path(member_path):
+    """Out-of-bag residuals saved next to an ensemble member"""
+    return member_path[:-len(".json")] + "_oob.npy"
+
+def _fit_member(job):
+    """Process-pool entry point: fit one ensemble member on a bootstrap resample"""
+    X = np.load(job["X_path"], mmap_mode="r")
+    y = np.load(job["y_path"], mmap_mode="r")
+
+    rng = np.random.default_rng(job["seed"])
+    sample = np.sort(rng.integers(0, len(y), len(y)))
+    out_of_bag = np.ones(len(y), dtype=bool)
+    out_of_bag[sample] = False
+
+    model = xgb.XGBRegressor(**job["params"], n_jobs=1, random_state=job["seed"])
+    model.fit(X[sample], y[sample])
+
+    # Errors on the rows this member never saw, kept with the member for the noise term
+    residuals = y[out_of_bag] - model.predict(X[out_of_bag]) if out_of_bag.any() else np.empty(0, dtype="float32")
+    np.save(_residuals_path(job["path"]), residuals.astype("float32"))
+    model.save_model(job["path"])
+    return job["path"]
+
+class BootstrapIntervals:
+    """
+    Per-route prediction intervals from a bootstrap ensemble.
+
+    n_members models are fitted in a process pool, each on a resample of the
+    training rows drawn with replacement. The spread of their predictions only
+    measures estimation variance, so each member also scores the rows left
+    out of its resample, and quantiles of those pooled out-of-bag residuals
+    are added as the noise term: every member's prediction is shifted by
+    every residual quantile and the bounds are taken down each column of the
+    resulting matrix in a single np.quantile call. Members are cached on disk
+    by a hash of the data, parameters and seed, and kept loaded in memory, so
+    predicting costs one batched predict per member.
+    """
+    def __init__(self, model_params, cache_dir="models/ensemble", n_members=20, coverage=0.95,
+                 max_workers=None, random_state=42, n_residual_quantiles=99):
+        self.model_params = dict(model_params)
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "ensemble.json")
+        self.n_members = n_members
+        self.coverage = coverage
+        self.max_workers = max_workers
+        self.random_state = random_state
+        self.n_residual_quantiles = n_residual_quantiles
+        self.members = None
+        self.feature_columns = None
+        self.residual_quantiles = None
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _member_path(self, data_hash, seed):
+        key = hashlib.sha256(
+            f"{json.dumps(self.model_params, sort_keys=True)}:{data_hash}:{seed}".encode()
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"member_{key[:16]}.json")
+
+    def fit(self, X, y):
+        """
+        Fit (or reuse) the ensemble members for a training set
+
+        Args:
+            X: Feature DataFrame without id columns
+            y: Target aligned with X; rows with a missing target are dropped
+        """
+        y = np.asarray(y, dtype="float32")
+        known = ~np.isnan(y)
+        X_values = X.to_numpy(dtype="float32")[known]
+        y = y[known]
+
+        digest = hashlib.sha256(json.dumps(list(X.columns)).encode())
+        for array in (X_values, y):
+            digest.update(str(array.shape).encode())
+            digest.update(array.tobytes())
+        data_hash = digest.hexdigest()
+
+        seeds = [self.random_state + i for i in range(self.n_members)]
+        paths = [self._member_path(data_hash, seed) for seed in seeds]
+        pending = [(seed, path) for seed, path in zip(seeds, paths)
+                   if not (os.path.exists(path) and os.path.exists(_residuals_path(path)))]
+
+        if pending:
+            # Workers memory-map the training set instead of receiving a pickled copy
+            X_path = os.path.join(self.cache_dir, "train_X.npy")
+            y_path = os.path.join(self.cache_dir, "train_y.npy")
+            np.save(X_path, X_values)
+            np.save(y_path, y)
+            jobs = [{"X_path": X_path, "y_path": y_path, "params": self.model_params, "seed": seed, "path": path}
+                    for seed, path in pending]
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    list(executor.map(_fit_member, jobs))
+            finally:
+                os.remove(X_path)
+                os.remove(y_path)
+
+        logger.info(f"✅ Interval ensemble: {len(pending)} members trained, {len(paths) - len(pending)} cached")
+
+        residuals = np.concatenate([np.load(_residuals_path(p)) for p in paths])
+        levels = np.linspace(0, 1, self.n_residual_quantiles + 2)[1:-1]
+        residual_quantiles = np.quantile(residuals, levels) if len(residuals) else np.zeros(1)
+
+        manifest = {"feature_columns": list(X.columns), "members": [os.path.basename(p) for p in paths],
+                    "coverage": self.coverage, "residual_quantiles": residual_quantiles.astype(float).tolist()}
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+        self._prune(paths)
+        self.members = None
+        return self.load()
+
+    def load(self):
+        """Load the members named by the manifest, once"""
+        if self.members is not None:
+            return True
+        if not os.path.exists(self.manifest_path):
+            return False
+
+        with open(self.manifest_path, "r") as f:
+            manifest = json.load(f)
+
+        if "residual_quantiles" not in manifest:
+            logger.warning("Ensemble predates out-of-bag residuals, intervals unavailable until it is refitted")
+            return False
+
+        members = []
+        for name in manifest["members"]:
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.exists(path):
+                logger.warning(f"Ensemble member {name} is missing, intervals unavailable")
+                return False
+            booster = xgb.Booster()
+            booster.load_model(path)
+            members.append(booster)
+
+        self.members = members
+        self.feature_columns = manifest["feature_columns"]
+        self.coverage = manifest.get("coverage", self.coverage)
+        self.residual_quantiles = np.asarray(manifest["residual_quantiles"], dtype="float32")
+        return True
+
+    def predict(self, X):
+        """
+        Lower and upper interval bounds for each row
+
+        Returns:
+            Tuple of (lower, upper) arrays, or None if no ensemble is available
+        """
+        if not self.load():
+            return None
+
+        X_values = X.reindex(columns=self.feature_columns, fill_value=0).to_numpy(dtype="float32")
+        stacked = np.vstack([member.inplace_predict(X_values) for member in self.members])
+        # members × residual quantiles draws per row: estimation spread plus noise
+        draws = (stacked[:, None, :] + self.residual_quantiles[None, :, None]).reshape(-1, len(X_values))
+
+        tail = (1 - self.coverage) / 2
+        lower, upper = np.quantile(draws, [tail, 1 - tail], axis=0)
+        return lower, upper
+
+    def _prune(self, keep):
+        """Remove cached members that belong to older training sets"""
+        keep = {os.path.basename(name) for p in keep for name in (p, _residuals_path(p))}
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("member_") and name not in keep:
+                os.remove(os.path.join(self.cache_dir, name))
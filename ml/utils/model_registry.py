@@ -0,0 +1,204 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger("ModelRegistry")
+
+# Objects loaded from the registry, shared by everything in this process
+_loaded = {}
+_lock = threading.Lock()
+
+def sha256_file(path):
+    """Content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ModelRegistry:
+    """
+    Versioned store for trained models.
+
+    Each published version is an immutable directory root/<name>/<version>/
+    holding the artifacts and a manifest.json with a sha256 per artifact.
+    root/<name>/CURRENT names the version in use and is swapped with
+    os.replace, so readers never see a half-written model. load() is lazy and
+    memoized per process, so the pipeline, API server and dashboard each read
+    a version from disk at most once.
+    """
+    def __init__(self, root_dir="models/registry", keep_versions=10):
+        self.root_dir = root_dir
+        self.keep_versions = keep_versions
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _model_dir(self, name):
+        return os.path.join(self.root_dir, name)
+
+    def _pointer_path(self, name):
+        return os.path.join(self._model_dir(name), "CURRENT")
+
+    def names(self):
+        """Names of the models with at least one published version"""
+        return sorted(
+            entry for entry in os.listdir(self.root_dir)
+            if os.path.isdir(os.path.join(self.root_dir, entry)) and self.versions(entry)
+        )
+
+    def versions(self, name):
+        """Published versions of a model, oldest first"""
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        return sorted(
+            entry for entry in os.listdir(model_dir)
+            if not entry.startswith(".") and os.path.exists(os.path.join(model_dir, entry, "manifest.json"))
+        )
+
+    def current_version(self, name):
+        """Version the CURRENT pointer names, or None"""
+        pointer = self._pointer_path(name)
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer, "r") as f:
+            return f.read().strip() or None
+
+    def manifest(self, name, version=None):
+        """Manifest of a version (the current one by default), or None"""
+        version = version or self.current_version(name)
+        if version is None:
+            return None
+        manifest_path = os.path.join(self._model_dir(name), version, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+
+    def artifact_paths(self, name, version=None):
+        """Mapping of artifact name to path for a version"""
+        manifest = self.manifest(name, version)
+        if manifest is None:
+            return None
+        version_dir = os.path.join(self._model_dir(name), manifest["version"])
+        return {artifact: os.path.join(version_dir, artifact) for artifact in manifest["artifacts"]}
+
+    def publish(self, name, artifacts, metadata=None, promote=True):
+        """
+        Copy artifact files into a new immutable version
+
+        Args:
+            name: Model name, e.g. "maritime_xgb"
+            artifacts: Mapping of artifact file name to source path
+            metadata: JSON-serializable details stored in the manifest
+            promote: Point CURRENT at the new version
+
+        Returns:
+            The new version string
+        """
+        hashes = {artifact: sha256_file(path) for artifact, path in artifacts.items()}
+        content_hash = hashlib.sha256(json.dumps(hashes, sort_keys=True).encode()).hexdigest()
+        version = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{content_hash[:8]}"
+
+        model_dir = self._model_dir(name)
+        version_dir = os.path.join(model_dir, version)
+        if os.path.exists(version_dir):
+            # Identical artifacts published within the same second
+            if promote:
+                self.promote(name, version)
+            return version
+
+        # Build the version in a hidden directory, then move it into place in one step
+        staging_dir = os.path.join(model_dir, f".staging-{version}")
+        os.makedirs(staging_dir, exist_ok=True)
+        for artifact, path in artifacts.items():
+            shutil.copy2(path, os.path.join(staging_dir, artifact))
+
+        manifest = {
+            "name": name,
+            "version": version,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "artifacts": {
+                artifact: {"sha256": hashes[artifact], "size": os.path.getsize(path)}
+                for artifact, path in artifacts.items()
+            },
+            "metadata": metadata or {}
+        }
+        with open(os.path.join(staging_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(staging_dir, version_dir)
+
+        logger.info(f"✅ Published {name} version {version}")
+        if promote:
+            self.promote(name, version)
+        self._prune(name)
+        return version
+
+    def promote(self, name, version):
+        """Atomically point CURRENT at a published version"""
+        if self.manifest(name, version) is None:
+            raise ValueError(f"Unknown version {version} of model {name}")
+
+        pointer = self._pointer_path(name)
+        tmp_path = pointer + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, pointer)
+        logger.info(f"{name} CURRENT -> {version}")
+
+    def verify(self, name, version=None):
+        """Check every artifact of a version against its manifest hash"""
+        manifest = self.manifest(name, version)
+        if manifest is None:
+            return False
+        paths = self.artifact_paths(name, manifest["version"])
+        return all(
+            os.path.exists(paths[artifact]) and sha256_file(paths[artifact]) == details["sha256"]
+            for artifact, details in manifest["artifacts"].items()
+        )
+
+    def load(self, name, loader, version=None):
+        """
+        Load a version (the current one by default) once per process
+
+        Args:
+            loader: Function taking the artifact path mapping and returning the loaded object.
+                The memo is keyed on the function object, so pass a module-level
+                function rather than a lambda built per call.
+
+        Returns:
+            The loaded object, or None if nothing is published
+        """
+        version = version or self.current_version(name)
+        if version is None:
+            return None
+
+        # Different consumers may load the same version into different objects
+        key = (os.path.abspath(self.root_dir), name, version, loader)
+        with _lock:
+            if key not in _loaded:
+                if not self.verify(name, version):
+                    raise ValueError(f"Artifacts of {name} version {version} do not match their manifest")
+                _loaded[key] = loader(self.artifact_paths(name, version))
+                logger.info(f"Loaded {name} version {version}")
+            return _loaded[key]
+
+    @staticmethod
+    def load_file(path, loader):
+        """Memoized load of a loose model file, reloaded only when the file changes"""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with _lock:
+            if key not in _loaded:
+                _loaded[key] = loader(path)
+            return _loaded[key]
+
+    def _prune(self, name):
+        """Remove the oldest versions beyond keep_versions, never the current one"""
+        current = self.current_version(name)
+        stale = [v for v in self.versions(name) if v != current][:-self.keep_versions or None]
+        for version in stale:
+            shutil.rmtree(os.path.join(self._model_dir(name), version), ignore_errors=True)
@@ -1,16 +1,27 @@
 import os
+import itertools
 import numpy as np
 import pandas as pd
 import xgboost as xgb
 from datetime import datetime, timedelta
 import joblib
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import logging
+from data.alignment import TimeSeriesAligner
+from data.macro_store import MacroHistoryStore
+from data.freight_store import FreightHistoryStore
+from data.route_registry import get_route_registry
+from utils.feature_store import FeatureStore, file_signature
+from utils.backtest import WalkForwardBacktester
+from utils.tuning import HyperparameterSearch
+from utils.model_registry import ModelRegistry
+from utils.segments import SegmentTrainer
+from utils.intervals import BootstrapIntervals
+from utils.inference import save_snapshot, get_inference_session
+from utils.chart_stage import PredictionChartStage
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +34,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger("MaritimeMLEngine")
 
+# Identify a feature row; everything else in the feature frame is a model input
+ID_COLUMNS = ["Route", "Date"]
+
+# Look-back windows (days) and decay half-life for route sentiment features
+SENTIMENT_WINDOWS = [1, 3, 7, 14, 30]
+SENTIMENT_HALFLIFE = 7
+
+# Drivers reported per route
+TOP_DRIVERS = 3
+
+# Market symbols turned into price, YTD change and volatility features
+KEY_MARKET_SYMBOLS = ['FRO', 'GLNG', 'TK', 'CL=F', 'BZ=F', 'STNG', 'GC=F', 'SI=F']
+
+# Scenario grid key that shifts every sentiment mean feature
+SCENARIO_SENTIMENT_KEY = "sentiment"
+
+# XGBoost settings shared by training and backtesting
+DEFAULT_MODEL_PARAMS = {
+    "objective": "reg:squarederror",
+    "n_estimators": 100,
+    "max_depth": 3,
+    "learning_rate": 0.1,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8
+}
+
+# Registry name and artifact files of the freight model
+MODEL_NAME = "maritime_xgb"
+MODEL_ARTIFACTS = ["maritime_xgb_model.json", "feature_scaler.pkl", "feature_importance.json",
+                   "training_metrics.json", "available_features.json"]
+
+def load_model_bundle(paths):
+    """Read the freight model artifacts into memory"""
+    model = xgb.XGBRegressor()
+    model.load_model(paths["maritime_xgb_model.json"])
+    
+    bundle = {"model": model, "scaler": joblib.load(paths["feature_scaler.pkl"])}
+    for key, name in [("feature_importance", "feature_importance.json"),
+                      ("train_metrics", "training_metrics.json"),
+                      ("available_features", "available_features.json")]:
+        with open(paths[name], "r") as f:
+            bundle[key] = json.load(f)
+    return bundle
+
 class MaritimeMLEngine:
     """
     ML prediction engine for maritime shipping rates and market trends.
@@ -42,16 +97,84 @@ class MaritimeMLEngine:
         self.scaler = None
         self.train_metrics = None
         self.available_features = []
+        self.model_params = dict(DEFAULT_MODEL_PARAMS)
+        
+        # Use tuned settings from a previous search when available
+        best_params = HyperparameterSearch.load_best_params(models_dir)
+        if best_params:
+            self.model_params.update(best_params)
+        self.routes = get_route_registry()
+        self.feature_store = FeatureStore(os.path.join(data_dir, "feature_cache"))
+        self._loaded_data = None
+        self.model_registry = ModelRegistry(os.path.join(models_dir, "registry"))
+        self.model_version = None
+        self.segment_models = {}
+        self.drivers = None
+        self.intervals = BootstrapIntervals(self.model_params, os.path.join(models_dir, "ensemble"))
+        self.segment_intervals = {}
+        
+    def input_files(self):
+        """Every file load_data reads, including store partitions"""
+        paths = [
+            os.path.join(self.data_dir, name)
+            for name in ["freight_rates.csv", "maritime_data_2025.csv", "news_sentiment.csv",
+                         "combined_indicators.csv", "aligned_panel.csv", "market_metrics.csv",
+                         "market_volatility.csv", "market_beta_history.csv"]
+        ]
+        for store_dir in ["freight_history", "macro_history"]:
+            for root, _, files in sorted(os.walk(os.path.join(self.data_dir, store_dir))):
+                paths.extend(os.path.join(root, name) for name in sorted(files) if ".tmp" not in name)
+        return paths
         
     def load_data(self):
+        """Load all modeling inputs, reusing the previous load while no input file changed"""
+        signature = file_signature(self.input_files())
+        if self._loaded_data is not None and self._loaded_data[0] == signature:
+            return self._loaded_data[1]
+            
+        data_dict = self.read_data()
+        if data_dict is not None:
+            self._loaded_data = (signature, data_dict)
+        return data_dict
+        
+    def load_features(self):
+        """
+        Load inputs and their prepared features through the feature store
+        
+        Returns:
+            Tuple of (data dictionary, features, target)
+        """
+        data_dict = self.load_data()
+        if data_dict is None:
+            return None, None, None
+            
+        key = self.feature_store.key(self.input_files())
+        cached = self.feature_store.get(key)
+        if cached is not None:
+            features, target = cached
+            self.available_features = [c for c in features.columns if c not in ID_COLUMNS]
+            logger.info("Features served from the feature store")
+            return data_dict, features, target
+            
+        features, target = self.prepare_features(data_dict)
+        if features is not None:
+            self.feature_store.put(key, features, target)
+        return data_dict, features, target
+        
+    def read_data(self):
         """Load and merge all necessary data for modeling"""
-        # Load freight rates
+        # Load freight rates, falling back to the latest rows of the freight history
+        freight_history = FreightHistoryStore(os.path.join(self.data_dir, "freight_history"))
+        freight_history_df = freight_history.read()
+        
         freight_path = os.path.join(self.data_dir, "freight_rates.csv")
-        if not os.path.exists(freight_path):
+        if os.path.exists(freight_path):
+            freight_df = pd.read_csv(freight_path)
+        elif freight_history_df is not None:
+            freight_df = freight_history.latest()
+        else:
             logger.error(f"Freight data file not found: {freight_path}")
             return None
-            
-        freight_df = pd.read_csv(freight_path)
         
         # Load market data
         market_path = os.path.join(self.data_dir, "maritime_data_2025.csv")
@@ -61,6 +184,15 @@ class MaritimeMLEngine:
         else:
             market_df = pd.read_csv(market_path)
             
+        # Load the collector's market metrics (per-symbol summary, volatility and beta history)
+        market_metrics = {}
+        for key, name, index_col in [("summary", "market_metrics.csv", "Symbol"),
+                                     ("volatility", "market_volatility.csv", "Date"),
+                                     ("betas", "market_beta_history.csv", "Date")]:
+            path = os.path.join(self.data_dir, name)
+            if os.path.exists(path):
+                market_metrics[key] = pd.read_csv(path, index_col=index_col)
+            
         # Load news sentiment data
         news_path = os.path.join(self.data_dir, "news_sentiment.csv")
         if not os.path.exists(news_path):
@@ -69,33 +201,260 @@ class MaritimeMLEngine:
         else:
             news_df = pd.read_csv(news_path)
             
-        # Load macro indicators if available
-        indicators_path = os.path.join(self.data_dir, "combined_indicators.csv")
-        if not os.path.exists(indicators_path):
-            logger.warning(f"Indicators file not found: {indicators_path}")
-            indicators_df = None
+        # Load macro indicators if available, preferring the full-history store
+        indicators_df = MacroHistoryStore(os.path.join(self.data_dir, "macro_history")).read_long()
+        if indicators_df is None:
+            indicators_path = os.path.join(self.data_dir, "combined_indicators.csv")
+            if not os.path.exists(indicators_path):
+                logger.warning(f"Indicators file not found: {indicators_path}")
+            else:
+                indicators_df = pd.read_csv(indicators_path)
+            
+        # Load the aligned time-series panel if available
+        panel_path = os.path.join(self.data_dir, "aligned_panel.csv")
+        if not os.path.exists(panel_path):
+            logger.warning(f"Aligned panel not found: {panel_path}")
+            panel_df = None
         else:
-            indicators_df = pd.read_csv(indicators_path)
+            panel_df = TimeSeriesAligner.load_panel(panel_path)
         
         return {
             "freight": freight_df,
+            "freight_history": freight_history_df,
             "market": market_df,
+            "market_metrics": market_metrics,
             "news": news_df,
-            "indicators": indicators_df
+            "indicators": indicators_df,
+            "panel": panel_df
         }
     
+    def freight_observations(self, data_dict):
+        """Dated freight rows to build features for: the full history when recorded, else the snapshot"""
+        history = data_dict.get("freight_history")
+        freight_df = history if history is not None and not history.empty else data_dict["freight"]
+        freight_df = freight_df.reset_index(drop=True)
+        
+        if "Date" in freight_df.columns:
+            dates = freight_df["Date"]
+        elif "ProcessedDate" in freight_df.columns:
+            dates = freight_df["ProcessedDate"]
+        else:
+            dates = pd.Series(datetime.now().date(), index=freight_df.index)
+            
+        return freight_df.assign(Date=pd.to_datetime(dates).dt.normalize())
+    
+    def rolling_sentiment_features(self, news_df, observations):
+        """
+        Windowed sentiment features per route, as of each observation date
+        
+        Articles are binned into a dense route x day array once; window sums then
+        come from cumulative sums, and decayed sentiment from an exponentially
+        weighted pass over the daily totals. An observation on day D only sees
+        articles published before D.
+        
+        Args:
+            news_df: Articles with clean_topic, date and sentiment_score columns
+            observations: DataFrame with Route and Date columns
+            
+        Returns:
+            DataFrame of sentiment features aligned with observations
+        """
+        routes = pd.Index(observations["Route"].unique())
+        article_routes = routes.get_indexer(news_df["clean_topic"])
+        
+        # Only parse dates of articles tagged with one of the observed routes
+        tagged = news_df.loc[article_routes >= 0]
+        articles = pd.DataFrame({
+            "route": article_routes[article_routes >= 0],
+            "day": pd.to_datetime(tagged["date"], utc=True, errors="coerce").dt.tz_localize(None).dt.normalize().to_numpy(),
+            "score": pd.to_numeric(tagged["sentiment_score"], errors="coerce").to_numpy()
+        }).dropna()
+        
+        # Day index of the last day each observation may use
+        as_of = observations["Date"] - pd.Timedelta(days=1)
+        start = min(articles["day"].min(), as_of.min()) if not articles.empty else as_of.min()
+        calendar = pd.date_range(start, as_of.max(), freq="D")
+        articles = articles[articles["day"] <= calendar[-1]]
+        
+        # Daily count, score sum, positive and negative counts per route
+        cells = articles["route"].to_numpy(dtype=int) * len(calendar) + calendar.get_indexer(articles["day"])
+        scores = articles["score"].to_numpy()
+        size = len(routes) * len(calendar)
+        daily = np.stack([
+            np.bincount(cells, minlength=size),
+            np.bincount(cells, weights=scores, minlength=size),
+            np.bincount(cells, weights=scores > 0.1, minlength=size),
+            np.bincount(cells, weights=scores < -0.1, minlength=size)
+        ]).reshape(4, len(routes), len(calendar))
+        
+        cumulative = np.concatenate([np.zeros((4, len(routes), 1)), daily.cumsum(axis=2)], axis=2)
+        route_idx = routes.get_indexer(observations["Route"])
+        day_idx = calendar.get_indexer(as_of)
+        
+        features = {}
+        for window in SENTIMENT_WINDOWS:
+            lower = np.maximum(day_idx + 1 - window, 0)
+            count, total, positive, negative = cumulative[:, route_idx, day_idx + 1] - cumulative[:, route_idx, lower]
+            has_news = count > 0
+            safe_count = np.where(has_news, count, 1)
+            features[f"sentiment_mean_{window}d"] = np.where(has_news, total / safe_count, 0.0)
+            features[f"news_volume_{window}d"] = count
+            features[f"pos_ratio_{window}d"] = np.where(has_news, positive / safe_count, 0.0)
+            features[f"neg_ratio_{window}d"] = np.where(has_news, negative / safe_count, 0.0)
+            
+        # Decayed average sentiment: EWM of daily score sums over EWM of daily counts
+        decayed_count = pd.DataFrame(daily[0].T).ewm(halflife=SENTIMENT_HALFLIFE, adjust=False).mean().to_numpy()
+        decayed_total = pd.DataFrame(daily[1].T).ewm(halflife=SENTIMENT_HALFLIFE, adjust=False).mean().to_numpy()
+        decayed_count = decayed_count[day_idx, route_idx]
+        features["sentiment_ewm"] = np.where(
+            decayed_count > 0,
+            decayed_total[day_idx, route_idx] / np.where(decayed_count > 0, decayed_count, 1),
+            0.0
+        )
+        
+        return pd.DataFrame(features, index=observations.index)
+    
+    @staticmethod
+    def asof_values(long_df, dates):
+        """
+        Value of every series as of the day before each date
+        
+        Args:
+            long_df: Records with date, series and value columns
+            dates: Observation dates
+            
+        Returns:
+            DataFrame with one column per series, aligned with dates (NaN before a series starts)
+        """
+        wide = (long_df.dropna(subset=["date", "value"])
+                .pivot_table(index="date", columns="series", values="value", aggfunc="last")
+                .sort_index()
+                .ffill())
+        
+        cutoffs = (pd.to_datetime(dates) - pd.Timedelta(days=1)).to_numpy()
+        pos = wide.index.searchsorted(cutoffs, side="right") - 1
+        values = wide.to_numpy(dtype="float64")[np.maximum(pos, 0)]
+        values[pos < 0] = np.nan
+        return pd.DataFrame(values, columns=wide.columns, index=dates.index)
+    
+    @staticmethod
+    def yearly_baselines(market_df, long_df):
+        """
+        Average close per symbol and calendar year
+        
+        The market file only holds year-to-date rows, so the previous years'
+        averages come from the collector's last_year_avg and year_before_avg
+        columns, anchored on the collection year. Years covered by the price
+        history itself fill in the rest.
+        
+        Returns:
+            Series indexed by (symbol, year)
+        """
+        history = long_df.dropna().groupby(["series", long_df["date"].dt.year])["value"].mean()
+        history.index.names = ["series", "year"]
+        
+        collected = pd.NaT
+        if "DataCollectionDate" in market_df.columns:
+            collected = pd.to_datetime(market_df["DataCollectionDate"], errors="coerce").max()
+        collection_year = (long_df["date"].max() if pd.isna(collected) else collected).year
+        
+        collector = []
+        for column, years_back in [("last_year_avg", 1), ("year_before_avg", 2)]:
+            if column in market_df.columns:
+                averages = pd.to_numeric(market_df[column], errors="coerce").groupby(
+                    market_df["Symbol"].astype(str)).last().dropna()
+                collector.append(pd.Series(
+                    averages.to_numpy(),
+                    index=pd.MultiIndex.from_arrays(
+                        [averages.index, np.full(len(averages), collection_year - years_back)],
+                        names=["series", "year"])
+                ))
+        
+        # Averages over a full fetched year win over a partial year of history
+        baselines = pd.concat(collector) if collector else pd.Series(dtype="float64")
+        return baselines.combine_first(history).sort_index()
+    
+    def market_features(self, market_df, dates):
+        """As-of closes for the key symbols and their change against the previous year's average"""
+        symbol_data = market_df[market_df["Symbol"].isin(KEY_MARKET_SYMBOLS)]
+        if symbol_data.empty:
+            return {}
+            
+        long_df = TimeSeriesAligner().market_to_long(symbol_data)
+        closes = self.asof_values(long_df, dates)
+        available_symbols = [s for s in KEY_MARKET_SYMBOLS if s in closes.columns]
+        
+        market_features = {f"{symbol}_price": closes[symbol] for symbol in available_symbols}
+        
+        # YTD change as the collector defines it (latest close vs last year's average), per row
+        if "YTD_Change_Pct" in market_df.columns:
+            baselines = self.yearly_baselines(symbol_data, long_df)
+            previous_year = pd.to_datetime(dates).dt.year - 1
+            for symbol in available_symbols:
+                if symbol not in baselines.index.get_level_values(0):
+                    continue
+                ytd_change = (closes[symbol] / previous_year.map(baselines[symbol]) - 1) * 100
+                # Rows before the market history starts have nothing to compare
+                if ytd_change.notna().any():
+                    market_features[f"{symbol}_ytd_change"] = ytd_change
+                
+        return market_features
+    
+    def market_risk_features(self, market_metrics, dates):
+        """As-of rolling volatility of the key symbols and the average tanker beta to each crude benchmark"""
+        risk_features = {}
+        volatility_df = market_metrics.get("volatility")
+        if volatility_df is not None:
+            symbols = [s for s in KEY_MARKET_SYMBOLS if s in volatility_df.columns]
+            values = self.asof_values(self.wide_to_long(volatility_df[symbols]), dates)
+            risk_features.update({f"{symbol}_volatility": values[symbol] for symbol in values.columns})
+            
+        beta_df = market_metrics.get("betas")
+        if beta_df is not None and not beta_df.empty:
+            # Columns are "tanker/crude" pairs; average the tankers for each benchmark
+            crudes = beta_df.columns.str.split("/").str[-1]
+            mean_betas = beta_df.T.groupby(crudes).mean().T
+            values = self.asof_values(self.wide_to_long(mean_betas), dates)
+            risk_features.update({f"tanker_beta_{crude}": values[crude] for crude in values.columns})
+            
+        return risk_features
+    
+    @staticmethod
+    def wide_to_long(wide_df):
+        """Long date/series/value records from a Date-indexed frame with one column per series"""
+        long_df = wide_df.rename_axis("date").reset_index().melt(id_vars="date", var_name="series", value_name="value")
+        long_df["date"] = pd.to_datetime(long_df["date"])
+        return long_df
+    
+    def indicator_features(self, indicators_df, panel_df, dates):
+        """As-of macro indicator values, preferring the aligned panel's series where it has them"""
+        aligner = TimeSeriesAligner()
+        long_df = aligner.indicators_to_long(indicators_df).dropna(subset=["date"])
+        
+        # The aligned panel applies each indicator's fill rules, so use its series when present
+        if panel_df is not None and not panel_df.empty:
+            panel_metrics = [m for m in long_df["series"].unique() if m in panel_df.columns]
+            if panel_metrics:
+                panel_long = self.wide_to_long(panel_df[panel_metrics])
+                long_df = pd.concat([long_df[~long_df["series"].isin(panel_metrics)], panel_long],
+                                    ignore_index=True)
+        
+        values = self.asof_values(long_df, dates)
+        return {metric.lower().replace(" ", "_"): values[metric] for metric in values.columns}
+    
     def prepare_features(self, data_dict):
-        """Prepare features for model training"""
+        """Prepare one feature row per dated freight observation"""
         if data_dict is None or "freight" not in data_dict:
             logger.error("Invalid data dictionary provided")
             return None, None
             
-        freight_df = data_dict["freight"]
+        freight_df = self.freight_observations(data_dict)
         
         # Initialize feature DataFrame with route info
         features_df = pd.DataFrame({
             "Route": freight_df["Route"],
-            "RouteType": freight_df["Route"].str.slice(0, 2)  # TC or TD
+            "Date": freight_df["Date"],
+            "RouteType": freight_df["Route"].map(self.routes.route_types()).fillna(freight_df["Route"].str.slice(0, 2))  # TC or TD
         })
         
         # Add one-hot encoding for route types
@@ -121,93 +480,26 @@ class MaritimeMLEngine:
             news_df = data_dict["news"]
             
             # Check if the news data has the needed columns
-            if "clean_topic" in news_df.columns and "sentiment_score" in news_df.columns:
-                # Calculate sentiment metrics per route
-                sentiment_metrics = {}
-                
-                for route in freight_df["Route"]:
-                    route_news = news_df[news_df["clean_topic"] == route]
-                    
-                    if len(route_news) > 0:
-                        metrics = {
-                            f"{route}_avg_sentiment": route_news["sentiment_score"].mean(),
-                            f"{route}_pos_news_count": (route_news["sentiment_score"] > 0.1).sum(),
-                            f"{route}_neg_news_count": (route_news["sentiment_score"] < -0.1).sum(),
-                            f"{route}_news_count": len(route_news)
-                        }
-                    else:
-                        metrics = {
-                            f"{route}_avg_sentiment": 0,
-                            f"{route}_pos_news_count": 0,
-                            f"{route}_neg_news_count": 0,
-                            f"{route}_news_count": 0
-                        }
-                        
-                    sentiment_metrics[route] = metrics
-                
-                # Add to features DataFrame
-                for route, metrics in sentiment_metrics.items():
-                    route_mask = features_df["Route"] == route
-                    for metric_name, value in metrics.items():
-                        # Use generic column names instead of route-specific
-                        generic_name = metric_name.split("_", 1)[1]  # Remove route prefix
-                        features_df.loc[route_mask, generic_name] = value
-        
-        # Process market data if available
+            if {"clean_topic", "date", "sentiment_score"}.issubset(news_df.columns):
+                features_df = features_df.join(self.rolling_sentiment_features(news_df, features_df))
+        
+        # Market and macro values as of the day before each observation, like the sentiment features
         if "market" in data_dict and data_dict["market"] is not None:
-            market_df = data_dict["market"]
-            
-            # Extract latest market values for key symbols
-            key_symbols = ['FRO', 'GLNG', 'TK', 'CL=F', 'BZ=F', 'STNG', 'GC=F', 'SI=F']
-            available_symbols = [s for s in key_symbols if s in market_df["Symbol"].unique()]
-            
-            if available_symbols:
-                # Get latest close prices
-                latest_prices = {}
-                for symbol in available_symbols:
-                    symbol_data = market_df[market_df["Symbol"] == symbol]
-                    if not symbol_data.empty:
-                        latest_date = symbol_data["Date"].max()
-                        latest_price = symbol_data[symbol_data["Date"] == latest_date]["Close"].values[0]
-                        latest_prices[symbol] = latest_price
-                
-                # Add market data as global features (same for all routes)
-                for symbol, price in latest_prices.items():
-                    features_df[f"{symbol}_price"] = price
-            
-            # Add YTD changes if available
-            if "YTD_Change_Pct" in market_df.columns:
-                for symbol in available_symbols:
-                    symbol_data = market_df[market_df["Symbol"] == symbol]
-                    if not symbol_data.empty and not symbol_data["YTD_Change_Pct"].isna().all():
-                        ytd_change = symbol_data["YTD_Change_Pct"].iloc[0]
-                        features_df[f"{symbol}_ytd_change"] = ytd_change
-        
-        # Process macro indicators if available
-        if "indicators" in data_dict and data_dict["indicators"] is not None:
-            indicators_df = data_dict["indicators"]
-            
-            # Get latest values for each indicator
-            if not indicators_df.empty:
-                latest_indicators = {}
-                
-                for metric in indicators_df["metric"].unique():
-                    metric_data = indicators_df[indicators_df["metric"] == metric]
-                    if not metric_data.empty:
-                        latest_date = metric_data["date"].max()
-                        latest_value = metric_data[metric_data["date"] == latest_date]["value"].values[0]
-                        latest_indicators[metric] = latest_value
-                
-                # Add indicators as global features
-                for metric, value in latest_indicators.items():
-                    safe_name = metric.lower().replace(" ", "_")
-                    features_df[safe_name] = value
+            features_df = features_df.assign(**self.market_features(data_dict["market"], features_df["Date"]))
+        
+        if data_dict.get("market_metrics"):
+            features_df = features_df.assign(**self.market_risk_features(data_dict["market_metrics"], features_df["Date"]))
+        
+        if "indicators" in data_dict and data_dict["indicators"] is not None and not data_dict["indicators"].empty:
+            features_df = features_df.assign(**self.indicator_features(
+                data_dict["indicators"], data_dict.get("panel"), features_df["Date"]
+            ))
         
         # Target variable is the TCE change
         target = freight_df["Change (TCE)"] if "Change (TCE)" in freight_df.columns else None
         
         # Store available features for later reference
-        self.available_features = list(features_df.columns.drop("Route") if "Route" in features_df.columns else features_df.columns)
+        self.available_features = [c for c in features_df.columns if c not in ID_COLUMNS]
         
         # Return features and target
         return features_df, target
@@ -219,7 +511,7 @@ class MaritimeMLEngine:
             return False
             
         # Split into train and test sets
-        X = features.drop("Route", axis=1) if "Route" in features.columns else features
+        X = features.drop(columns=ID_COLUMNS, errors="ignore")
         y = target
         
         # Handle empty dataset
@@ -237,15 +529,7 @@ class MaritimeMLEngine:
         X_test_scaled = self.scaler.transform(X_test)
         
         # Train XGBoost model
-        self.model = xgb.XGBRegressor(
-            objective='reg:squarederror',
-            n_estimators=100,
-            max_depth=3,
-            learning_rate=0.1,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=random_state
-        )
+        self.model = xgb.XGBRegressor(**self.model_params, random_state=random_state)
         
         self.model.fit(X_train_scaled, y_train)
         
@@ -263,12 +547,16 @@ class MaritimeMLEngine:
             "r2": float(r2),
             "training_date": datetime.now().strftime("%Y-%m-%d"),
             "data_points": len(X),
-            "features": len(X.columns)
+            "features": len(X.columns),
+            "training_mode": "full"
         }
+        if "Date" in features.columns:
+            self.train_metrics["trained_through"] = str(pd.Timestamp(features["Date"].max()).date())
         
         # Get feature importance
         importance = self.model.feature_importances_
-        self.feature_importance = dict(zip(X.columns, importance))
+        self.feature_importance = dict(zip(X.columns, importance.astype(float)))
+        self.available_features = list(X.columns)
         
         # Save model and metadata
         self.save_model()
@@ -276,6 +564,153 @@ class MaritimeMLEngine:
         logger.info(f"Model trained successfully: MAE={mae:.2f}, RMSE={rmse:.2f}, R²={r2:.2f}")
         return True
     
+    def feature_drift(self, X, dates, new_rows):
+        """
+        Largest move of the daily feature means over the new dates, in units of
+        how far those means usually move between consecutive windows of the same
+        length during training
+        
+        Trending or autocorrelated series (prices, TCE, CPI-like indicators)
+        move every week, so a new window is only flagged when it moves further
+        than the training history's own window-to-window changes. Columns that
+        were constant in training, or whose window means never moved, are left
+        out. Returns inf when the history is too short to measure the spread.
+        """
+        varying = self.scaler.var_ > 0
+        daily = pd.DataFrame(np.asarray(X, dtype="float64")[:, varying]).groupby(np.asarray(dates)).mean()
+        new_dates = np.unique(np.asarray(dates)[new_rows])
+        history, recent = daily[daily.index < new_dates.min()], daily[daily.index.isin(new_dates)]
+        
+        window = len(recent)
+        if len(history) < 3 * window:
+            return float("inf")
+            
+        window_means = history.rolling(window).mean()
+        spread = window_means.diff(window).std().to_numpy()
+        shift = np.abs(recent.mean().to_numpy() - window_means.iloc[-1].to_numpy())
+        measurable = np.isfinite(shift) & np.isfinite(spread) & (spread > 0)
+        return float(np.max(shift[measurable] / spread[measurable])) if measurable.any() else 0.0
+    
+    def train_incremental(self, features, target, drift_threshold=3.0, extra_rounds=20):
+        """
+        Continue boosting the saved model on observations newer than its last training run
+        
+        The booster is extended by extra_rounds trees fitted on the new rows
+        only. The scaler stays frozen: the existing trees' split thresholds live
+        in its scaled space, so it is only refitted by a full retrain. Falls back
+        to a full retrain when there is no compatible saved model or when the new
+        rows' feature means move more than drift_threshold times the usual
+        window-to-window change of the training data (see feature_drift).
+        """
+        if features is None or target is None:
+            logger.error("Features or target is None, cannot train model")
+            return False
+            
+        if not self.load_model() or "trained_through" not in (self.train_metrics or {}):
+            logger.info("No incrementally trainable model found, running full training")
+            return self.train_model(features, target)
+            
+        X = features.drop(columns=ID_COLUMNS, errors="ignore")
+        if list(X.columns) != list(self.available_features):
+            logger.info("Feature set changed since the last training run, running full training")
+            return self.train_model(features, target)
+            
+        trained_through = pd.Timestamp(self.train_metrics["trained_through"])
+        new_rows = (features["Date"] > trained_through).to_numpy() & target.notna().to_numpy()
+        if not new_rows.any():
+            logger.info(f"No observations after {trained_through.date()}, model unchanged")
+            return True
+            
+        X_new = X[new_rows].astype("float64")
+        y_new = target[new_rows].to_numpy()
+        
+        drift = self.feature_drift(X, features["Date"].to_numpy(), new_rows)
+        if drift > drift_threshold:
+            logger.info(f"Feature drift {drift:.2f} exceeds {drift_threshold}, running full training")
+            return self.train_model(features, target)
+            
+        # Score the new rows before learning from them: a true out-of-sample check
+        y_pred = self.model.predict(self.scaler.transform(X_new))
+        mae = mean_absolute_error(y_new, y_pred)
+        rmse = np.sqrt(mean_squared_error(y_new, y_pred))
+        r2 = r2_score(y_new, y_pred) if len(y_new) > 1 else float("nan")
+        
+        params = {**self.model_params, "n_estimators": extra_rounds}
+        updated = xgb.XGBRegressor(**params, random_state=42)
+        updated.fit(self.scaler.transform(X_new), y_new, xgb_model=self.model.get_booster())
+        self.model = updated
+        
+        self.train_metrics.update({
+            "mae": float(mae),
+            "rmse": float(rmse),
+            "r2": float(r2),
+            "training_date": datetime.now().strftime("%Y-%m-%d"),
+            "data_points": int(self.train_metrics.get("data_points", 0) + new_rows.sum()),
+            "training_mode": "incremental",
+            "new_observations": int(new_rows.sum()),
+            "feature_drift": drift,
+            "trained_through": str(pd.Timestamp(features["Date"].max()).date())
+        })
+        self.feature_importance = dict(zip(X.columns, self.model.feature_importances_.astype(float)))
+        
+        self.save_model()
+        
+        logger.info(f"Model updated incrementally on {new_rows.sum()} observations: "
+                    f"pre-update MAE={mae:.2f}, RMSE={rmse:.2f}, drift={drift:.2f}")
+        return True
+    
+    def tune_model(self, n_configs=27, max_workers=None):
+        """
+        Search XGBoost settings with successive halving and use the best for training
+        
+        Returns:
+            Dictionary of the selected model parameters, or None
+        """
+        _, features, target = self.load_features()
+        if features is None or target is None:
+            logger.error("Failed to prepare features for tuning")
+            return None
+            
+        search = HyperparameterSearch(output_dir=self.models_dir, n_configs=n_configs, max_workers=max_workers)
+        best_params = search.run(features, target)
+        
+        self.model_params = {**DEFAULT_MODEL_PARAMS, **best_params}
+        logger.info(f"Tuned model parameters: {best_params}")
+        return self.model_params
+    
+    def run_backtest(self, mode="expanding", window=None, horizons=(1, 5), step=5, min_train=60, max_workers=None):
+        """
+        Walk-forward backtest of the current model settings over the freight history
+        
+        Returns:
+            Tuple of (metrics per route and horizon, out-of-sample predictions), or None
+        """
+        _, features, _ = self.load_features()
+        if features is None:
+            logger.error("Failed to prepare features for backtest")
+            return None
+            
+        backtester = WalkForwardBacktester(
+            {**self.model_params, "tree_method": "hist", "n_jobs": 1, "random_state": 42},
+            output_dir=self.results_dir,
+            horizons=horizons,
+            mode=mode,
+            window=window,
+            step=step,
+            min_train=min_train,
+            max_workers=max_workers
+        )
+        metrics, predictions_df = backtester.run(features)
+        if metrics.empty:
+            return None
+            
+        backtester.save(metrics, predictions_df)
+        overall = metrics[metrics["Route"] == "ALL"]
+        for _, row in overall.iterrows():
+            logger.info(f"Backtest horizon {row['Horizon']}: MAE={row['MAE']:.2f}, RMSE={row['RMSE']:.2f}, "
+                        f"direction={row['Directional_Accuracy']:.0%} over {row['Folds']} folds")
+        return metrics, predictions_df
+    
     def save_model(self):
         """Save the trained model and metadata"""
         if self.model is None:
@@ -305,41 +740,35 @@ class MaritimeMLEngine:
         with open(features_path, "w") as f:
             json.dump(self.available_features, f, indent=2)
             
+        # Publish an immutable version and move the CURRENT pointer to it
+        self.model_version = self.model_registry.publish(
+            MODEL_NAME,
+            {os.path.basename(path): path for path in
+             [model_path, scaler_path, importance_path, metrics_path, features_path]},
+            metadata=self.train_metrics
+        )
+            
         logger.info(f"Model and metadata saved to {self.models_dir}")
         return True
     
     def load_model(self):
-        """Load a previously trained model"""
-        model_path = os.path.join(self.models_dir, "maritime_xgb_model.json")
-        scaler_path = os.path.join(self.models_dir, "feature_scaler.pkl")
-        importance_path = os.path.join(self.models_dir, "feature_importance.json")
-        metrics_path = os.path.join(self.models_dir, "training_metrics.json")
-        features_path = os.path.join(self.models_dir, "available_features.json")
-        
-        # Check if all files exist
-        if not all(os.path.exists(p) for p in [model_path, scaler_path, importance_path, metrics_path, features_path]):
-            logger.warning("One or more model files missing, cannot load model")
-            return False
-            
+        """Load the current registered model, falling back to the loose files in models_dir"""
         try:
-            # Load model
-            self.model = xgb.XGBRegressor()
-            self.model.load_model(model_path)
-            
-            # Load scaler
-            self.scaler = joblib.load(scaler_path)
-            
-            # Load feature importance
-            with open(importance_path, "r") as f:
-                self.feature_importance = json.load(f)
+            bundle = self.model_registry.load(MODEL_NAME, load_model_bundle)
+            if bundle is None:
+                paths = {name: os.path.join(self.models_dir, name) for name in MODEL_ARTIFACTS}
+                if not all(os.path.exists(p) for p in paths.values()):
+                    logger.warning("One or more model files missing, cannot load model")
+                    return False
+                bundle = load_model_bundle(paths)
                 
-            # Load training metrics
-            with open(metrics_path, "r") as f:
-                self.train_metrics = json.load(f)
-                
-            # Load available features
-            with open(features_path, "r") as f:
-                self.available_features = json.load(f)
+            # The bundle is shared within the process; keep private copies of mutable metadata
+            self.model = bundle["model"]
+            self.scaler = bundle["scaler"]
+            self.feature_importance = dict(bundle["feature_importance"])
+            self.train_metrics = dict(bundle["train_metrics"])
+            self.available_features = list(bundle["available_features"])
+            self.model_version = self.model_registry.current_version(MODEL_NAME)
                 
             logger.info("Model loaded successfully")
             return True
@@ -348,50 +777,285 @@ class MaritimeMLEngine:
             logger.error(f"Error loading model: {str(e)}")
             return False
     
-    def generate_predictions(self):
+    def train_segments(self, features, target, max_workers=None):
+        """
+        Train independent models for the TD (dirty) and TC (clean) segments in parallel
+        
+        Each segment model is published to the registry as maritime_xgb_<segment>.
+        The combined metrics weight each segment by its number of rows.
+        """
+        if features is None or target is None:
+            logger.error("Features or target is None, cannot train model")
+            return False
+            
+        trainer = SegmentTrainer(self.model_params, os.path.join(self.models_dir, "segments"),
+                                 max_workers=max_workers)
+        segments = trainer.segment_labels(features["Route"], self.routes.route_types())
+        results = trainer.train(features, target, segments, id_columns=ID_COLUMNS)
+        if not results:
+            logger.error("No segment had enough data to train a model")
+            return False
+            
+        for segment, result in results.items():
+            artifacts = {name: os.path.join(result["dir"], name) for name in MODEL_ARTIFACTS}
+            self.model_registry.publish(f"{MODEL_NAME}_{segment}", artifacts, metadata=result["metrics"])
+        self.load_segment_models(results)
+        
+        # Row-weighted summary across segments
+        metrics = {segment: result["metrics"] for segment, result in results.items()}
+        weights = np.array([m["data_points"] for m in metrics.values()], dtype=float)
+        weights /= weights.sum()
+        self.train_metrics = {
+            "mae": float(np.dot(weights, [m["mae"] for m in metrics.values()])),
+            "rmse": float(np.sqrt(np.dot(weights, [m["rmse"] ** 2 for m in metrics.values()]))),
+            "r2": float(np.dot(weights, [m["r2"] for m in metrics.values()])),
+            "training_date": datetime.now().strftime("%Y-%m-%d"),
+            "data_points": int(sum(m["data_points"] for m in metrics.values())),
+            "features": len(features.columns) - len(ID_COLUMNS),
+            "training_mode": "segmented",
+            "segments": metrics
+        }
+        importance = pd.DataFrame([bundle["feature_importance"] for bundle in self.segment_models.values()])
+        self.feature_importance = importance.mul(weights, axis=0).sum().astype(float).to_dict()
+        
+        with open(os.path.join(self.models_dir, "segment_metrics.json"), "w") as f:
+            json.dump(self.train_metrics, f, indent=2)
+            
+        logger.info(f"Segment models trained: {', '.join(sorted(results))}, "
+                    f"MAE={self.train_metrics['mae']:.2f}, R²={self.train_metrics['r2']:.2f}")
+        return True
+    
+    def load_segment_models(self, segments):
+        """
+        Load the current model of each segment that has one published
+        
+        Args:
+            segments: Segment labels, as produced by SegmentTrainer.segment_labels
+        """
+        self.segment_models = {}
+        for segment in sorted(set(segments)):
+            bundle = self.model_registry.load(f"{MODEL_NAME}_{segment}", load_model_bundle)
+            if bundle is not None:
+                self.segment_models[segment] = bundle
+        return bool(self.segment_models)
+    
+    @staticmethod
+    def _scaled_inputs(bundle, features):
+        """Model inputs for feature rows, aligned and scaled for a loaded model bundle"""
+        X = features.drop(columns=ID_COLUMNS, errors="ignore")
+        
+        # Align features with model's expected features, filling missing ones with 0
+        X = X.reindex(columns=bundle["available_features"], fill_value=0)
+        
+        # Segment scalers are fitted on plain arrays, the global one on a frame
+        scaler = bundle["scaler"]
+        X = X if hasattr(scaler, "feature_names_in_") else X.to_numpy(dtype="float64")
+        return scaler.transform(X)
+    
+    @classmethod
+    def _predict_with(cls, bundle, features):
+        """Predict feature rows with a loaded model bundle"""
+        return bundle["model"].predict(cls._scaled_inputs(bundle, features))
+    
+    @classmethod
+    def route_drivers(cls, bundle, features, top_k=TOP_DRIVERS):
+        """
+        Top-k feature contributions behind each route's prediction
+        
+        Contributions come from one batched pred_contribs call (exact TreeSHAP)
+        over all rows; the k largest by magnitude are picked per row with
+        argpartition and then ordered.
+        
+        Returns:
+            DataFrame with Route, Rank, Feature, Value, Contribution and Factor columns
+        """
+        feature_names = np.asarray(bundle["available_features"])
+        X_scaled = cls._scaled_inputs(bundle, features)
+        contribs = bundle["model"].get_booster().predict(xgb.DMatrix(X_scaled), pred_contribs=True)[:, :-1]
+        
+        k = min(top_k, contribs.shape[1])
+        magnitude = np.abs(contribs)
+        top = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        
+        raw = features.reindex(columns=feature_names, fill_value=0).to_numpy(dtype="float64")
+        top_contribs = np.take_along_axis(contribs, top, axis=1).ravel()
+        top_names = feature_names[top].ravel()
+        
+        drivers = pd.DataFrame({
+            "Route": np.repeat(features["Route"].to_numpy(), k),
+            "Rank": np.tile(np.arange(1, k + 1), len(features)),
+            "Feature": top_names,
+            "Value": np.take_along_axis(raw, top, axis=1).ravel(),
+            "Contribution": top_contribs
+        })
+        drivers["Factor"] = [
+            f"{name.replace('_', ' ')} {'lifting' if c > 0 else 'weighing on'} rates ({c:+,.0f} $/day)"
+            for name, c in zip(top_names, top_contribs)
+        ]
+        return drivers
+    
+    def save_route_drivers(self, drivers):
+        """Cache per-route drivers with the prediction run for the report and dashboard"""
+        self.drivers = drivers
+        drivers_path = os.path.join(self.results_dir, "route_drivers.csv")
+        drivers.to_csv(drivers_path, index=False)
+        logger.info(f"Route drivers saved to {drivers_path}")
+        return drivers_path
+    
+    def key_factors(self, route):
+        """Driver descriptions for one route from the latest prediction run"""
+        if self.drivers is None:
+            drivers_path = os.path.join(self.results_dir, "route_drivers.csv")
+            if not os.path.exists(drivers_path):
+                return []
+            self.drivers = pd.read_csv(drivers_path)
+        route_drivers = self.drivers[self.drivers["Route"] == route].sort_values("Rank")
+        return route_drivers["Factor"].tolist()
+    
+    def generate_predictions(self, segmented=False):
         """Generate predictions for current freight rates"""
-        # Load data
-        data_dict = self.load_data()
+        # Load data and features (without target for prediction)
+        data_dict, features, _ = self.load_features()
         if data_dict is None:
             logger.error("Failed to load data for predictions")
             return None
             
-        # Prepare features (without target for prediction)
-        features, _ = self.prepare_features(data_dict)
         if features is None:
             logger.error("Failed to prepare features for prediction")
             return None
             
-        # Load model if not already loaded
-        if self.model is None:
-            if not self.load_model():
-                logger.error("Failed to load model for prediction")
+        # Predict from each route's latest observation
+        features = features.sort_values("Date", kind="stable").groupby("Route", sort=False).tail(1)
+        
+        if segmented:
+            # Same labels as training, so prefix-only segments are found too
+            segments = SegmentTrainer.segment_labels(features["Route"], self.routes.route_types())
+            if not set(segments) <= set(self.segment_models) and not self.load_segment_models(segments):
+                logger.error("No segment models available for prediction")
                 return None
+                
+            has_model = np.isin(segments, list(self.segment_models))
+            if not has_model.all():
+                logger.warning(f"No segment model for routes {list(features['Route'][~has_model])}, skipping them")
+            features = features[has_model]
+            segments = segments[has_model]
+            
+            # The inference session serves the global model; a snapshot left from an
+            # earlier global run may not match the model currently published
+            snapshot_path = os.path.join(self.results_dir, "inference_snapshot.npz")
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+                logger.info("Removed the global inference snapshot for the segmented run")
+                
+            predictions = np.empty(len(features))
+            drivers = []
+            for segment, bundle in self.segment_models.items():
+                in_segment = segments == segment
+                if in_segment.any():
+                    predictions[in_segment] = self._predict_with(bundle, features[in_segment])
+                    drivers.append(self.route_drivers(bundle, features[in_segment]))
+        else:
+            # Load model if not already loaded, or if a newer version was published
+            current = self.model_registry.current_version(MODEL_NAME)
+            if self.model is None or (current is not None and current != self.model_version):
+                if not self.load_model():
+                    logger.error("Failed to load model for prediction")
+                    return None
+                    
+            bundle = {"model": self.model, "scaler": self.scaler, "available_features": self.available_features}
+            predictions = self._predict_with(bundle, features)
+            drivers = [self.route_drivers(bundle, features)]
+            
+            # Latest rows for the API/dashboard inference session
+            save_snapshot(
+                os.path.join(self.results_dir, "inference_snapshot.npz"),
+                features["Route"].to_numpy(),
+                self.available_features,
+                features.reindex(columns=self.available_features, fill_value=0).to_numpy(dtype="float64"),
+                features["Current_TCE"].to_numpy() if "Current_TCE" in features.columns else None
+            )
         
-        # Extract routes for results
-        routes = features["Route"].values
+        self.save_route_drivers(pd.concat(drivers, ignore_index=True))
         
-        # Prepare feature matrix without route column
-        X = features.drop("Route", axis=1) if "Route" in features.columns else features
+        bounds = self.predict_intervals(features, segments if segmented else None)
+        return self.build_results(data_dict, features["Route"].values, predictions, bounds)
+    
+    def inference_session(self):
+        """Precompiled single-route predictor for the current model and latest snapshot"""
+        return get_inference_session(self.model_registry, os.path.join(self.results_dir, "inference_snapshot.npz"),
+                                     MODEL_NAME)
+    
+    def interval_ensemble(self, segment=None):
+        """Bootstrap ensemble of the global model, or of one segment model"""
+        if segment is None:
+            return self.intervals
+        if segment not in self.segment_intervals:
+            self.segment_intervals[segment] = BootstrapIntervals(
+                self.model_params, os.path.join(self.models_dir, "ensemble", "segments", segment)
+            )
+        return self.segment_intervals[segment]
+    
+    def fit_intervals(self, features, target, max_workers=None, segmented=False):
+        """
+        Fit (or reuse) the bootstrap ensembles behind the per-route prediction intervals
         
-        # Align features with model's expected features
-        missing_cols = set(self.available_features) - set(X.columns)
-        for col in missing_cols:
-            X[col] = 0  # Fill with 0 for missing features
+        Ensembles use the current model parameters, so tuned settings reach
+        them too. Segmented runs fit one ensemble per loaded segment model on
+        that segment's rows.
+        """
+        if features is None or target is None:
+            logger.error("Features or target is None, cannot fit interval ensemble")
+            return False
             
-        # Select only the features the model was trained on
-        X = X[self.available_features]
-        
-        # Scale features
-        X_scaled = self.scaler.transform(X)
-        
-        # Generate predictions
-        predictions = self.model.predict(X_scaled)
+        X = features.drop(columns=ID_COLUMNS, errors="ignore")
+        if not segmented:
+            jobs = [(None, np.ones(len(X), dtype=bool))]
+        else:
+            segments = SegmentTrainer.segment_labels(features["Route"], self.routes.route_types())
+            jobs = [(segment, segments == segment) for segment in sorted(self.segment_models)]
+            
+        fitted = True
+        for segment, rows in jobs:
+            ensemble = self.interval_ensemble(segment)
+            ensemble.model_params = dict(self.model_params)
+            ensemble.max_workers = max_workers
+            fitted &= ensemble.fit(X[rows], target[rows])
+        return fitted
+    
+    def predict_intervals(self, features, segments=None):
+        """
+        Interval bounds for feature rows, from the ensemble of each row's model
         
-        # Calculate prediction intervals (simple method)
-        prediction_std = np.std(predictions)
-        lower_bounds = predictions - 1.96 * prediction_std
-        upper_bounds = predictions + 1.96 * prediction_std
+        Returns:
+            Tuple of (lower, upper) arrays, or None if any needed ensemble is unavailable
+        """
+        X = features.drop(columns=ID_COLUMNS, errors="ignore")
+        if segments is None:
+            return self.intervals.predict(X)
+            
+        lower, upper = np.empty(len(X)), np.empty(len(X))
+        for segment in np.unique(segments):
+            in_segment = segments == segment
+            bounds = self.interval_ensemble(segment).predict(X[in_segment])
+            if bounds is None:
+                logger.warning(f"No interval ensemble for segment {segment}")
+                return None
+            lower[in_segment], upper[in_segment] = bounds
+        return lower, upper
+    
+    def build_results(self, data_dict, routes, predictions, bounds=None):
+        """Assemble and save route_predictions.csv from per-route predictions"""
+        if bounds is not None:
+            # Bootstrap quantiles per route, widened if needed to contain the point prediction
+            lower_bounds = np.minimum(bounds[0], predictions)
+            upper_bounds = np.maximum(bounds[1], predictions)
+        else:
+            logger.warning("No interval ensemble available, using the cross-route spread as interval")
+            prediction_std = np.std(predictions)
+            lower_bounds = predictions - 1.96 * prediction_std
+            upper_bounds = predictions + 1.96 * prediction_std
         
         # Create results DataFrame
         results_df = pd.DataFrame({
@@ -404,9 +1068,10 @@ class MaritimeMLEngine:
         
         # Add route descriptions
         freight_df = data_dict["freight"]
+        route_descriptions = self.routes.labels()
         if "Description" in freight_df.columns:
-            route_descriptions = dict(zip(freight_df["Route"], freight_df["Description"]))
-            results_df["Description"] = results_df["Route"].map(route_descriptions)
+            route_descriptions.update(zip(freight_df["Route"], freight_df["Description"]))
+        results_df["Description"] = results_df["Route"].map(route_descriptions)
         
         # Add current TCE values if available
         if "TCE" in freight_df.columns:
@@ -445,156 +1110,126 @@ class MaritimeMLEngine:
         
         return results_df
     
-    def generate_visualizations(self, predictions_df):
-        """Generate visualizations for the predictions"""
+    def run_scenarios(self, grid, routes=None, save=True):
+        """
+        Score a grid of what-if perturbations for every route in one batched predict
+        
+        Args:
+            grid: Mapping of feature name to the perturbations to try. Market and
+                macro features take relative changes (0.10 = +10%). The key
+                "sentiment" shifts every sentiment mean column additively,
+                clipped to [-1, 1]. The grid's full Cartesian product is scored.
+                Features that were constant in training cannot move a
+                prediction and are rejected.
+            routes: Routes to include (default: all with features)
+            save: Write the results to results/scenario_results.csv
+            
+        Returns:
+            Tidy DataFrame with one row per scenario and route
+        """
+        data_dict, features, _ = self.load_features()
+        if features is None:
+            logger.error("Failed to prepare features for scenarios")
+            return None
+            
+        if self.model is None and not self.load_model():
+            logger.error("Failed to load model for scenarios")
+            return None
+            
+        # Each route's latest observation is the baseline
+        latest = features.sort_values("Date", kind="stable").groupby("Route", sort=False).tail(1)
+        if routes is not None:
+            latest = latest[latest["Route"].isin(routes)]
+        route_codes = latest["Route"].to_numpy()
+        base = latest.reindex(columns=self.available_features, fill_value=0).to_numpy(dtype="float64")
+        
+        # Resolve grid keys to feature column positions
+        column_pos = {name: i for i, name in enumerate(self.available_features)}
+        sentiment_cols = [i for name, i in column_pos.items()
+                          if name.startswith("sentiment_mean_") or name == "sentiment_ewm"]
+        targets = {}
+        for key in grid:
+            if key == SCENARIO_SENTIMENT_KEY:
+                targets[key] = sentiment_cols
+            elif key in column_pos:
+                targets[key] = [column_pos[key]]
+            else:
+                raise ValueError(f"Unknown scenario feature: {key}")
+            # The trees never split on a column that did not vary in training
+            targets[key] = [i for i in targets[key] if self.scaler.var_[i] > 0]
+            if not targets[key]:
+                raise ValueError(f"Scenario feature {key} was constant in training and has no effect")
+                
+        # Scenario values: one column per grid key, one row per combination
+        keys = list(grid)
+        values = np.array(list(itertools.product(*(grid[key] for key in keys))), dtype="float64")
+        n_scenarios, n_routes = len(values), len(route_codes)
+        
+        # scenarios x routes x features tensor, perturbed by broadcasting
+        tensor = np.broadcast_to(base, (n_scenarios,) + base.shape).copy()
+        for k, key in enumerate(keys):
+            cols = targets[key]
+            if key == SCENARIO_SENTIMENT_KEY:
+                tensor[:, :, cols] = np.clip(tensor[:, :, cols] + values[:, k, None, None], -1, 1)
+            else:
+                tensor[:, :, cols] *= 1 + values[:, k, None, None]
+                
+        # Keep the derived ratio consistent with perturbed TCE or OPEX
+        if {"TCE_OPEX_Ratio", "Current_TCE", "OPEX"} <= column_pos.keys():
+            tensor[:, :, column_pos["TCE_OPEX_Ratio"]] = (
+                tensor[:, :, column_pos["Current_TCE"]] / tensor[:, :, column_pos["OPEX"]]
+            )
+        
+        # Baseline rows ride along in the same batch
+        batch = np.concatenate([tensor.reshape(-1, base.shape[1]), base])
+        batch = (batch - self.scaler.mean_) / self.scaler.scale_
+        scored = self.model.get_booster().inplace_predict(batch.astype("float32"))
+        predicted = scored[:-n_routes].reshape(n_scenarios, n_routes)
+        baseline = scored[-n_routes:]
+        
+        results = pd.DataFrame({
+            "Scenario": np.repeat(np.arange(n_scenarios), n_routes),
+            **{key: np.repeat(values[:, k], n_routes) for k, key in enumerate(keys)},
+            "Route": np.tile(route_codes, n_scenarios),
+            "Baseline_Change": np.tile(baseline, n_scenarios),
+            "Predicted_Change": predicted.ravel()
+        })
+        results["Scenario_Impact"] = results["Predicted_Change"] - results["Baseline_Change"]
+        if "Current_TCE" in column_pos:
+            current_tce = base[:, column_pos["Current_TCE"]]
+            results["Predicted_TCE"] = np.tile(current_tce, n_scenarios) + results["Predicted_Change"]
+            
+        if save:
+            scenarios_path = os.path.join(self.results_dir, "scenario_results.csv")
+            results.to_csv(scenarios_path, index=False)
+            logger.info(f"✅ {n_scenarios} scenarios x {n_routes} routes saved to {scenarios_path}")
+            
+        return results
+    
+    def generate_visualizations(self, predictions_df, preview=False):
+        """
+        Generate visualizations for the predictions
+        
+        Charts render concurrently and are skipped when their input data is
+        unchanged since the last run. preview=True renders low-DPI copies for
+        the dashboard.
+        """
         if predictions_df is None or predictions_df.empty:
             logger.warning("No predictions available for visualization")
             return {}
             
-        # Create visualizations directory
         viz_dir = os.path.join(self.results_dir, "visuals")
-        os.makedirs(viz_dir, exist_ok=True)
-        
-        visualization_paths = {}
         
         try:
-            # 1. Top Routes by Predicted Change
-            plt.figure(figsize=(12, 8))
-            
-            # Select top 5 and bottom 5 routes by predicted change
-            top_routes = pd.concat([
-                predictions_df.head(5),  # Top 5 improving
-                predictions_df.tail(5)   # Top 5 declining
-            ])
-            
-            # Create bar chart
-            colors = ['green' if x > 0 else 'red' for x in top_routes['Predicted_Change']]
-            plt.bar(range(len(top_routes)), top_routes['Predicted_Change'], color=colors)
-            
-            # Add error bars for uncertainty
-            plt.errorbar(
-                range(len(top_routes)), 
-                top_routes['Predicted_Change'],
-                yerr=[
-                    top_routes['Predicted_Change'] - top_routes['Lower_Bound'],
-                    top_routes['Upper_Bound'] - top_routes['Predicted_Change']
-                ],
-                fmt='none', 
-                color='black', 
-                capsize=5
+            visualization_paths = PredictionChartStage(viz_dir).render_all(
+                predictions_df, self.feature_importance, preview=preview
             )
-            
-            plt.xticks(range(len(top_routes)), top_routes['Route'], rotation=45, ha='right')
-            plt.axhline(y=0, color='black', linestyle='-', alpha=0.3)
-            plt.xlabel('Route')
-            plt.ylabel('Predicted TCE Change ($/day)')
-            plt.title('Top Routes by Predicted Rate Changes')
-            plt.tight_layout()
-            
-            # Save figure
-            top_rates_path = os.path.join(viz_dir, 'top_rate_changes.png')
-            plt.savefig(top_rates_path, dpi=300, bbox_inches='tight')
-            visualization_paths['top_rate_changes'] = top_rates_path
-            plt.close()
-            
-            # 2. Current vs Predicted TCE Rates 
-            if "Current_TCE" in predictions_df.columns and "Predicted_TCE" in predictions_df.columns:
-                plt.figure(figsize=(14, 8))
-                
-                # Sort routes by current TCE
-                route_order = predictions_df.sort_values('Current_TCE', ascending=False)['Route']
-                
-                current_tce = [predictions_df[predictions_df['Route'] == route]['Current_TCE'].values[0] 
-                               for route in route_order]
-                predicted_tce = [predictions_df[predictions_df['Route'] == route]['Predicted_TCE'].values[0] 
-                                 for route in route_order]
-                
-                x = np.arange(len(route_order))
-                width = 0.35
-                
-                fig, ax = plt.subplots(figsize=(14, 8))
-                rects1 = ax.bar(x - width/2, current_tce, width, label='Current TCE')
-                rects2 = ax.bar(x + width/2, predicted_tce, width, label='Predicted TCE')
-                
-                ax.set_ylabel('TCE Rate ($/day)')
-                ax.set_title('Current vs Predicted TCE Rates by Route')
-                ax.set_xticks(x)
-                ax.set_xticklabels(route_order, rotation=45, ha='right')
-                ax.legend()
-                
-                # Add value labels on bars
-                def autolabel(rects):
-                    for rect in rects:
-                        height = rect.get_height()
-                        ax.annotate(f'${int(height)}',
-                                    xy=(rect.get_x() + rect.get_width()/2, height),
-                                    xytext=(0, 3),
-                                    textcoords="offset points",
-                                    ha='center', va='bottom', fontsize=8)
-                
-                autolabel(rects1)
-                autolabel(rects2)
-                
-                fig.tight_layout()
-                
-                # Save figure
-                tce_comparison_path = os.path.join(viz_dir, 'tce_comparison.png')
-                plt.savefig(tce_comparison_path, dpi=300, bbox_inches='tight')
-                visualization_paths['tce_comparison'] = tce_comparison_path
-                plt.close()
-            
-            # 3. Feature Importance Plot
-            if self.feature_importance:
-                plt.figure(figsize=(12, 8))
-                
-                # Sort feature importance
-                sorted_importance = dict(sorted(self.feature_importance.items(), 
-                                               key=lambda x: x[1], reverse=True))
-                
-                # Take top 15 features
-                top_features = dict(list(sorted_importance.items())[:15])
-                
-                plt.barh(list(top_features.keys()), list(top_features.values()))
-                plt.xlabel('Importance')
-                plt.title('Top 15 Feature Importance')
-                plt.tight_layout()
-                
-                # Save figure
-                importance_path = os.path.join(viz_dir, 'feature_importance.png')
-                plt.savefig(importance_path, dpi=300, bbox_inches='tight')
-                visualization_paths['feature_importance'] = importance_path
-                plt.close()
-                
-            # 4. Prediction Uncertainty by Route
-            plt.figure(figsize=(12, 6))
-            
-            # Calculate uncertainty magnitude
-            uncertainty = predictions_df["Upper_Bound"] - predictions_df["Lower_Bound"]
-            
-            # Sort by uncertainty
-            sorted_indices = uncertainty.argsort()
-            sorted_routes = predictions_df.iloc[sorted_indices]["Route"].values
-            sorted_uncertainty = uncertainty.iloc[sorted_indices].values
-            
-            # Create horizontal bar chart
-            plt.barh(range(len(sorted_routes)), sorted_uncertainty)
-            plt.yticks(range(len(sorted_routes)), sorted_routes)
-            plt.xlabel('Prediction Uncertainty Range')
-            plt.title('Route Prediction Confidence (Smaller is Better)')
-            plt.tight_layout()
-            
-            # Save figure
-            uncertainty_path = os.path.join(viz_dir, 'prediction_uncertainty.png')
-            plt.savefig(uncertainty_path, dpi=300, bbox_inches='tight')
-            visualization_paths['prediction_uncertainty'] = uncertainty_path
-            plt.close()
-            
             logger.info(f"✅ Generated {len(visualization_paths)} visualizations")
             return visualization_paths
             
         except Exception as e:
             logger.error(f"Error generating visualizations: {str(e)}")
-            return visualization_paths
+            return {}
     
     def generate_market_analysis(self, predictions_df):
         """Generate market analysis for the report"""
@@ -647,8 +1282,8 @@ class MaritimeMLEngine:
             featured_idx = predictions_df["Predicted_Change"].abs().idxmax()
             featured_route = predictions_df.loc[featured_idx].to_dict()
             
-        # Generate key driving factors (placeholder - would need more data integration)
-        key_factors = [
+        # Key driving factors: the featured route's model drivers, else general themes
+        key_factors = self.key_factors(featured_route["Route"]) or [
             "Dangote refinery impact on regional product flows",
             "Shifting crude supply patterns from West Africa",
             "Port infrastructure development in Nigeria",
@@ -660,36 +1295,74 @@ class MaritimeMLEngine:
             "trend_percentage": improving_percentage,
             "volatility_level": volatility_level,
             "featured_route": featured_route,
-            "key_factors": key_factors
+            "key_factors": key_factors,
+            "market_risk": self.market_risk_summary()
         }
     
-    def run_pipeline(self):
-        """Run the complete ML pipeline"""
-        # 1. Load data
-        logger.info("Loading data...")
+    def market_risk_summary(self):
+        """Latest crude and tanker volatility, drawdown and tanker beta from the collector's market metrics"""
         data_dict = self.load_data()
+        market_metrics = (data_dict or {}).get("market_metrics") or {}
+        summary = market_metrics.get("summary")
+        beta_df = market_metrics.get("betas")
+        if summary is None:
+            return {}
+            
+        # The beta pairs name the tanker equities the collector tracks
+        tankers = [] if beta_df is None else list(dict.fromkeys(beta_df.columns.str.split("/").str[0]))
+        
+        risk = {}
+        for group, symbols in [("crude", ["CL=F", "BZ=F"]), ("tanker", tankers)]:
+            rows = summary.reindex(symbols).dropna(how="all")
+            if not rows.empty:
+                risk[f"{group}_volatility"] = float(rows["Volatility"].mean())
+                risk[f"{group}_drawdown"] = float(rows["Drawdown"].mean())
+                
+        if beta_df is not None and not beta_df.empty:
+            latest = beta_df.ffill().iloc[-1]
+            risk["tanker_beta"] = {crude: float(betas.mean())
+                                   for crude, betas in latest.groupby(latest.index.str.split("/").str[-1])}
+        return risk
+    
+    def run_pipeline(self, incremental=False, segmented=False):
+        """Run the complete ML pipeline"""
+        # 1-2. Load data and prepare features
+        logger.info("Loading data and preparing features...")
+        data_dict, features, target = self.load_features()
         
         if data_dict is None:
             logger.error("Failed to load data")
             return None
             
-        # 2. Prepare features
-        logger.info("Preparing features...")
-        features, target = self.prepare_features(data_dict)
-        
         if features is None or target is None:
             logger.error("Failed to prepare features")
             return None
             
         # 3. Train model
         logger.info("Training model...")
-        if not self.train_model(features, target):
+        if segmented:
+            trained = self.train_segments(features, target)
+        elif incremental:
+            trained = self.train_incremental(features, target)
+        else:
+            trained = self.train_model(features, target)
+        if not trained:
             logger.error("Failed to train model")
             return None
             
+        # Per-route prediction intervals; an incremental update keeps the ensemble
+        # of the last full training run, like the model's frozen scaler
+        reuse = (incremental and not segmented and self.train_metrics.get("training_mode") == "incremental"
+                 and self.intervals.load() and self.intervals.feature_columns == list(self.available_features))
+        if reuse:
+            logger.info("Reusing interval ensemble for the incremental update")
+        else:
+            logger.info("Fitting interval ensemble...")
+            self.fit_intervals(features, target, segmented=segmented)
+            
         # 4. Generate predictions
         logger.info("Generating predictions...")
-        predictions_df = self.generate_predictions()
+        predictions_df = self.generate_predictions(segmented=segmented)
         
         if predictions_df is None:
             logger.error("Failed to generate predictions")
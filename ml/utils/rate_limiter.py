@@ -0,0 +1,161 @@
+import os
+import json
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+logger = logging.getLogger("QuotaScheduler")
+
+class RateLimiter:
+    """
+    Thread-safe sliding-window rate limiter.
+    Allows at most `max_calls` acquisitions in any `period`-second window, shared by
+    every thread holding a reference to the same limiter.
+    """
+    def __init__(self, max_calls, period=1.0):
+        if max_calls <= 0:
+            raise ValueError("max_calls must be positive")
+
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        """Drop call timestamps that have left the window"""
+        while self._calls and now - self._calls[0] >= self.period:
+            self._calls.popleft()
+
+    def try_acquire(self):
+        """
+        Reserve a slot without blocking
+
+        Returns:
+            0.0 if a slot was reserved, otherwise the seconds until one frees up
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+
+            if len(self._calls) < self.max_calls:
+                self._calls.append(now)
+                return 0.0
+
+            return self.period - (now - self._calls[0])
+
+    def acquire(self, max_wait=None):
+        """
+        Block until a slot is available
+
+        Args:
+            max_wait: Give up instead of waiting longer than this many seconds
+
+        Returns:
+            True if a slot was reserved, False if max_wait would have been exceeded
+        """
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return True
+
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+
+            time.sleep(wait)
+
+class QuotaScheduler:
+    """
+    Runs API requests concurrently without exceeding per-minute and per-day quotas.
+    Identical requests (same key) submitted within one run share a single call, and
+    requests beyond the per-minute quota queue until the window frees up. The daily
+    count is persisted so consecutive runs on the same day share one budget.
+    """
+    def __init__(self, requests_per_minute=5, requests_per_day=25, max_workers=4, usage_path=None):
+        self.minute_limiter = RateLimiter(requests_per_minute, period=60.0)
+        self.requests_per_day = requests_per_day
+        self.max_workers = max_workers
+        self.usage_path = usage_path
+
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._usage = self._load_usage()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def _load_usage(self):
+        """Load today's request count from disk"""
+        today = date.today().isoformat()
+        if self.usage_path and os.path.exists(self.usage_path):
+            try:
+                with open(self.usage_path, "r") as f:
+                    usage = json.load(f)
+                if usage.get("date") == today:
+                    return usage
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable quota usage file: {str(e)}")
+        return {"date": today, "count": 0}
+
+    def _save_usage(self):
+        if not self.usage_path:
+            return
+        tmp_path = self.usage_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._usage, f)
+        os.replace(tmp_path, self.usage_path)
+
+    def _reserve_daily(self):
+        """Count one request against today's quota, or refuse if it is spent"""
+        with self._lock:
+            today = date.today().isoformat()
+            if self._usage["date"] != today:
+                self._usage = {"date": today, "count": 0}
+            if self._usage["count"] >= self.requests_per_day:
+                return False
+            self._usage["count"] += 1
+            self._save_usage()
+            return True
+
+    @property
+    def remaining_today(self):
+        with self._lock:
+            return max(0, self.requests_per_day - self._usage["count"])
+
+    def _run(self, key, fn, args, kwargs):
+        if not self._reserve_daily():
+            logger.warning(f"Daily quota of {self.requests_per_day} requests spent, skipping {key}")
+            return None
+
+        self.minute_limiter.acquire()
+        return fn(*args, **kwargs)
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Schedule fn(*args, **kwargs) unless a request with the same key is already scheduled
+
+        Returns:
+            Future resolving to fn's result, or None if the daily quota was spent
+        """
+        with self._lock:
+            if key in self._futures:
+                return self._futures[key]
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            future = self._executor.submit(self._run, key, fn, args, kwargs)
+            self._futures[key] = future
+            return future
+
+    def shutdown(self):
+        """Wait for scheduled requests and release the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -32,6 +32,9 @@ class MaritimeReportGenerator:
         # Create directories if they don't exist
         for directory in [data_dir, results_dir, report_dir, images_dir]:
             os.makedirs(directory, exist_ok=True)
+            
+        # Base64 encodings keyed by path, reused while the file is unchanged
+        self._encoded_images = {}
     
     def encode_image(self, image_path):
         """Encode an image to base64 for embedding in HTML"""
@@ -40,8 +43,16 @@ class MaritimeReportGenerator:
             return ""
             
         try:
+            stat = os.stat(image_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            cached = self._encoded_images.get(image_path)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+                
             with open(image_path, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode('utf-8')
+                encoded = base64.b64encode(image_file.read()).decode('utf-8')
+            self._encoded_images[image_path] = (signature, encoded)
+            return encoded
         except Exception as e:
             logger.error(f"Error encoding image {image_path}: {str(e)}")
             return ""
@@ -64,6 +75,13 @@ class MaritimeReportGenerator:
         else:
             logger.warning(f"Predictions not found: {predictions_path}")
             
+        # Load per-route prediction drivers
+        drivers_path = os.path.join(self.results_dir, "route_drivers.csv")
+        if os.path.exists(drivers_path):
+            data_package["drivers_df"] = pd.read_csv(drivers_path)
+        else:
+            logger.warning(f"Route drivers not found: {drivers_path}")
+            
         # Load ML metadata
         metadata_path = os.path.join(self.results_dir, "ml_output_metadata.json")
         if os.path.exists(metadata_path):
@@ -82,6 +100,14 @@ class MaritimeReportGenerator:
             
         return data_package
     
+    def route_key_factors(self, route, data_package, default):
+        """Model drivers of a route from the prediction run, or the default factors"""
+        drivers_df = data_package.get("drivers_df")
+        if drivers_df is None:
+            return default
+        factors = drivers_df[drivers_df["Route"] == route].sort_values("Rank")["Factor"].tolist()
+        return factors or default
+    
     def prepare_report_data(self, data_package):
         """Prepare data for the report template"""
         report_data = {
@@ -181,11 +207,12 @@ class MaritimeReportGenerator:
                         ]
                         
                         # Add key factors
-                        report_data["featured_route"]["key_factors"] = [
-                            "Increased regional product exports",
-                            "Reduced port congestion improving turnaround times",
-                            "Favorable bunker pricing in West Africa"
-                        ]
+                        report_data["featured_route"]["key_factors"] = self.route_key_factors(
+                            featured_route_symbol, data_package, [
+                                "Increased regional product exports",
+                                "Reduced port congestion improving turnaround times",
+                                "Favorable bunker pricing in West Africa"
+                            ])
             
             # If no featured route found, use the route with the largest predicted change
             if "featured_route" not in report_data and "predictions_df" in data_package:
@@ -199,11 +226,12 @@ class MaritimeReportGenerator:
                     "Bunker price volatility impacts margins"
                 ]
                 
-                report_data["featured_route"]["key_factors"] = [
-                    "Market supply/demand imbalance",
-                    "Seasonal pattern matching historical trends",
-                    "Correlated with crude price movements"
-                ]
+                report_data["featured_route"]["key_factors"] = self.route_key_factors(
+                    report_data["featured_route"]["Route"], data_package, [
+                        "Market supply/demand imbalance",
+                        "Seasonal pattern matching historical trends",
+                        "Correlated with crude price movements"
+                    ])
         
         # Add model metrics if available
         if "model_metrics" in data_package:
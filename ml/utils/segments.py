@@ -0,0 +1,149 @@
+import os
+import json
+import shutil
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import joblib
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+logger = logging.getLogger("SegmentTrainer")
+
+def _fit_segment(job):
+    """Process-pool entry point: train one segment's model from the memory-mapped arrays"""
+    # Only the pages for this segment's rows are read; nothing is pickled to the worker
+    X_all = np.load(job["X_path"], mmap_mode="r")
+    y_all = np.load(job["y_path"], mmap_mode="r")
+    rows = np.load(job["rows_path"])
+    X, y = X_all[rows], y_all[rows]
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=job["test_size"], random_state=job["random_state"]
+    )
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+
+    model = xgb.XGBRegressor(**job["params"], n_jobs=1, random_state=job["random_state"])
+    model.fit(X_train_scaled, y_train)
+    y_pred = model.predict(scaler.transform(X_test))
+
+    metrics = {
+        "mae": float(mean_absolute_error(y_test, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        "r2": float(r2_score(y_test, y_pred)) if len(y_test) > 1 else float("nan"),
+        "data_points": int(len(rows)),
+        "features": len(job["feature_columns"]),
+        "training_mode": "segment",
+        "segment": job["segment"]
+    }
+    if job["trained_through"]:
+        metrics["trained_through"] = job["trained_through"]
+
+    # Same artifact layout as the global model, so the registry and loader are shared
+    out_dir = job["out_dir"]
+    model.save_model(os.path.join(out_dir, "maritime_xgb_model.json"))
+    joblib.dump(scaler, os.path.join(out_dir, "feature_scaler.pkl"))
+    for name, payload in [("feature_importance.json", dict(zip(job["feature_columns"], model.feature_importances_.astype(float)))),
+                          ("training_metrics.json", metrics),
+                          ("available_features.json", job["feature_columns"])]:
+        with open(os.path.join(out_dir, name), "w") as f:
+            json.dump(payload, f, indent=2)
+
+    return job["segment"], metrics
+
+class SegmentTrainer:
+    """
+    Trains an independent freight model per route segment (TD dirty, TC clean).
+
+    The feature matrix and target are written once as .npy files and every
+    worker memory-maps them, so a segment job only carries file paths and its
+    row indices. Each segment's artifacts use the global model's file layout
+    so they can be published to the model registry and loaded the same way.
+    """
+    def __init__(self, model_params, work_dir="models/segments", test_size=0.2,
+                 random_state=42, min_rows=20, max_workers=None):
+        self.model_params = dict(model_params)
+        self.work_dir = work_dir
+        self.test_size = test_size
+        self.random_state = random_state
+        self.min_rows = min_rows
+        self.max_workers = max_workers
+
+        os.makedirs(work_dir, exist_ok=True)
+
+    @staticmethod
+    def segment_labels(routes, route_types):
+        """Segment of each route: its registry route type, else the code prefix"""
+        routes = pd.Series(routes)
+        return routes.map(route_types).fillna(routes.str.slice(0, 2)).to_numpy()
+
+    def train(self, features, target, segments, id_columns=("Route", "Date")):
+        """
+        Train one model per segment in a process pool
+
+        Args:
+            features: Feature frame including the id columns
+            target: Target aligned with features
+            segments: Segment label of every feature row
+
+        Returns:
+            Dictionary mapping segment to its artifact directory and metrics
+        """
+        feature_columns = [c for c in features.columns if c not in id_columns]
+        X = features[feature_columns].to_numpy(dtype="float32")
+        y = np.asarray(target, dtype="float32")
+        known = ~np.isnan(y)
+
+        X_path = os.path.join(self.work_dir, "features.npy")
+        y_path = os.path.join(self.work_dir, "target.npy")
+        np.save(X_path, X)
+        np.save(y_path, y)
+
+        trained_through = None
+        if "Date" in features.columns:
+            trained_through = str(pd.Timestamp(features["Date"].max()).date())
+
+        jobs = []
+        for segment in sorted(pd.unique(segments)):
+            rows = np.flatnonzero((segments == segment) & known)
+            if len(rows) < self.min_rows:
+                logger.warning(f"Skipping segment {segment}: only {len(rows)} rows")
+                continue
+
+            out_dir = os.path.join(self.work_dir, segment)
+            shutil.rmtree(out_dir, ignore_errors=True)
+            os.makedirs(out_dir)
+            rows_path = os.path.join(out_dir, "rows.npy")
+            np.save(rows_path, rows)
+
+            jobs.append({
+                "segment": segment,
+                "X_path": X_path,
+                "y_path": y_path,
+                "rows_path": rows_path,
+                "out_dir": out_dir,
+                "feature_columns": feature_columns,
+                "params": self.model_params,
+                "test_size": self.test_size,
+                "random_state": self.random_state,
+                "trained_through": trained_through
+            })
+
+        results = {}
+        try:
+            if jobs:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    for segment, metrics in executor.map(_fit_segment, jobs):
+                        out_dir = os.path.join(self.work_dir, segment)
+                        os.remove(os.path.join(out_dir, "rows.npy"))
+                        results[segment] = {"dir": out_dir, "metrics": metrics}
+                        logger.info(f"Segment {segment}: MAE={metrics['mae']:.2f}, R²={metrics['r2']:.2f}")
+        finally:
+            os.remove(X_path)
+            os.remove(y_path)
+
+        return results
@@ -0,0 +1,212 @@
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import xgboost as xgb
+
+logger = logging.getLogger("HyperparameterSearch")
+
+SEARCH_SPACE = {
+    "max_depth": [2, 3, 4, 5, 6],
+    "learning_rate": [0.02, 0.05, 0.1, 0.2],
+    "subsample": [0.6, 0.8, 1.0],
+    "colsample_bytree": [0.6, 0.8, 1.0],
+    "min_child_weight": [1, 3, 5, 10],
+    "reg_lambda": [0.5, 1.0, 2.0, 5.0]
+}
+
+def _evaluate(job):
+    """Process-pool entry point: fit one configuration with early stopping"""
+    data = np.load(job["data_path"])
+    model = xgb.XGBRegressor(
+        objective="reg:squarederror",
+        tree_method="hist",
+        n_estimators=job["rounds"],
+        early_stopping_rounds=job["early_stopping_rounds"],
+        eval_metric="rmse",
+        n_jobs=1,
+        random_state=job["random_state"],
+        **job["params"]
+    )
+    model.fit(data["X_train"], data["y_train"], eval_set=[(data["X_val"], data["y_val"])], verbose=False)
+    return job["key"], float(model.best_score), int(model.best_iteration)
+
+class HyperparameterSearch:
+    """
+    Successive-halving search over XGBoost settings.
+
+    Random configurations start with a small boosting budget. After each rung
+    only the best 1/eta survive, and their budget is multiplied by eta until
+    it reaches max_rounds. Every fit uses the hist tree method and early stops
+    on a validation split made of the most recent dates, so scores reflect
+    forecasting forward in time. Each (configuration, budget, data) result is
+    cached, so an interrupted or repeated search resumes instead of refitting.
+    """
+    def __init__(self, output_dir="models", n_configs=27, min_rounds=50, max_rounds=800, eta=3,
+                 validation_fraction=0.2, early_stopping_rounds=30, max_workers=None, random_state=42):
+        self.output_dir = output_dir
+        self.cache_path = os.path.join(output_dir, "tuning_cache.json")
+        self.best_params_path = os.path.join(output_dir, "best_params.json")
+        self.n_configs = n_configs
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.eta = eta
+        self.validation_fraction = validation_fraction
+        self.early_stopping_rounds = early_stopping_rounds
+        self.max_workers = max_workers
+        self.random_state = random_state
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def time_split(self, features, target):
+        """
+        Hold out the most recent dates for validation
+
+        Returns:
+            Tuple of (X_train, y_train, X_val, y_val) float arrays
+        """
+        dates = features["Date"].to_numpy()
+        unique_dates = np.sort(np.unique(dates))
+        n_val = max(1, int(round(len(unique_dates) * self.validation_fraction)))
+        if n_val >= len(unique_dates):
+            raise ValueError("Not enough distinct dates for a time-ordered validation split")
+
+        is_val = dates >= unique_dates[-n_val]
+        X = features.drop(columns=["Route", "Date"]).to_numpy(dtype="float32")
+        y = np.asarray(target, dtype="float32")
+        known = ~np.isnan(y)
+
+        return X[~is_val & known], y[~is_val & known], X[is_val & known], y[is_val & known]
+
+    def sample_configs(self):
+        """Random configurations from the search space"""
+        rng = np.random.default_rng(self.random_state)
+        configs = []
+        seen = set()
+        while len(configs) < self.n_configs and len(seen) < np.prod([len(v) for v in SEARCH_SPACE.values()]):
+            config = {name: values[rng.integers(len(values))] for name, values in SEARCH_SPACE.items()}
+            config = {name: value.item() if hasattr(value, "item") else value for name, value in config.items()}
+            key = json.dumps(config, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                configs.append(config)
+        return configs
+
+    def rungs(self):
+        """Boosting budget of each successive-halving rung"""
+        budgets = []
+        rounds = self.min_rounds
+        while rounds < self.max_rounds:
+            budgets.append(rounds)
+            rounds *= self.eta
+        budgets.append(self.max_rounds)
+        return budgets
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable tuning cache: {str(e)}")
+            return {}
+
+    def _save_cache(self, cache):
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    @staticmethod
+    def _result_key(config, rounds, data_hash):
+        return hashlib.sha256(f"{json.dumps(config, sort_keys=True)}:{rounds}:{data_hash}".encode()).hexdigest()
+
+    def run(self, features, target):
+        """
+        Search for the best configuration on dated features
+
+        Returns:
+            Dictionary of XGBoost parameters, including the early-stopped n_estimators
+        """
+        X_train, y_train, X_val, y_val = self.time_split(features, target)
+
+        digest = hashlib.sha256()
+        for array in (X_train, y_train, X_val, y_val):
+            digest.update(str(array.shape).encode())
+            digest.update(array.tobytes())
+        data_hash = digest.hexdigest()
+
+        # Workers read the split from disk instead of receiving it with every job
+        data_path = os.path.join(self.output_dir, f"tuning_data_{data_hash[:16]}.npz")
+        np.savez(data_path, X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
+
+        cache = self._load_cache()
+        survivors = self.sample_configs()
+        results = {}
+
+        try:
+            for rung, rounds in enumerate(self.rungs()):
+                jobs = []
+                for config in survivors:
+                    key = self._result_key(config, rounds, data_hash)
+                    if key not in cache:
+                        jobs.append({
+                            "key": key,
+                            "params": config,
+                            "rounds": rounds,
+                            "early_stopping_rounds": self.early_stopping_rounds,
+                            "random_state": self.random_state,
+                            "data_path": data_path
+                        })
+
+                if jobs:
+                    with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                        for key, score, best_iteration in executor.map(_evaluate, jobs):
+                            cache[key] = {"score": score, "best_iteration": best_iteration}
+                            # Persist after every fit so an interrupted search resumes here
+                            self._save_cache(cache)
+
+                scored = sorted(
+                    survivors,
+                    key=lambda config: cache[self._result_key(config, rounds, data_hash)]["score"]
+                )
+                results = {json.dumps(c, sort_keys=True): cache[self._result_key(c, rounds, data_hash)] for c in scored}
+                logger.info(f"Rung {rung + 1}: {len(survivors)} configs at {rounds} rounds "
+                            f"({len(jobs)} fitted, {len(survivors) - len(jobs)} cached), "
+                            f"best RMSE={results[json.dumps(scored[0], sort_keys=True)]['score']:.4f}")
+
+                survivors = scored[:max(1, len(scored) // self.eta)]
+        finally:
+            os.remove(data_path)
+
+        best = survivors[0]
+        best_result = results[json.dumps(best, sort_keys=True)]
+        best_params = {
+            **best,
+            "n_estimators": best_result["best_iteration"] + 1,
+            "tree_method": "hist"
+        }
+        self.save_best_params(best_params, best_result["score"])
+        return best_params
+
+    def save_best_params(self, params, score):
+        """Persist the winning configuration next to the training metrics"""
+        payload = {"params": params, "validation_rmse": score}
+        tmp_path = self.best_params_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, self.best_params_path)
+        logger.info(f"✅ Best parameters saved to {self.best_params_path}")
+        return self.best_params_path
+
+    @staticmethod
+    def load_best_params(models_dir="models"):
+        """Tuned parameters saved by a previous search, or None"""
+        path = os.path.join(models_dir, "best_params.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)["params"]
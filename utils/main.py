@@ -25,8 +25,6 @@ def fetch_macro_data():
     print("Fetching industrial production data...")
     fetch_industrial_production(ALPHA_VANTAGE_KEY)
 
-    fetch_oil_prices(ALPHA_VANTAGE_KEY)
-
 if __name__ == "__main__":
     topics = [
         "freight rates", "global shipping demand", "container shipping",